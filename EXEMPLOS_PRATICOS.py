@@ -10,7 +10,10 @@ Lembre-se de substituir "SUA_API_KEY" pela sua chave real.
 # EXEMPLO 1: ANÁLISE SIMPLES E RÁPIDA
 # ============================================================================
 
-from gmb_ranking_analyzer import GoogleMapsRankingAnalyzer, generate_reports
+from gmb_ranking_analyzer import GoogleMapsRankingAnalyzer, configure_logging, generate_reports
+
+# Logs no console e em gmb_analyzer.log
+configure_logging()
 
 def exemplo_basico():
     """Análise básica - copie e execute"""
@@ -60,19 +63,22 @@ def analise_multi_cidade():
         "Salvador": "-12.9714,-38.5014"
     }
     
+    from gmb_batch import AnalysisJob, run_batch
+    
     analyzer = GoogleMapsRankingAnalyzer(API_KEY)
     resultados = {}
     
-    for cidade, coordenadas in cidades.items():
-        print(f"\n📍 Analisando: {cidade}...")
-        
-        metrics_list, df = analyzer.run_analysis(
-            location=coordenadas,
-            radius=3000,
-            keyword=KEYWORD,
-            max_pages=2
-        )
+    # Todas as cidades em paralelo
+    jobs = {
+        cidade: AnalysisJob(location=coordenadas, radius=3000, keyword=KEYWORD, max_pages=2)
+        for cidade, coordenadas in cidades.items()
+    }
+    lote = run_batch(analyzer, jobs.values())
+    
+    for cidade, job in jobs.items():
+        print(f"\n📍 {cidade}:")
         
+        df = lote.frames[job]
         resultados[cidade] = df
         generate_reports(df, f"{KEYWORD}_{cidade.replace(' ', '_')}")
         
@@ -253,11 +259,9 @@ def analise_competitiva_detalhada():
 # ============================================================================
 
 def monitoramento_semanal():
-    """Salva análise com timestamp para comparação histórica"""
+    """Salva análise no histórico (SQLite) para comparação entre semanas"""
     
-    import json
-    from datetime import datetime
-    from pathlib import Path
+    from gmb_history import HistoryStore
     
     API_KEY = "SUA_API_KEY"
     LOCATION = "-23.55052,-46.633308"
@@ -272,6 +276,10 @@ def monitoramento_semanal():
         max_pages=2
     )
     
+    # Grava a execução inteira (todos os perfis) de uma vez
+    historico = HistoryStore('historico.sqlite')
+    historico.record(df, keyword=KEYWORD, location=LOCATION, radius=2000)
+    
     # Encontra seu negócio
     meu_negocio = df[df['place_id'] == MEU_PLACE_ID]
     
@@ -281,42 +289,15 @@ def monitoramento_semanal():
     
     row = meu_negocio.iloc[0]
     
-    # Dados desta semana
-    dados_semana = {
-        'data': datetime.now().isoformat(),
-        'posicao': int(row['rank_position']),
-        'score': float(row['overall_strength_score']),
-        'rating': float(row['rating']),
-        'total_reviews': int(row['total_reviews']),
-        'percentil': float(row['percentile_rank'])
-    }
-    
-    # Salva histórico
-    historico_file = Path('historico_semanal.json')
-    
-    if historico_file.exists():
-        with open(historico_file, 'r') as f:
-            historico = json.load(f)
-    else:
-        historico = []
-    
-    historico.append(dados_semana)
-    
-    with open(historico_file, 'w') as f:
-        json.dump(historico, f, indent=2)
-    
     # Compara com semana anterior
-    if len(historico) > 1:
-        anterior = historico[-2]
-        
+    variacao = historico.latest_change(MEU_PLACE_ID, KEYWORD, LOCATION)
+    if variacao:
         print("\n📊 COMPARAÇÃO COM SEMANA ANTERIOR:")
         print("="*60)
         
-        delta_pos = anterior['posicao'] - dados_semana['posicao']
-        delta_score = dados_semana['score'] - anterior['score']
-        delta_reviews = dados_semana['total_reviews'] - anterior['total_reviews']
+        delta_pos = variacao['rank_change']
         
-        print(f"\nPosição: #{dados_semana['posicao']}", end='')
+        print(f"\nPosição: #{variacao['rank_position']}", end='')
         if delta_pos > 0:
             print(f" ⬆️ (subiu {delta_pos} posições)")
         elif delta_pos < 0:
@@ -324,10 +305,17 @@ def monitoramento_semanal():
         else:
             print(" ➡️ (manteve)")
         
-        print(f"Score: {dados_semana['score']:.2f} ({delta_score:+.2f})")
-        print(f"Reviews: {dados_semana['total_reviews']} (+{delta_reviews})")
+        print(f"Score: {row['overall_strength_score']:.2f} ({variacao['score_change']:+.2f})")
+        print(f"Reviews: {int(row['total_reviews'])} ({variacao['reviews_change']:+d})")
+    
+    # Concorrentes que mais subiram desde a semana passada
+    movers = historico.top_movers(KEYWORD, LOCATION, limit=5, direction="up")
+    if not movers.empty:
+        print("\n🚀 MAIORES ALTAS:")
+        for _, mover in movers.iterrows():
+            print(f"   {mover['name']}: #{mover['previous_rank']} → #{mover['rank_position']}")
     
-    print(f"\n✅ Dados salvos em {historico_file}")
+    print(f"\n✅ Dados salvos em {historico.path}")
 
 # Agende esta função para rodar toda segunda-feira às 9h
 # monitoramento_semanal()
@@ -444,8 +432,7 @@ def enviar_alerta_email(assunto, mensagem):
 def monitorar_com_alertas():
     """Monitora e envia alertas se detectar mudanças"""
     
-    import json
-    from pathlib import Path
+    from gmb_history import HistoryStore
     
     API_KEY = "SUA_API_KEY"
     LOCATION = "-23.55052,-46.633308"
@@ -461,6 +448,10 @@ def monitorar_com_alertas():
         max_pages=2
     )
     
+    # Grava no histórico (todos os perfis desta execução)
+    historico = HistoryStore('historico.sqlite')
+    historico.record(df, keyword=KEYWORD, location=LOCATION, radius=2000)
+    
     meu_negocio = df[df['place_id'] == MEU_PLACE_ID]
     if meu_negocio.empty:
         return
@@ -468,21 +459,19 @@ def monitorar_com_alertas():
     row = meu_negocio.iloc[0]
     posicao_atual = int(row['rank_position'])
     
-    # Carrega posição anterior
-    cache_file = Path('posicao_anterior.json')
+    # Compara com a execução anterior
+    variacao = historico.latest_change(MEU_PLACE_ID, KEYWORD, LOCATION)
     
-    if cache_file.exists():
-        with open(cache_file, 'r') as f:
-            dados_anteriores = json.load(f)
-            posicao_anterior = dados_anteriores['posicao']
-            
-            # Detecta mudanças significativas
-            mudanca = posicao_anterior - posicao_atual
-            
-            if abs(mudanca) >= 3:  # Mudança de 3+ posições
-                if mudanca > 0:
-                    assunto = f"🎉 Seu ranking SUBIU {mudanca} posições!"
-                    mensagem = f"""
+    if variacao:
+        posicao_anterior = variacao['previous_rank']
+        
+        # Detecta mudanças significativas
+        mudanca = variacao['rank_change']
+        
+        if abs(mudanca) >= 3:  # Mudança de 3+ posições
+            if mudanca > 0:
+                assunto = f"🎉 Seu ranking SUBIU {mudanca} posições!"
+                mensagem = f"""
 Ótimas notícias!
 
 Seu negócio subiu {mudanca} posições no Google Maps!
@@ -493,10 +482,10 @@ Posição atual: #{posicao_atual}
 Score: {row['overall_strength_score']:.2f}
 
 Continue o ótimo trabalho!
-                    """
-                else:
-                    assunto = f"⚠️ ALERTA: Ranking caiu {abs(mudanca)} posições"
-                    mensagem = f"""
+                """
+            else:
+                assunto = f"⚠️ ALERTA: Ranking caiu {abs(mudanca)} posições"
+                mensagem = f"""
 Atenção necessária!
 
 Seu negócio caiu {abs(mudanca)} posições no Google Maps.
@@ -513,13 +502,9 @@ Recomendações:
 4. Verifique informações de contato
 
 Acesse o relatório completo para mais detalhes.
-                    """
-                
-                enviar_alerta_email(assunto, mensagem)
-    
-    # Salva posição atual
-    with open(cache_file, 'w') as f:
-        json.dump({'posicao': posicao_atual, 'data': str(datetime.now())}, f)
+                """
+            
+            enviar_alerta_email(assunto, mensagem)
 
 # monitorar_com_alertas()
 
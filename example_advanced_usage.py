@@ -3,7 +3,16 @@ Exemplo de uso avançado do Google Maps Ranking Analyzer
 Demonstra diferentes cenários e análises comparativas
 """
 
-from gmb_ranking_analyzer import GoogleMapsRankingAnalyzer, generate_reports
+from gmb_ranking_analyzer import (
+    GoogleMapsRankingAnalyzer,
+    configure_logging,
+    generate_reports,
+    logging_from_config,
+)
+from gmb_batch import AnalysisJob, run_batch
+from gmb_history import HistoryStore
+from gmb_planner import plan_jobs
+from gmb_reports import reports_from_config
 import pandas as pd
 import yaml
 from pathlib import Path
@@ -18,6 +27,15 @@ def load_config(config_file: str = "config.yaml") -> dict:
         return yaml.safe_load(f)
 
 
+def archive_results(config: dict, df: pd.DataFrame, keyword: str = None, location: str = None):
+    """Grava os resultados no arquivo Parquet/Arrow, se habilitado no config.yaml"""
+    if not config['reports'].get('archive', {}).get('enabled'):
+        return
+    
+    from gmb_archive import AnalysisArchive
+    AnalysisArchive.from_config(config).write(df, keyword=keyword, location=location)
+
+
 def analyze_single_keyword(config: dict):
     """Análise simples com uma palavra-chave"""
     
@@ -25,10 +43,9 @@ def analyze_single_keyword(config: dict):
     print("ANÁLISE ÚNICA - PALAVRA-CHAVE")
     print("="*80 + "\n")
     
-    api_key = config['api']['key']
     search_params = config['search']
     
-    analyzer = GoogleMapsRankingAnalyzer(api_key)
+    analyzer = GoogleMapsRankingAnalyzer.from_config(config)
     
     metrics_list, df = analyzer.run_analysis(
         location=search_params['location'],
@@ -38,7 +55,8 @@ def analyze_single_keyword(config: dict):
     )
     
     # Gera relatórios
-    files = generate_reports(df, search_params['keyword'])
+    files = generate_reports(df, search_params['keyword'], **reports_from_config(config))
+    archive_results(config, df, search_params['keyword'], search_params['location'])
     
     # Exibe insights
     print_insights(df, search_params['keyword'])
@@ -57,28 +75,40 @@ def analyze_multiple_keywords(config: dict):
         print("❌ Análise múltipla desabilitada no config.yaml")
         return None
     
-    api_key = config['api']['key']
     search_params = config['search']
     keywords = config['search']['multiple_keywords']['keywords']
     
-    analyzer = GoogleMapsRankingAnalyzer(api_key)
+    analyzer = GoogleMapsRankingAnalyzer.from_config(config)
     
-    all_results = {}
-    
-    for keyword in keywords:
-        print(f"\n📊 Analisando: '{keyword}'...")
-        
-        metrics_list, df = analyzer.run_analysis(
+    # Todas as palavras-chave em paralelo; detalhes repetidos são obtidos uma vez
+    jobs = [
+        AnalysisJob(
             location=search_params['location'],
             radius=search_params['radius'],
             keyword=keyword,
             max_pages=search_params['max_pages']
         )
-        
-        all_results[keyword] = df
+        for keyword in keywords
+    ]
+    # Estimativa de chamadas e custo antes de executar
+    plan = plan_jobs(analyzer, jobs, history=HistoryStore.from_config(config))
+    print(f"\n💰 Estimativa: {plan.summary()}")
+    if analyzer.budget is not None and not plan.fits(analyzer.budget):
+        print("⚠️  A estimativa passa do orçamento: o lote será degradado ou parcial")
+    
+    print(f"\n📊 Analisando: {', '.join(keywords)}...")
+    batch = run_batch(analyzer, jobs)
+    
+    all_results = {}
+    
+    for job in jobs:
+        df = batch.frames[job]
+        all_results[job.keyword] = df
         
         # Gera relatórios individuais
-        generate_reports(df, keyword)
+        generate_reports(df, job.keyword, **reports_from_config(config))
+    
+    archive_results(config, batch.combined)
     
     # Cria relatório comparativo
     create_comparative_report(all_results, search_params['location'])
@@ -93,10 +123,9 @@ def analyze_competitor(config: dict, target_place_id: str, competitor_place_ids:
     print("ANÁLISE COMPETITIVA - SEU NEGÓCIO VS CONCORRENTES")
     print("="*80 + "\n")
     
-    api_key = config['api']['key']
     search_params = config['search']
     
-    analyzer = GoogleMapsRankingAnalyzer(api_key)
+    analyzer = GoogleMapsRankingAnalyzer.from_config(config)
     
     # Executa busca completa
     metrics_list, df = analyzer.run_analysis(
@@ -285,6 +314,7 @@ def main():
     
     # Carrega configurações
     config = load_config()
+    configure_logging(**logging_from_config(config))
     
     print("""
 ╔════════════════════════════════════════════════════════════════════════════╗
@@ -0,0 +1,252 @@
+"""
+Arquivo colunar das análises (Parquet / Arrow IPC)
+Guarda o DataFrame de cada run_analysis particionado por palavra-chave,
+localização e data (layout hive: keyword=.../location=.../date=...), e lê
+de volta só as partições, row groups e colunas necessários para a consulta
+"""
+
+import logging
+import uuid
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+from urllib.parse import quote, unquote
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # Dependência opcional
+    pa = ds = pq = None
+
+logger = logging.getLogger(__name__)
+
+PARTITION_COLUMNS = ("keyword", "location", "date")
+
+FORMATS = {"parquet": "parquet", "arrow": "ipc"}
+EXTENSIONS = {"parquet": "parquet", "arrow": "arrow"}
+
+DateLike = Union[str, date, datetime]
+
+
+def _partition_schema():
+    return pa.schema([(name, pa.string()) for name in PARTITION_COLUMNS])
+
+
+def _as_date_string(value: DateLike) -> str:
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)[:10]
+
+
+class AnalysisArchive:
+    """
+    Arquivo particionado de resultados de análise
+    
+    Cada chamada de `write` cria um arquivo por partição
+    (keyword/location/date), com as linhas ordenadas por place_id para que
+    as estatísticas dos row groups permitam descartar blocos inteiros ao
+    filtrar por lugar.
+    
+    Exemplo:
+        archive = AnalysisArchive("output/archive")
+        archive.write(df, keyword="padaria", location="-23.55052,-46.633308")
+        
+        # Todas as execuções de um lugar nos últimos 90 dias
+        historico = archive.read(
+            place_id="ChIJ...", days=90,
+            columns=["rank_position", "overall_strength_score"]
+        )
+    """
+    
+    def __init__(
+        self,
+        root: Union[str, Path] = "output/archive",
+        format: str = "parquet",
+        row_group_size: int = 50_000,
+        compression: str = "zstd"
+    ):
+        if pa is None:
+            raise ImportError("AnalysisArchive requer pyarrow: pip install pyarrow")
+        if format not in FORMATS:
+            raise ValueError(f"Formato de arquivo não suportado: {format} (use parquet ou arrow)")
+        
+        self.root = Path(root)
+        self.format = format
+        self.row_group_size = row_group_size
+        self.compression = compression
+    
+    @classmethod
+    def from_config(cls, config: Dict) -> "AnalysisArchive":
+        """Cria o arquivo a partir da seção reports.archive do config.yaml"""
+        settings = config.get("reports", {}).get("archive", {})
+        return cls(
+            root=settings.get("directory", "output/archive"),
+            format=settings.get("format", "parquet"),
+            row_group_size=settings.get("row_group_size", 50_000),
+            compression=settings.get("compression", "zstd")
+        )
+    
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+    
+    def write(
+        self,
+        df: pd.DataFrame,
+        keyword: Optional[str] = None,
+        location: Optional[str] = None,
+        run_date: Optional[DateLike] = None
+    ) -> List[Path]:
+        """
+        Arquiva o DataFrame de uma análise
+        
+        Args:
+            df: DataFrame de run_analysis; o DataFrame combinado de run_batch
+                (com colunas keyword e location) também é aceito
+            keyword, location: obrigatórios se o DataFrame não tiver essas colunas
+            run_date: data da partição (padrão: analysis_date da primeira linha)
+        
+        Returns:
+            Arquivos criados (um por partição)
+        """
+        data = df
+        for name, value in (("keyword", keyword), ("location", location)):
+            if value is not None:
+                data = data.assign(**{name: value})
+            elif name not in data.columns:
+                raise ValueError(f"Informe {name} ou inclua a coluna '{name}' no DataFrame")
+        
+        if run_date is None and "analysis_date" in data.columns and len(data):
+            run_date = data["analysis_date"].iloc[0]
+        partition_date = _as_date_string(run_date or datetime.now())
+        
+        files = []
+        groups = data.groupby(["keyword", "location"], observed=True, sort=False)
+        for (group_keyword, group_location), group in groups:
+            files.append(self._write_partition(group, str(group_keyword), str(group_location), partition_date))
+        
+        logger.info(f"{len(data)} perfis arquivados em {len(files)} partição(ões) de {self.root}")
+        return files
+    
+    def _write_partition(self, frame: pd.DataFrame, keyword: str, location: str, partition_date: str) -> Path:
+        directory = self.root.joinpath(*(
+            f"{name}={quote(value, safe='')}"
+            for name, value in zip(PARTITION_COLUMNS, (keyword, location, partition_date))
+        ))
+        directory.mkdir(parents=True, exist_ok=True)
+        
+        stamp = datetime.now().strftime("%H%M%S")
+        path = directory / f"part-{stamp}-{uuid.uuid4().hex[:8]}.{EXTENSIONS[self.format]}"
+        
+        frame = frame.drop(columns=["keyword", "location"])
+        if "place_id" in frame.columns:
+            frame = frame.sort_values("place_id", kind="stable")
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        
+        if self.format == "parquet":
+            pq.write_table(
+                table, path,
+                row_group_size=self.row_group_size,
+                compression=self.compression,
+                write_statistics=True
+            )
+        else:
+            options = pa.ipc.IpcWriteOptions(compression=self.compression)
+            with pa.ipc.new_file(path, table.schema, options=options) as writer:
+                writer.write_table(table, max_chunksize=self.row_group_size)
+        return path
+    
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+    
+    def dataset(self):
+        """pyarrow.dataset.Dataset com todas as partições"""
+        return ds.dataset(
+            self.root,
+            format=FORMATS[self.format],
+            partitioning=ds.partitioning(_partition_schema(), flavor="hive"),
+            exclude_invalid_files=True
+        )
+    
+    def read(
+        self,
+        columns: Optional[Iterable[str]] = None,
+        keyword: Union[None, str, Iterable[str]] = None,
+        location: Union[None, str, Iterable[str]] = None,
+        place_id: Union[None, str, Iterable[str]] = None,
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None,
+        days: Optional[int] = None,
+        filter=None
+    ) -> pd.DataFrame:
+        """
+        Lê o arquivo com filtros e seleção de colunas aplicados na leitura
+        
+        Filtros de keyword, location e data descartam diretórios inteiros;
+        o de place_id usa as estatísticas dos row groups (Parquet). Só as
+        colunas pedidas são lidas do disco.
+        
+        Args:
+            columns: colunas desejadas (None = todas, incluindo as de partição)
+            keyword, location, place_id: valor ou lista de valores
+            start, end: intervalo de datas inclusivo (date, datetime ou 'AAAA-MM-DD')
+            days: atalho para start = hoje - days
+            filter: expressão pyarrow.dataset adicional
+        """
+        if not self.root.exists():
+            return pd.DataFrame(columns=list(columns) if columns else None)
+        
+        if days is not None:
+            start = date.today() - timedelta(days=days)
+        
+        expression = filter
+        for name, value in (("keyword", keyword), ("location", location), ("place_id", place_id)):
+            if value is not None:
+                expression = _and(expression, _isin(name, value))
+        if start is not None:
+            expression = _and(expression, ds.field("date") >= _as_date_string(start))
+        if end is not None:
+            expression = _and(expression, ds.field("date") <= _as_date_string(end))
+        
+        table = self.dataset().to_table(
+            columns=list(columns) if columns is not None else None,
+            filter=expression
+        )
+        df = table.to_pandas()
+        for name in PARTITION_COLUMNS:
+            if name in df.columns:
+                df[name] = df[name].astype("category")
+        return df
+    
+    def partitions(self) -> pd.DataFrame:
+        """Uma linha por partição (keyword, location, date) com o número de arquivos"""
+        rows = []
+        for path in self.root.glob(f"keyword=*/location=*/date=*/*.{EXTENSIONS[self.format]}"):
+            rows.append({
+                name: unquote(part.split("=", 1)[1])
+                for name, part in zip(PARTITION_COLUMNS, path.relative_to(self.root).parts)
+            })
+        
+        if not rows:
+            return pd.DataFrame(columns=[*PARTITION_COLUMNS, "files"])
+        frame = pd.DataFrame(rows)
+        return (
+            frame.groupby(list(PARTITION_COLUMNS)).size().rename("files")
+            .reset_index().sort_values(["date", "keyword", "location"], ignore_index=True)
+        )
+
+
+def _isin(name: str, value: Union[str, Iterable[str]]):
+    if isinstance(value, str):
+        return ds.field(name) == value
+    return ds.field(name).isin(list(value))
+
+
+def _and(left, right):
+    return right if left is None else left & right
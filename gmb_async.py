@@ -0,0 +1,548 @@
+"""
+Google Maps Business Profile Analyzer - versão assíncrona
+Permite multiplexar centenas de mercados (localização, palavra-chave)
+em um único processo usando asyncio e aiohttp
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import (
+    TYPE_CHECKING, AsyncIterator, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple, Union
+)
+
+from gmb_cache import PlaceDetailsCache
+from gmb_fields import compact_details
+from gmb_keys import ApiKeyPool, KeyBenched, QuotaExhausted, as_key_pool
+from gmb_logging import ProgressLog, current_context, log_context, new_run_id
+from gmb_metrics import (
+    API_BYTES,
+    API_LATENCY,
+    API_REQUESTS,
+    API_RETRIES,
+    MetricsRegistry,
+    get_registry,
+)
+from gmb_planner import BUDGET_EXCEEDED, CallBudget
+from gmb_ratelimit import (
+    TRANSIENT_API_STATUSES,
+    TRANSIENT_HTTP_CODES,
+    RetryPolicy,
+    TokenBucket,
+    get_shared_limiter,
+)
+from gmb_ranking_analyzer import (
+    AnalysisSummary,
+    DetailsCacheMixin,
+    GoogleMapsRankingAnalyzer,
+    NEARBY_SEARCH_PATH,
+    PLACE_DETAILS_PATH,
+    PLACES_API_BASE_URL,
+    ProfileMetrics,
+    ProfileScorer,
+    api_endpoint,
+    build_summary,
+    parse_location,
+    place_distances,
+)
+from gmb_tracing import Span, Tracer, get_tracer
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+try:
+    import aiohttp
+except ImportError:  # Dependência opcional
+    aiohttp = None
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncGoogleMapsRankingAnalyzer(DetailsCacheMixin, ProfileScorer):
+    """
+    Analisador assíncrono de ranqueamento do Google Maps
+    
+    Usa um único aiohttp.ClientSession (com reaproveitamento de conexões)
+    para todas as chamadas. Scores, ProfileMetrics e DataFrame são os
+    mesmos do GoogleMapsRankingAnalyzer.
+    
+    Exemplo:
+        async with AsyncGoogleMapsRankingAnalyzer(API_KEY) as analyzer:
+            resultados = await asyncio.gather(*(
+                analyzer.run_analysis(loc, 2000, kw) for loc, kw in jobs
+            ))
+    """
+    
+    PAGE_TOKEN_POLL_INTERVAL = GoogleMapsRankingAnalyzer.PAGE_TOKEN_POLL_INTERVAL
+    
+    # Contabilidade do pool de chaves igual à do analisador síncrono
+    _record_key = GoogleMapsRankingAnalyzer._record_key
+    _retry_delay = GoogleMapsRankingAnalyzer._retry_delay
+    
+    def __init__(
+        self,
+        api_key: Union[str, Iterable[str], ApiKeyPool],
+        max_concurrency: int = 20,
+        timeout: float = 15,
+        page_token_delay: float = 1.0,
+        page_token_timeout: float = 10.0,
+        persistent_cache: Optional[PlaceDetailsCache] = None,
+        qps: Optional[float] = None,
+        burst: int = 1,
+        max_retries: int = 3,
+        retry_delay: float = 2.0,
+        rate_limiter: Optional[TokenBucket] = None,
+        detail_fields: Optional[Iterable[str]] = None,
+        report_columns: Optional[Iterable[str]] = None,
+        base_url: Optional[str] = None,
+        incremental_max_age_hours: Optional[float] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        tracer: Optional[Tracer] = None,
+        budget: Optional[CallBudget] = None
+    ):
+        if aiohttp is None:
+            raise ImportError(
+                "AsyncGoogleMapsRankingAnalyzer requer aiohttp: pip install aiohttp"
+            )
+        
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout
+        self.page_token_delay = page_token_delay
+        self.page_token_timeout = page_token_timeout
+        self.persistent_cache = persistent_cache
+        self.detail_fields = frozenset(detail_fields) if detail_fields else None
+        self.report_columns = tuple(report_columns) if report_columns else None
+        self.base_url = (base_url or PLACES_API_BASE_URL).rstrip("/")
+        self.incremental_max_age = (
+            incremental_max_age_hours * 3600 if incremental_max_age_hours is not None else None
+        )
+        self.detail_stats: Dict[str, int] = {}
+        self._stats_lock = threading.Lock()
+        self.metrics = metrics if metrics is not None else get_registry()
+        self.tracer = tracer if tracer is not None else get_tracer()
+        self.budget = budget
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.retry_policy = RetryPolicy(max_retries=max_retries, base_delay=retry_delay)
+        # Várias chaves: `qps` vale por chave (ver GoogleMapsRankingAnalyzer)
+        self.key_pool = as_key_pool(api_key, qps, burst)
+        self.api_key = api_key if self.key_pool is None else None
+        if rate_limiter is None and qps and self.key_pool is None:
+            rate_limiter = get_shared_limiter("places_api", qps, burst)
+        self.rate_limiter = rate_limiter
+        self.cache = {}
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+    
+    async def __aenter__(self) -> "AsyncGoogleMapsRankingAnalyzer":
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+    
+    async def close(self) -> None:
+        """Fecha a sessão HTTP"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    def _get_session(self) -> "aiohttp.ClientSession":
+        """Cria a sessão HTTP sob demanda (precisa de um event loop ativo)"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_concurrency,
+                ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+    
+    def stats(self) -> Dict[str, Dict]:
+        """Snapshot das métricas (ver GoogleMapsRankingAnalyzer.stats)"""
+        return self.metrics.snapshot()
+    
+    async def _get_json(self, url: str, params: Dict) -> Dict:
+        """
+        GET não bloqueante limitado por max_concurrency, com rate limiting
+        e retry (mesma política do analisador síncrono)
+        """
+        session = self._get_session()
+        max_retries = self.retry_policy.max_retries
+        endpoint = api_endpoint(url)
+        
+        for attempt in range(max_retries + 1):
+            if self.budget is not None and not self.budget.allow(endpoint):
+                return {"status": BUDGET_EXCEEDED, "results": []}
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async()
+            key = None
+            if self.key_pool is not None:
+                try:
+                    key = await self.key_pool.acquire_async(params.get("pagetoken"))
+                except (QuotaExhausted, KeyBenched) as e:
+                    return {"status": "OVER_QUERY_LIMIT", "results": [], "error_message": str(e)}
+                params = {**params, "key": key.key}
+            
+            start = None
+            status = "error"
+            data = None
+            try:
+                async with self._semaphore:
+                    start = time.perf_counter()
+                    async with session.get(url, params=params) as resp:
+                        status = str(resp.status)
+                        resp.raise_for_status()
+                        body = await resp.read()
+                self.metrics.inc(API_BYTES, len(body), endpoint=endpoint)
+                data = json.loads(body)
+                status = data.get("status", status)
+                if data.get("status") not in TRANSIENT_API_STATUSES or attempt == max_retries:
+                    return data
+                reason = data.get("status")
+            except aiohttp.ClientResponseError as e:
+                if e.status not in TRANSIENT_HTTP_CODES or attempt == max_retries:
+                    raise
+                reason = e
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt == max_retries:
+                    raise
+                reason = e
+            finally:
+                # Latência medida sem a espera pelo semáforo
+                if start is not None:
+                    self.metrics.observe(API_LATENCY, time.perf_counter() - start, endpoint=endpoint)
+                    self.metrics.inc(API_REQUESTS, endpoint=endpoint, status=status)
+                if key is not None:
+                    self._record_key(key, status, data)
+            
+            delay = self._retry_delay(attempt, key, reason)
+            logger.warning(
+                f"Tentativa {attempt + 1}/{max_retries + 1} falhou ({reason}); "
+                f"nova tentativa em {delay:.1f}s"
+            )
+            self.metrics.inc(API_RETRIES, endpoint=endpoint)
+            await asyncio.sleep(delay)
+    
+    async def search_places(
+        self,
+        location: str,
+        radius: int,
+        keyword: str,
+        pagetoken: Optional[str] = None
+    ) -> Dict:
+        """Busca lugares no Google Maps"""
+        params = {
+            "key": self.api_key,
+            "location": location,
+            "radius": radius,
+            "keyword": keyword
+        }
+        if pagetoken:
+            params["pagetoken"] = pagetoken
+        
+        with self.tracer.span("search_places", keyword=keyword, next_page=bool(pagetoken)) as span:
+            try:
+                data = await self._get_json(self.base_url + NEARBY_SEARCH_PATH, params)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                logger.error(f"Erro na busca: {e}")
+                data = {"results": [], "status": "ERROR"}
+            span.set(status=data.get("status"), results=len(data.get("results", [])))
+            return data
+    
+    async def get_place_details(
+        self,
+        place_id: str,
+        fields: Optional[Iterable[str]] = None,
+        signature: Optional[str] = None
+    ) -> Dict:
+        """
+        Obtém detalhes de um lugar (mesma projeção de campos, modo
+        incremental e single-flight da versão síncrona)
+        """
+        needed = frozenset(fields) if fields is not None else self.planned_detail_fields()
+        
+        with self.traced("get_place_details", phase="details", place_id=place_id) as span:
+            return await self._get_place_details(place_id, needed, signature, span)
+    
+    async def _get_place_details(
+        self,
+        place_id: str,
+        needed: FrozenSet[str],
+        signature: Optional[str],
+        span: Span
+    ) -> Dict:
+        span.set(cache_hit=True)
+        first = True
+        while True:
+            cached, missing = self._cached_details(place_id, needed, signature, count=first)
+            first = False
+            if not missing:
+                return cached
+            span.set(cache_hit=False)
+            
+            flight = self._inflight.get(place_id)
+            if flight is not None:
+                self._count("coalesced")
+                span.set(coalesced=True)
+                try:
+                    result = await asyncio.shield(flight)
+                except asyncio.CancelledError:
+                    if flight.cancelled():
+                        continue  # A tarefa que buscava foi cancelada: tenta de novo
+                    raise
+                if self._covers(result, needed):
+                    return result
+                continue
+            
+            flight = self._inflight[place_id] = asyncio.get_running_loop().create_future()
+            try:
+                result = await self._fetch_details(place_id, missing, cached, signature)
+            except asyncio.CancelledError:
+                flight.cancel()
+                raise
+            except BaseException as e:
+                flight.set_exception(e)
+                flight.exception()  # Sem outras chamadas esperando, evita o aviso do asyncio
+                raise
+            else:
+                flight.set_result(result)
+                return result
+            finally:
+                del self._inflight[place_id]
+    
+    async def _fetch_details(
+        self,
+        place_id: str,
+        missing: FrozenSet[str],
+        cached: Optional[Dict],
+        signature: Optional[str]
+    ) -> Dict:
+        params = {
+            "key": self.api_key,
+            "place_id": place_id,
+            "fields": ",".join(sorted(missing))
+        }
+        
+        try:
+            data = compact_details(await self._get_json(self.base_url + PLACE_DETAILS_PATH, params), missing)
+            return self._store_details(place_id, data, cached, signature)
+        # ValueError: corpo que não é JSON (o síncrono recebe requests.JSONDecodeError)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            logger.error(f"Erro ao obter detalhes de {place_id}: {e}", extra={"place_id": place_id})
+            return {"result": {}, "status": "ERROR"}
+    
+    async def analyze_profile(
+        self,
+        place_data: Dict,
+        rank_position: int,
+        center_lat: float,
+        center_lng: float,
+        radius: int,
+        keyword: str,
+        total_results: int,
+        details: Optional[Dict] = None,
+        analysis_date: Optional[str] = None,
+        distance: Optional[float] = None
+    ) -> ProfileMetrics:
+        """Análise completa de um perfil (mesma assinatura da versão síncrona)"""
+        place_id = place_data.get("place_id")
+        
+        with self.tracer.span(
+            "analyze_profile", place_id=place_id, keyword=keyword, rank_position=rank_position
+        ):
+            if details is None:
+                details = await self.get_place_details(
+                    place_id, signature=self.detail_signature(place_data)
+                )
+            
+            return self.score_profile(
+                place_data, details, rank_position, center_lat, center_lng,
+                radius, keyword, total_results, analysis_date, distance
+            )
+    
+    async def wait_next_page(
+        self,
+        location: str,
+        radius: int,
+        keyword: str,
+        pagetoken: str
+    ) -> Dict:
+        """Busca a próxima página assim que o next_page_token fica válido"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.page_token_timeout
+        interval = self.PAGE_TOKEN_POLL_INTERVAL
+        
+        with self.tracer.span("wait_next_page", keyword=keyword) as span:
+            await asyncio.sleep(self.page_token_delay)
+            
+            for attempt in itertools.count(1):
+                data = await self.search_places(location, radius, keyword, pagetoken)
+                if data.get("status") != "INVALID_REQUEST":
+                    break
+                
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    logger.warning("next_page_token não ficou válido a tempo")
+                    break
+                
+                await asyncio.sleep(min(interval, remaining))
+                interval = min(interval * 1.25, 1.0)
+            
+            span.set(attempts=attempt)
+            return data
+    
+    async def iter_analysis(
+        self,
+        location: str,
+        radius: int,
+        keyword: str,
+        max_pages: int = 3
+    ) -> AsyncIterator[Union[ProfileMetrics, AnalysisSummary]]:
+        """
+        Iterador assíncrono equivalente a GoogleMapsRankingAnalyzer.iter_analysis
+        
+        Os detalhes de cada página são buscados assim que ela chega, durante
+        a espera do próximo next_page_token. Cada ProfileMetrics é emitido
+        ao ser pontuado e o último item é um AnalysisSummary.
+        """
+        
+        # As tasks de detalhes herdam o contexto: seus logs levam run_id/keyword
+        with log_context(run_id=current_context().get("run_id") or new_run_id(), keyword=keyword), \
+                self.budget_run():
+            async for item in self._iter_analysis(location, radius, keyword, max_pages):
+                yield item
+    
+    async def _iter_analysis(
+        self,
+        location: str,
+        radius: int,
+        keyword: str,
+        max_pages: int
+    ) -> AsyncIterator[Union[ProfileMetrics, AnalysisSummary]]:
+        logger.info(f"Iniciando análise assíncrona para '{keyword}' em {location}")
+        
+        center_lat, center_lng = parse_location(location)
+        analysis_date = datetime.now().isoformat()
+        
+        async def fetch(idx: int, place: Dict) -> Tuple[int, Dict, Dict]:
+            details = await self.get_place_details(
+                place.get("place_id"), signature=self.detail_signature(place)
+            )
+            return idx, place, details
+        
+        # Coleta dados
+        detail_tasks = []
+        all_places = []
+        pagetoken = None
+        pages = 0
+        # Detalhes não gastam as chamadas das próximas páginas (modo degrade)
+        held = self.hold_next_pages(max_pages)
+        
+        try:
+            while pages < max_pages:
+                with self.traced("search_page", phase="search", keyword=keyword, page=pages + 1):
+                    if pagetoken:
+                        data = await self.wait_next_page(location, radius, keyword, pagetoken)
+                        if held:
+                            self.budget.release_pages(1)
+                            held -= 1
+                    else:
+                        data = await self.search_places(location, radius, keyword)
+                
+                if data.get("status") in ("ERROR", "INVALID_REQUEST"):
+                    break
+                
+                places = data.get("results", [])
+                all_places.extend(places)
+                detail_tasks.extend(
+                    asyncio.ensure_future(fetch(idx, place))
+                    for idx, place in enumerate(places, len(detail_tasks) + 1)
+                )
+                
+                logger.info(f"[{keyword}] Página {pages + 1}: {len(places)} resultados")
+                
+                pages += 1
+                pagetoken = data.get("next_page_token")
+                
+                if not pagetoken:
+                    break
+            
+            if held:
+                self.budget.release_pages(held)
+                held = 0
+            
+            # Pontua com o total de resultados conhecido
+            total = len(detail_tasks)
+            distances = place_distances(all_places, center_lat, center_lng)
+            scores_by_position = {}
+            progress = ProgressLog(logger, total)
+            
+            for next_done in asyncio.as_completed(detail_tasks):
+                idx, place, details = await next_done
+                progress.step(place.get("name"), place.get("place_id"))
+                if self.budget_skips(details):
+                    continue
+                metrics = self.score_profile(
+                    place, details, idx, center_lat, center_lng, radius, keyword, total,
+                    analysis_date, distances[idx - 1]
+                )
+                scores_by_position[idx] = metrics.overall_strength_score
+                yield metrics
+        finally:
+            if held:
+                self.budget.release_pages(held)
+            for task in detail_tasks:
+                task.cancel()
+        
+        progress.done()
+        logger.info(f"[{keyword}] Análise concluída: {total} perfis")
+        
+        with self.traced(
+            "percentiles", phase="percentiles", keyword=keyword, profiles=len(scores_by_position)
+        ):
+            summary = build_summary(scores_by_position)
+        yield summary
+    
+    async def run_analysis(
+        self,
+        location: str,
+        radius: int,
+        keyword: str,
+        max_pages: int = 3
+    ) -> Tuple[Sequence[ProfileMetrics], "pd.DataFrame"]:
+        """Executa análise completa (mesmo resultado da versão síncrona)"""
+        from gmb_results import ProfileTableBuilder
+        
+        builder = ProfileTableBuilder()
+        
+        async for item in self.iter_analysis(location, radius, keyword, max_pages):
+            builder.add(item)
+        
+        table = builder.build()
+        
+        return table.metrics, table.to_dataframe()
+    
+    async def run_analysis_records(
+        self,
+        location: str,
+        radius: int,
+        keyword: str,
+        max_pages: int = 3
+    ) -> List[ProfileMetrics]:
+        """Análise completa sem DataFrame (ver GoogleMapsRankingAnalyzer.run_analysis_records)"""
+        profiles = []
+        async for item in self.iter_analysis(location, radius, keyword, max_pages):
+            if isinstance(item, AnalysisSummary):
+                for profile in profiles:
+                    item.apply(profile)
+            else:
+                profiles.append(item)
+        
+        profiles.sort(key=lambda profile: profile.rank_position)
+        return profiles
@@ -0,0 +1,205 @@
+"""
+Execução em lote de várias análises (localização, raio, palavra-chave)
+As buscas rodam em paralelo e os detalhes de cada place_id são obtidos
+uma única vez para o lote inteiro
+"""
+
+import contextvars
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from gmb_logging import current_context, log_context, new_run_id
+from gmb_ranking_analyzer import (
+    GoogleMapsRankingAnalyzer,
+    ProfileMetrics,
+    compute_comparative_metrics,
+    metrics_to_dataframe,
+    parse_location,
+    place_distances,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class AnalysisJob:
+    """Parâmetros de uma chamada de run_analysis"""
+    location: str
+    radius: int
+    keyword: str
+    max_pages: int = 3
+    
+    @property
+    def label(self) -> str:
+        return f"{self.keyword} @ {self.location}"
+
+
+@dataclass
+class BatchResult:
+    """Resultado de run_batch"""
+    jobs: List[AnalysisJob]
+    metrics: Dict[AnalysisJob, List[ProfileMetrics]]
+    frames: Dict[AnalysisJob, pd.DataFrame]
+    combined: pd.DataFrame
+    stats: Dict[str, int] = field(default_factory=dict)
+
+
+class SharedDetailFetcher:
+    """
+    Busca detalhes no executor compartilhando um único Future por place_id
+    
+    Várias buscas (jobs, pontos de grade...) pedindo o mesmo lugar
+    recebem o mesmo Future, então cada place_id gera no máximo uma
+    chamada de detalhes.
+    """
+    
+    def __init__(self, analyzer: GoogleMapsRankingAnalyzer, executor: ThreadPoolExecutor):
+        self.analyzer = analyzer
+        self.executor = executor
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.requested = 0
+    
+    def submit(self, place: Dict) -> Future:
+        """Future dos detalhes do resultado da busca `place`"""
+        place_id = place.get("place_id")
+        with self._lock:
+            self.requested += 1
+            future = self._futures.get(place_id)
+            if future is None:
+                # Logs da thread com o contexto de quem pediu primeiro
+                future = self.executor.submit(
+                    contextvars.copy_context().run,
+                    self.analyzer.get_place_details, place_id,
+                    signature=self.analyzer.detail_signature(place)
+                )
+                self._futures[place_id] = future
+            return future
+    
+    @property
+    def unique(self) -> int:
+        return len(self._futures)
+
+
+def run_batch(
+    analyzer: GoogleMapsRankingAnalyzer,
+    jobs: Iterable[AnalysisJob],
+    max_workers: Optional[int] = None,
+    max_concurrent_searches: int = 8
+) -> BatchResult:
+    """
+    Executa vários jobs concorrentemente
+    
+    Cada job pagina em sua própria thread; os detalhes de cada página
+    entram na fila compartilhada assim que ela chega, sem repetir
+    place_ids já pedidos por outro job. Ao final cada job é pontuado
+    exatamente como em run_analysis.
+    
+    Args:
+        analyzer: analisador (cache, rate limiter e sessão são compartilhados)
+        jobs: lista de AnalysisJob (ou tuplas location, radius, keyword, max_pages)
+        max_workers: threads para detalhes (padrão: analyzer.max_workers, mínimo 4)
+        max_concurrent_searches: jobs paginando ao mesmo tempo
+    
+    Returns:
+        BatchResult com um DataFrame por job e um combinado com as colunas
+        keyword, location e radius
+    """
+    jobs = [job if isinstance(job, AnalysisJob) else AnalysisJob(*job) for job in jobs]
+    jobs = list(dict.fromkeys(jobs))  # jobs repetidos rodam uma vez
+    workers = max(1, max_workers or max(analyzer.max_workers, 4))
+    run_id = current_context().get("run_id") or new_run_id()
+    
+    logger.info(
+        f"Lote com {len(jobs)} jobs | {workers} workers de detalhes", extra={"run_id": run_id}
+    )
+    
+    places_by_job: Dict[AnalysisJob, List[Dict]] = {}
+    futures_by_job: Dict[AnalysisJob, List[Future]] = {}
+    
+    # Um escopo de orçamento para o lote inteiro (max_run_calls)
+    with analyzer.budget_run(), ThreadPoolExecutor(max_workers=workers) as detail_pool:
+        fetcher = SharedDetailFetcher(analyzer, detail_pool)
+        
+        def collect(job: AnalysisJob) -> None:
+            futures = futures_by_job.setdefault(job, [])
+            
+            def on_page(places: List[Dict], first_position: int) -> None:
+                futures.extend(fetcher.submit(place) for place in places)
+            
+            with log_context(run_id=run_id, keyword=job.keyword):
+                places_by_job[job] = analyzer.collect_places(
+                    job.location, job.radius, job.keyword, job.max_pages, on_page=on_page
+                )
+        
+        search_workers = max(1, min(len(jobs), max_concurrent_searches))
+        analyzer.ensure_connection_pool(workers + search_workers)
+        with ThreadPoolExecutor(max_workers=search_workers) as search_pool:
+            for future in [search_pool.submit(collect, job) for job in jobs]:
+                future.result()
+        
+        # Pontua cada job com os detalhes compartilhados
+        metrics_by_job: Dict[AnalysisJob, List[ProfileMetrics]] = {}
+        analysis_date = datetime.now().isoformat()
+        for job in jobs:
+            center_lat, center_lng = parse_location(job.location)
+            places = places_by_job[job]
+            total = len(places)
+            distances = place_distances(places, center_lat, center_lng)
+            
+            # Sem orçamento no modo stop, perfis sem detalhes ficam de fora
+            metrics_list = [
+                analyzer.analyze_profile(
+                    place, idx, center_lat, center_lng, job.radius, job.keyword, total,
+                    details=future.result(), analysis_date=analysis_date,
+                    distance=distances[idx - 1]
+                )
+                for idx, (place, future) in enumerate(zip(places, futures_by_job[job]), 1)
+                if not analyzer.budget_skips(future.result())
+            ]
+            with analyzer.traced(
+                "percentiles", phase="percentiles", keyword=job.keyword, profiles=len(metrics_list)
+            ):
+                compute_comparative_metrics(metrics_list)
+            metrics_by_job[job] = metrics_list
+            
+            logger.info(
+                f"[{job.label}] {total} perfis pontuados",
+                extra={"run_id": run_id, "keyword": job.keyword}
+            )
+    
+    frames = {job: metrics_to_dataframe(metrics_by_job[job]) for job in jobs}
+    
+    # Combinado montado de uma vez (categorias compartilhadas entre os jobs)
+    combined = metrics_to_dataframe(
+        [metrics for job in jobs for metrics in metrics_by_job[job]]
+    )
+    job_rows = [job for job in jobs for _ in metrics_by_job[job]]
+    combined.insert(0, "keyword", pd.Categorical([job.keyword for job in job_rows]))
+    combined.insert(1, "location", pd.Categorical([job.location for job in job_rows]))
+    combined.insert(2, "radius", [job.radius for job in job_rows])
+    
+    stats = {
+        "jobs": len(jobs),
+        "detail_requests": fetcher.requested,
+        "unique_places": fetcher.unique
+    }
+    logger.info(
+        f"Lote concluído: {stats['detail_requests']} perfis, "
+        f"{stats['unique_places']} place_ids únicos",
+        extra={"run_id": run_id}
+    )
+    
+    return BatchResult(
+        jobs=jobs,
+        metrics=metrics_by_job,
+        frames=frames,
+        combined=combined,
+        stats=stats
+    )
@@ -0,0 +1,499 @@
+"""
+Micro-benchmarks dos caminhos críticos de scoring e relatórios
+Mede ops/s (perfis por segundo) e pico de memória com payloads sintéticos
+de 60, 10 mil e 1 milhão de perfis, compara com um baseline salvo e
+falha quando algum caminho regride além do limite
+
+Uso:
+    python gmb_benchmarks.py --save-baseline          # grava o baseline
+    python gmb_benchmarks.py                          # compara (exit 1 se regredir,
+                                                      # 2 sem baseline)
+    python gmb_benchmarks.py --sizes 60,10000 --cases analyze_profile,dataframe
+    python gmb_benchmarks.py --import-budget 150      # tempo de `import gmb_ranking_analyzer`
+"""
+
+import argparse
+import gc
+import json
+import logging
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from gmb_ranking_analyzer import (
+    ProfileMetrics,
+    ProfileScorer,
+    build_summary,
+    compute_comparative_metrics,
+    generate_reports,
+    metrics_to_dataframe,
+    place_distances,
+)
+
+DEFAULT_SIZES = (60, 10_000, 1_000_000)
+DEFAULT_BASELINE = "gmb_benchmarks_baseline.json"
+DEFAULT_THRESHOLD = 0.25
+
+# Payloads distintos; tamanhos maiores reutilizam o mesmo conjunto
+PAYLOAD_POOL = 5000
+
+CENTER_LAT, CENTER_LNG = -23.55052, -46.633308
+RADIUS = 2000
+KEYWORD = "padaria"
+
+# Importar o núcleo não pode carregar estes módulos (ver measure_import)
+LAZY_MODULES = ("pandas", "numpy", "openpyxl", "pyarrow")
+
+
+def synthetic_payloads(size: int, seed: int = 7) -> List[tuple]:
+    """Lista de (place_data, details) no formato da Places API"""
+    rng = random.Random(seed)
+    pool = []
+    for idx in range(min(size, PAYLOAD_POOL)):
+        reviews = rng.randint(0, 2000)
+        place = {
+            "place_id": f"BENCH_{idx:07d}",
+            "name": f"Padaria {rng.choice(['Central', 'do Bairro', 'Real', 'Nova'])} {idx}",
+            "rating": round(rng.uniform(3.0, 5.0), 1) if reviews else 0,
+            "user_ratings_total": reviews,
+            "vicinity": "Rua Augusta, 100",
+            "geometry": {"location": {
+                "lat": CENTER_LAT + rng.uniform(-0.015, 0.015),
+                "lng": CENTER_LNG + rng.uniform(-0.015, 0.015)
+            }},
+        }
+        result = {
+            "formatted_address": "Rua Augusta, 100 - São Paulo, SP",
+            "types": ["bakery", "food", "store"],
+            "photo_count": rng.randint(0, 30),
+            "business_status": "OPERATIONAL",
+        }
+        if rng.random() < 0.8:
+            result["formatted_phone_number"] = "(11) 99999-0000"
+        if rng.random() < 0.6:
+            result["website"] = "https://example.com"
+        if rng.random() < 0.85:
+            result["opening_hours"] = {"open_now": True}
+        if rng.random() < 0.5:
+            result["price_level"] = 2
+        pool.append((place, {"result": result}))
+    
+    return [pool[idx % len(pool)] for idx in range(size)]
+
+
+def synthetic_metrics(payloads: List[tuple], scorer: ProfileScorer) -> List[ProfileMetrics]:
+    """ProfileMetrics prontos (percentil e gap preenchidos), como após run_analysis"""
+    total = len(payloads)
+    metrics_list = [
+        scorer.score_profile(place, details, idx, CENTER_LAT, CENTER_LNG, RADIUS, KEYWORD, total)
+        for idx, (place, details) in enumerate(payloads, 1)
+    ]
+    compute_comparative_metrics(metrics_list)
+    return metrics_list
+
+
+class Fixture:
+    """Dados de entrada de um tamanho, criados sob demanda e compartilhados entre casos"""
+    
+    def __init__(self, size: int):
+        self.size = size
+        self.scorer = ProfileScorer()
+        self._payloads = None
+        self._metrics = None
+        self._df = None
+        self.output_dir = tempfile.mkdtemp(prefix="gmb_bench_")
+    
+    @property
+    def payloads(self) -> List[tuple]:
+        if self._payloads is None:
+            self._payloads = synthetic_payloads(self.size)
+        return self._payloads
+    
+    @property
+    def metrics(self) -> List[ProfileMetrics]:
+        if self._metrics is None:
+            self._metrics = synthetic_metrics(self.payloads, self.scorer)
+        return self._metrics
+    
+    @property
+    def df(self):
+        if self._df is None:
+            self._df = metrics_to_dataframe(self.metrics)
+        return self._df
+    
+    def path(self, name: str) -> Path:
+        return Path(self.output_dir) / name
+
+
+@dataclass
+class BenchmarkCase:
+    """Caminho medido; `max_size` limita os tamanhos em que roda"""
+    name: str
+    func: Callable[[Fixture], object]
+    max_size: Optional[int] = None
+    description: str = ""
+
+
+# ---------------------------------------------------------------------------
+# Casos
+# ---------------------------------------------------------------------------
+
+def bench_calculate_scores(fx: Fixture) -> None:
+    scorer = fx.scorer
+    total = fx.size
+    for idx, (place, details) in enumerate(fx.payloads, 1):
+        result = details["result"]
+        rating = place.get("rating", 0)
+        reviews = place.get("user_ratings_total", 0)
+        location = place["geometry"]["location"]
+        distance = scorer.calculate_distance(CENTER_LAT, CENTER_LNG, location["lat"], location["lng"])
+        scorer.calculate_rating_quality_score(rating, reviews)
+        scorer.calculate_review_velocity_score(reviews)
+        scorer.calculate_completeness_score(details)
+        scorer.calculate_authority_score(
+            rating, reviews, bool(result.get("website")), scorer.count_photos(result)
+        )
+        scorer.calculate_prominence_score(idx, total, distance, RADIUS)
+        scorer.calculate_relevance_score(place["name"], KEYWORD, result["types"], place["vicinity"])
+
+
+def bench_analyze_profile(fx: Fixture) -> None:
+    scorer = fx.scorer
+    total = fx.size
+    for idx, (place, details) in enumerate(fx.payloads, 1):
+        scorer.score_profile(place, details, idx, CENTER_LAT, CENTER_LNG, RADIUS, KEYWORD, total)
+
+
+def bench_score_batch(fx: Fixture) -> None:
+    from gmb_scoring import score_batch
+    
+    payloads = fx.payloads
+    results = [details["result"] for _, details in payloads]
+    places = [place for place, _ in payloads]
+    scorer = fx.scorer
+    distances = place_distances(places, CENTER_LAT, CENTER_LNG)
+    score_batch(
+        ratings=[place.get("rating", 0) for place in places],
+        total_reviews=[place.get("user_ratings_total", 0) for place in places],
+        distances=distances,
+        photo_counts=[result.get("photo_count", 0) for result in results],
+        field_masks={
+            field: [bool(result.get(field)) for result in results]
+            for field in scorer.COMPLETENESS_FIELDS if field != "photos"
+        },
+        rank_positions=range(1, fx.size + 1),
+        total_results=fx.size,
+        radius=RADIUS,
+        scorer=scorer
+    )
+
+
+def bench_distances(fx: Fixture) -> None:
+    place_distances([place for place, _ in fx.payloads], CENTER_LAT, CENTER_LNG)
+
+
+def bench_distance_matrix(fx: Fixture) -> None:
+    from gmb_geo import pairwise_distances
+    
+    locations = [place["geometry"]["location"] for place, _ in fx.payloads]
+    pairwise_distances(
+        [loc["lat"] for loc in locations], [loc["lng"] for loc in locations], dtype=np.float32
+    )
+
+
+def bench_comparative_metrics(fx: Fixture) -> None:
+    compute_comparative_metrics(fx.metrics)
+
+
+def bench_summary(fx: Fixture) -> None:
+    build_summary({m.rank_position: m.overall_strength_score for m in fx.metrics})
+
+
+def bench_dataframe(fx: Fixture) -> None:
+    metrics_to_dataframe(fx.metrics)
+
+
+def bench_report_csv(fx: Fixture) -> None:
+    fx.df.to_csv(fx.path("bench.csv"), index=False, encoding="utf-8-sig")
+
+
+def bench_report_json(fx: Fixture) -> None:
+    fx.df.to_json(fx.path("bench.json"), orient="records", indent=2, force_ascii=False)
+
+
+def bench_report_excel(fx: Fixture) -> None:
+    from gmb_xlsx import StreamingXlsxWriter
+    
+    with StreamingXlsxWriter(fx.path("bench.xlsx")) as writer:
+        writer.write_frame("Análise Completa", fx.df)
+
+
+def bench_generate_reports(fx: Fixture) -> None:
+    generate_reports(fx.df, KEYWORD, output_dir=fx.output_dir)
+
+
+CASES: Dict[str, BenchmarkCase] = {
+    case.name: case for case in [
+        BenchmarkCase("calculate_scores", bench_calculate_scores,
+                      description="métodos calculate_* por perfil"),
+        BenchmarkCase("analyze_profile", bench_analyze_profile,
+                      description="score_profile completo (sem rede)"),
+        BenchmarkCase("score_batch", bench_score_batch,
+                      description="scoring vetorizado (gmb_scoring)"),
+        BenchmarkCase("distances", bench_distances,
+                      description="distância ao centro de todos os perfis (gmb_geo)"),
+        BenchmarkCase("distance_matrix", bench_distance_matrix, max_size=10_000,
+                      description="matriz par a par float32 (concorrentes)"),
+        BenchmarkCase("comparative_metrics", bench_comparative_metrics,
+                      description="percentil e gap para o líder"),
+        BenchmarkCase("summary", bench_summary,
+                      description="build_summary de iter_analysis"),
+        BenchmarkCase("dataframe", bench_dataframe,
+                      description="ProfileMetrics -> DataFrame"),
+        BenchmarkCase("report_csv", bench_report_csv),
+        BenchmarkCase("report_json", bench_report_json),
+        BenchmarkCase("report_excel", bench_report_excel, max_size=50_000),
+        BenchmarkCase("generate_reports", bench_generate_reports, max_size=10_000,
+                      description="todos os formatos"),
+    ]
+}
+
+
+# ---------------------------------------------------------------------------
+# Execução
+# ---------------------------------------------------------------------------
+
+def measure(case: BenchmarkCase, fx: Fixture, min_time: float = 0.5,
+            max_repeats: int = 1000, memory: bool = True) -> Dict[str, float]:
+    """
+    Mede um caso: melhor tempo entre repetições (até somar `min_time`)
+    e pico de memória alocada durante uma execução extra com tracemalloc
+    """
+    case.func(fx)  # aquecimento (e criação lazy das fixtures)
+    
+    timings = []
+    while not timings or (len(timings) < max_repeats and sum(timings) < min_time):
+        gc.collect()
+        started = time.perf_counter()
+        case.func(fx)
+        timings.append(time.perf_counter() - started)
+    
+    best = min(timings)
+    result = {
+        "seconds": round(best, 6),
+        "ops_per_sec": round(fx.size / best, 1) if best else float("inf"),
+        "repeats": len(timings),
+    }
+    
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            case.func(fx)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        result["peak_mb"] = round(peak / 1024 / 1024, 3)
+    
+    return result
+
+
+def run_benchmarks(
+    sizes=DEFAULT_SIZES,
+    cases: Optional[List[str]] = None,
+    max_size: Optional[int] = None,
+    min_time: float = 0.5,
+    memory: bool = True,
+    verbose: bool = True
+) -> Dict[str, Dict[str, float]]:
+    """
+    Executa os casos em cada tamanho
+    
+    Returns:
+        {"<caso>@<tamanho>": {"seconds", "ops_per_sec", "repeats", "peak_mb"}}
+    """
+    selected = [CASES[name] for name in cases] if cases else list(CASES.values())
+    results = {}
+    
+    for size in sizes:
+        fx = Fixture(size)
+        for case in selected:
+            limit = min(filter(None, (case.max_size, max_size)), default=None)
+            if limit is not None and size > limit:
+                continue
+            
+            key = f"{case.name}@{size}"
+            results[key] = measure(case, fx, min_time=min_time, memory=memory)
+            if verbose:
+                row = results[key]
+                memory_text = f"{row['peak_mb']:>10.2f} MB" if "peak_mb" in row else ""
+                print(f"{key:<32} {row['ops_per_sec']:>14,.0f} ops/s {memory_text}")
+        shutil.rmtree(fx.output_dir, ignore_errors=True)
+        del fx
+        gc.collect()
+    
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float = DEFAULT_THRESHOLD
+) -> List[str]:
+    """
+    Lista as regressões: ops/s abaixo de baseline * (1 - threshold), pico
+    de memória acima de baseline * (1 + threshold) ou medição sem baseline
+    """
+    regressions = []
+    for key, row in results.items():
+        base = baseline.get(key)
+        if not base:
+            regressions.append(f"{key}: sem baseline (rode com --save-baseline)")
+            continue
+        
+        if row["ops_per_sec"] < base["ops_per_sec"] * (1 - threshold):
+            regressions.append(
+                f"{key}: {row['ops_per_sec']:,.0f} ops/s "
+                f"(baseline {base['ops_per_sec']:,.0f}, {row['ops_per_sec'] / base['ops_per_sec'] - 1:+.0%})"
+            )
+        
+        # Picos muito pequenos variam por ruído do alocador
+        if "peak_mb" in row and base.get("peak_mb", 0) >= 1:
+            if row["peak_mb"] > base["peak_mb"] * (1 + threshold):
+                regressions.append(
+                    f"{key}: pico {row['peak_mb']:.1f} MB "
+                    f"(baseline {base['peak_mb']:.1f} MB, {row['peak_mb'] / base['peak_mb'] - 1:+.0%})"
+                )
+    
+    return regressions
+
+
+def measure_import(module: str = "gmb_ranking_analyzer", repeat: int = 5) -> Dict[str, object]:
+    """
+    Tempo de importação de `module` em um processo novo, via python -X importtime
+    
+    Returns:
+        {"module", "ms" (menor tempo acumulado entre as repetições),
+         "lazy_loaded" (módulos de LAZY_MODULES carregados pela importação)}
+    """
+    code = (
+        f"import sys, {module}; "
+        f"print(','.join(name for name in {LAZY_MODULES!r} if name in sys.modules))"
+    )
+    best = None
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            capture_output=True, text=True, check=True, cwd=Path(__file__).resolve().parent
+        )
+        # Linha "import time: self | cumulativo | módulo" do próprio módulo
+        line = next(
+            line for line in reversed(proc.stderr.splitlines())
+            if line.rstrip().endswith(f"| {module}")
+        )
+        ms = int(line.split("|")[1]) / 1000
+        best = ms if best is None else min(best, ms)
+    
+    lazy_loaded = [name for name in proc.stdout.strip().split(",") if name]
+    return {"module": module, "ms": best, "lazy_loaded": lazy_loaded}
+
+
+def check_import_budget(budget_ms: float, module: str = "gmb_ranking_analyzer") -> int:
+    """Exit code 1 se a importação passar de `budget_ms` ou carregar LAZY_MODULES"""
+    result = measure_import(module)
+    print(f"import {module}: {result['ms']:.1f} ms (orçamento {budget_ms:.0f} ms)")
+    
+    failures = []
+    if result["ms"] > budget_ms:
+        failures.append(f"{result['ms']:.1f} ms acima do orçamento de {budget_ms:.0f} ms")
+    if result["lazy_loaded"]:
+        failures.append(f"carregou {', '.join(result['lazy_loaded'])} na importação")
+    
+    if failures:
+        print(f"\n❌ Importação de {module}:")
+        for line in failures:
+            print(f"  - {line}")
+        return 1
+    
+    print("\n✅ Importação dentro do orçamento")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks de scoring e relatórios")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="tamanhos separados por vírgula")
+    parser.add_argument("--cases", default=None,
+                        help=f"casos separados por vírgula ({', '.join(CASES)})")
+    parser.add_argument("--max-size", type=int, default=None,
+                        help="ignora tamanhos acima deste valor em todos os casos")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="arquivo JSON do baseline")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="grava os resultados como novo baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="regressão tolerada (0.25 = 25%%)")
+    parser.add_argument("--min-time", type=float, default=0.5,
+                        help="tempo mínimo somado das repetições por caso (s)")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="não mede pico de memória (tracemalloc deixa a execução mais lenta)")
+    parser.add_argument("--import-budget", type=float, default=None, metavar="MS",
+                        help="só verifica o tempo de importação do núcleo contra este orçamento")
+    args = parser.parse_args(argv)
+    
+    if args.import_budget is not None:
+        return check_import_budget(args.import_budget)
+    
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    cases = [name for name in args.cases.split(",") if name] if args.cases else None
+    unknown = set(cases or ()) - set(CASES)
+    if unknown:
+        parser.error(f"casos desconhecidos: {', '.join(sorted(unknown))}")
+    
+    # Logs de generate_reports por repetição distorcem a medição
+    for name in ("gmb_ranking_analyzer", "gmb_reports"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    
+    baseline_path = Path(args.baseline)
+    
+    # Sem baseline não há o que comparar: falha antes de medir
+    if not args.save_baseline and not baseline_path.exists():
+        print(f"❌ Sem baseline em {baseline_path}; rode com --save-baseline para criar")
+        return 2
+    
+    results = run_benchmarks(
+        sizes, cases, max_size=args.max_size, min_time=args.min_time, memory=not args.no_memory
+    )
+    
+    if args.save_baseline:
+        baseline = {}
+        if baseline_path.exists():
+            baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+        baseline.update(results)
+        baseline_path.write_text(json.dumps(baseline, indent=2, sort_keys=True), encoding="utf-8")
+        print(f"\nBaseline salvo em {baseline_path} ({len(results)} medições)")
+        return 0
+    
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    regressions = compare(results, baseline, args.threshold)
+    
+    if regressions:
+        print(f"\n❌ {len(regressions)} regressão(ões) acima de {args.threshold:.0%}:")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+    
+    print(f"\n✅ Nenhuma regressão acima de {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+"""
+Cache persistente de detalhes de lugares (SQLite)
+Compartilhado entre execuções e entre processos, com TTL por entrada
+e limite de tamanho com remoção LRU
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PlaceDetailsCache:
+    """
+    Cache em disco para respostas de `get_place_details`
+    
+    - Cada entrada expira após `ttl_hours` para leituras sem `max_age`
+    - Com `retention_hours` maior, as entradas ficam guardadas até essa
+      idade e só leituras com `max_age` explícito (reanálise incremental)
+      as alcançam
+    - Acima de `max_entries` as entradas menos acessadas são removidas
+    - Modo WAL + busy timeout permitem uso simultâneo por vários processos
+    """
+    
+    # Remoção LRU é verificada a cada N gravações
+    EVICT_EVERY = 64
+    
+    def __init__(
+        self,
+        path: str = "gmb_cache.sqlite",
+        ttl_hours: float = 24,
+        max_entries: int = 50000,
+        retention_hours: Optional[float] = None
+    ):
+        self.path = str(path)
+        self.ttl_seconds = ttl_hours * 3600
+        self.retention_seconds = max(self.ttl_seconds, (retention_hours or 0) * 3600)
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._writes = 0
+        
+        self._connect()
+    
+    @classmethod
+    def from_config(cls, advanced: Dict) -> Optional["PlaceDetailsCache"]:
+        """Cria o cache a partir da seção `advanced` do config.yaml"""
+        if not advanced.get("enable_cache", False):
+            return None
+        
+        # A reanálise incremental reaproveita detalhes até max_age_hours
+        # (pedindo max_age); as demais leituras continuam com o TTL
+        incremental = advanced.get("incremental", {})
+        retention_hours = None
+        if incremental.get("enabled", False):
+            retention_hours = incremental.get("max_age_hours", 168)
+        
+        return cls(
+            path=advanced.get("cache_file", "gmb_cache.sqlite"),
+            ttl_hours=advanced.get("cache_expiry_hours", 24),
+            max_entries=advanced.get("cache_max_entries", 50000),
+            retention_hours=retention_hours
+        )
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Retorna a conexão da thread atual (sqlite3 não compartilha conexões)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        
+        conn = sqlite3.connect(
+            self.path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS place_details ("
+            " place_id TEXT PRIMARY KEY,"
+            " payload TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_place_details_accessed"
+            " ON place_details (accessed_at)"
+        )
+        
+        self._local.conn = conn
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+    
+    def get(self, place_id: str, max_age: Optional[float] = None) -> Optional[Dict]:
+        """
+        Retorna os detalhes em cache ou None se ausentes/expirados
+        
+        Args:
+            max_age: idade máxima em segundos só para esta leitura (padrão:
+                o TTL), limitada a `retention_hours`. Entradas além da
+                retenção são removidas.
+        """
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT payload, created_at FROM place_details WHERE place_id = ?",
+            (place_id,)
+        ).fetchone()
+        
+        if row is None:
+            return None
+        
+        payload, created_at = row
+        now = time.time()
+        
+        age = now - created_at
+        if age > self.retention_seconds:
+            conn.execute("DELETE FROM place_details WHERE place_id = ?", (place_id,))
+            return None
+        if age > (self.ttl_seconds if max_age is None else max_age):
+            return None
+        
+        conn.execute(
+            "UPDATE place_details SET accessed_at = ? WHERE place_id = ?",
+            (now, place_id)
+        )
+        return json.loads(payload)
+    
+    def peek(self, place_id: str, max_age: Optional[float] = None) -> Optional[Dict]:
+        """
+        Como `get`, mas só leitura: não atualiza accessed_at (ordem LRU) nem
+        remove entradas expiradas. Para estimativas como plan_jobs
+        """
+        row = self._connect().execute(
+            "SELECT payload, created_at FROM place_details WHERE place_id = ?",
+            (place_id,)
+        ).fetchone()
+        
+        if row is None:
+            return None
+        
+        payload, created_at = row
+        age = time.time() - created_at
+        limit = self.ttl_seconds if max_age is None else min(max_age, self.retention_seconds)
+        if age > limit:
+            return None
+        return json.loads(payload)
+    
+    def set(self, place_id: str, data: Dict, created_at: Optional[float] = None) -> None:
+        """
+        Grava (ou substitui) os detalhes de um lugar
+        
+        Args:
+            created_at: instante (time.time) em que os dados foram obtidos
+                (padrão: agora). Um registro mesclado com campos antigos
+                deve passar o do mais antigo, para o TTL e a retenção
+                valerem a partir dele
+        """
+        conn = self._connect()
+        now = time.time()
+        if created_at is None:
+            created_at = now
+        conn.execute(
+            "INSERT OR REPLACE INTO place_details"
+            " (place_id, payload, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (place_id, json.dumps(data, ensure_ascii=False), created_at, now)
+        )
+        
+        with self._lock:
+            self._writes += 1
+            should_evict = self._writes % self.EVICT_EVERY == 0
+        
+        if should_evict:
+            self.evict()
+    
+    def evict(self) -> int:
+        """Remove entradas expiradas e, acima do limite, as menos acessadas"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            expired = conn.execute(
+                "DELETE FROM place_details WHERE created_at < ?",
+                (time.time() - self.retention_seconds,)
+            ).rowcount
+            
+            (count,) = conn.execute("SELECT COUNT(*) FROM place_details").fetchone()
+            excess = count - self.max_entries
+            evicted = 0
+            if excess > 0:
+                evicted = conn.execute(
+                    "DELETE FROM place_details WHERE place_id IN ("
+                    " SELECT place_id FROM place_details"
+                    " ORDER BY accessed_at ASC LIMIT ?)",
+                    (excess,)
+                ).rowcount
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        
+        if expired or evicted:
+            logger.debug(f"Cache: {expired} expiradas, {evicted} removidas (LRU)")
+        return expired + evicted
+    
+    def clear(self) -> None:
+        """Remove todas as entradas"""
+        self._connect().execute("DELETE FROM place_details")
+    
+    def __len__(self) -> int:
+        (count,) = self._connect().execute(
+            "SELECT COUNT(*) FROM place_details"
+        ).fetchone()
+        return count
+    
+    def __contains__(self, place_id: str) -> bool:
+        return self.peek(place_id) is not None
+    
+    def close(self) -> None:
+        """Fecha todas as conexões abertas pelo cache"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
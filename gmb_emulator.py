@@ -0,0 +1,525 @@
+"""
+Emulador local da Places API (nearbysearch/json e details/json)
+Serve mercados sintéticos com paginação por next_page_token (incluindo o
+atraso até o token ficar válido), latência configurável e injeção de
+falhas, para testes de carga sem consumir cota
+
+Uso:
+    python gmb_emulator.py --port 8765
+    python gmb_emulator.py --bench --market-size 60 --latency-ms 80
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+NEARBY_SEARCH_ROUTE = "/maps/api/place/nearbysearch/json"
+PLACE_DETAILS_ROUTE = "/maps/api/place/details/json"
+
+NAME_PREFIXES = ["Casa", "Empório", "Cantinho", "Ponto", "Recanto", "Estação", "Vila", "Nova"]
+NAME_SUFFIXES = ["Central", "do Bairro", "Paulista", "Premium", "Express", "da Esquina", "Gourmet"]
+PLACE_TYPES = ["store", "food", "point_of_interest", "establishment", "restaurant", "cafe"]
+STREETS = ["Rua Augusta", "Av. Paulista", "Rua Oscar Freire", "Rua da Consolação", "Av. Rebouças"]
+
+
+@dataclass
+class LatencyModel:
+    """
+    Distribuição de latência por requisição (em ms)
+    
+    kind: "constant" (sempre `mean_ms`), "uniform" (entre `min_ms` e
+    `max_ms`) ou "lognormal" (mediana `mean_ms`, dispersão `sigma`;
+    gera a cauda longa típica de APIs remotas)
+    """
+    kind: str = "constant"
+    mean_ms: float = 0.0
+    min_ms: float = 0.0
+    max_ms: float = 0.0
+    sigma: float = 0.5
+    
+    def sample(self, rng: random.Random) -> float:
+        """Latência sorteada, em segundos"""
+        if self.kind == "uniform":
+            value = rng.uniform(self.min_ms, self.max_ms)
+        elif self.kind == "lognormal":
+            value = rng.lognormvariate(math.log(max(self.mean_ms, 1e-3)), self.sigma)
+        else:
+            value = self.mean_ms
+        return max(0.0, value) / 1000.0
+
+
+@dataclass
+class EmulatorConfig:
+    """Parâmetros do emulador"""
+    market_size: int = 60
+    page_size: int = 20
+    max_results: int = 60
+    token_ready_delay: float = 2.0
+    token_ttl: float = 300.0  # Segundos até um next_page_token não usado expirar
+    search_latency: LatencyModel = field(default_factory=LatencyModel)
+    details_latency: LatencyModel = field(default_factory=LatencyModel)
+    error_rate: float = 0.0
+    over_query_limit_rate: float = 0.0
+    key_qps: Optional[float] = None
+    pool_size: Optional[int] = None
+    seed: int = 42
+
+
+class SyntheticMarket:
+    """
+    Gera lugares determinísticos para cada (localização, palavra-chave)
+    
+    Com `pool_size`, todas as buscas (palavras-chave e localizações
+    próximas, como os pontos de uma grade) sorteiam lugares do mesmo
+    conjunto, reproduzindo a sobreposição que existe na API real.
+    Cada lugar fica ao redor da primeira busca em que apareceu.
+    """
+    
+    def __init__(self, config: EmulatorConfig):
+        self.config = config
+        self._places: Dict[str, Dict] = {}
+        self._markets: Dict[Tuple[str, str], List[str]] = {}
+        self._lock = threading.Lock()
+    
+    def _rng(self, *parts) -> random.Random:
+        digest = hashlib.sha1("|".join(map(str, (self.config.seed,) + parts)).encode()).digest()
+        return random.Random(int.from_bytes(digest[:8], "big"))
+    
+    def _make_place(self, place_id: str, lat: float, lng: float, radius: float, keyword: str) -> Dict:
+        rng = self._rng("place", place_id)
+        
+        # Ponto uniforme dentro do raio
+        distance = radius * math.sqrt(rng.random())
+        bearing = rng.uniform(0, 2 * math.pi)
+        d_lat = (distance * math.cos(bearing)) / 111_320
+        d_lng = (distance * math.sin(bearing)) / (111_320 * max(math.cos(math.radians(lat)), 1e-6))
+        
+        reviews = int(rng.paretovariate(1.2) * 5) if rng.random() > 0.05 else 0
+        street = rng.choice(STREETS)
+        number = rng.randint(1, 3000)
+        
+        return {
+            "place_id": place_id,
+            "name": f"{rng.choice(NAME_PREFIXES)} {keyword.title()} {rng.choice(NAME_SUFFIXES)}",
+            "rating": round(rng.uniform(3.0, 5.0), 1) if reviews else 0,
+            "user_ratings_total": reviews,
+            "vicinity": f"{street}, {number}",
+            "types": rng.sample(PLACE_TYPES, rng.randint(2, 4)),
+            "geometry": {"location": {"lat": lat + d_lat, "lng": lng + d_lng}},
+            "business_status": "OPERATIONAL",
+            "formatted_address": f"{street}, {number} - São Paulo, SP",
+            "formatted_phone_number": f"(11) 9{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}" if rng.random() < 0.8 else None,
+            "website": f"https://{place_id.lower()}.example.com" if rng.random() < 0.6 else None,
+            "opening_hours": {"open_now": rng.random() < 0.7} if rng.random() < 0.85 else None,
+            "photos": [{"photo_reference": f"{place_id}-{i}"} for i in range(rng.randint(0, 25))],
+            "price_level": rng.randint(1, 4),
+            "url": f"https://maps.google.com/?cid={rng.randint(10**17, 10**18)}",
+        }
+    
+    def search(self, location: str, radius: float, keyword: str) -> List[str]:
+        """place_ids do mercado, na ordem de ranqueamento"""
+        key = (location, keyword)
+        with self._lock:
+            market = self._markets.get(key)
+            if market is not None:
+                return market
+            
+            lat, lng = (float(value) for value in location.split(","))
+            rng = self._rng("market", location, keyword)
+            size = self.config.market_size
+            
+            if self.config.pool_size:
+                pool = max(self.config.pool_size, size)
+                indices = rng.sample(range(pool), size)
+                ids = [f"EMU_POOL_{i:06d}" for i in indices]
+            else:
+                ids = [f"EMU_{rng.getrandbits(48):012X}" for _ in range(size)]
+            
+            for place_id in ids:
+                if place_id not in self._places:
+                    self._places[place_id] = self._make_place(place_id, lat, lng, radius, keyword)
+            
+            self._markets[key] = ids
+            return ids
+    
+    def place(self, place_id: str) -> Optional[Dict]:
+        return self._places.get(place_id)
+
+
+SEARCH_FIELDS = (
+    "place_id", "name", "rating", "user_ratings_total", "vicinity",
+    "types", "geometry", "business_status"
+)
+
+
+class PlacesAPIEmulator:
+    """
+    Servidor HTTP local compatível com os endpoints usados pelo analisador
+    
+    Exemplo:
+        with PlacesAPIEmulator(EmulatorConfig(market_size=60)) as emulator:
+            analyzer = GoogleMapsRankingAnalyzer("x", base_url=emulator.base_url)
+            metrics, df = analyzer.run_analysis("-23.55,-46.63", 2000, "padaria")
+    """
+    
+    def __init__(self, config: Optional[EmulatorConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or EmulatorConfig()
+        self.market = SyntheticMarket(self.config)
+        self._rng = random.Random(self.config.seed)
+        self._rng_lock = threading.Lock()
+        # token -> (válido a partir de, expira em, place_ids, offset), em ordem de expiração
+        self._tokens: Dict[str, Tuple[float, float, List[str], int]] = {}
+        self._tokens_lock = threading.Lock()
+        self._key_windows: Dict[str, Tuple[int, int]] = {}
+        self._stats_lock = threading.Lock()
+        self.stats: Dict[str, int] = {
+            "nearbysearch": 0,
+            "details": 0,
+            "token_not_ready": 0,
+            "http_errors": 0,
+            "over_query_limit": 0,
+        }
+        
+        handler = type("Handler", (_EmulatorHandler,), {"emulator": self})
+        self.server = ThreadingHTTPServer((host, port), handler, bind_and_activate=False)
+        # Fila de conexões grande: o padrão (5) causa retransmissões TCP
+        # sob muitos workers e distorce a latência medida
+        self.server.request_queue_size = 1024
+        self.server.daemon_threads = True
+        self.server.server_bind()
+        self.server.server_activate()
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def base_url(self) -> str:
+        """Valor para `base_url` do analisador"""
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/maps/api/place"
+    
+    def start(self) -> "PlacesAPIEmulator":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Emulador da Places API em {self.base_url}")
+        return self
+    
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread:
+            self._thread.join()
+    
+    def __enter__(self) -> "PlacesAPIEmulator":
+        return self.start()
+    
+    def __exit__(self, *exc) -> None:
+        self.stop()
+    
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self.stats[key] += 1
+    
+    def _roll(self) -> Tuple[float, float]:
+        with self._rng_lock:
+            return self._rng.random(), self._rng.random()
+    
+    def _within_key_qps(self, key: str) -> bool:
+        """Janela de 1 s por chave, como a cota de QPS de cada projeto na API real"""
+        second = int(time.monotonic())
+        with self._stats_lock:
+            window, count = self._key_windows.get(key, (second, 0))
+            if window != second:
+                window, count = second, 0
+            self._key_windows[key] = (window, count + 1)
+            return count < self.config.key_qps
+    
+    def _sample_latency(self, model: LatencyModel) -> float:
+        with self._rng_lock:
+            return model.sample(self._rng)
+    
+    def handle(self, path: str, params: Dict[str, str]) -> Tuple[int, Dict]:
+        """Processa uma requisição e retorna (código HTTP, payload)"""
+        if path == NEARBY_SEARCH_ROUTE:
+            self._count("nearbysearch")
+            latency = self.config.search_latency
+        elif path == PLACE_DETAILS_ROUTE:
+            self._count("details")
+            latency = self.config.details_latency
+        else:
+            return 404, {"status": "NOT_FOUND"}
+        
+        if self.config.key_qps and not self._within_key_qps(params.get("key", "")):
+            self._count("over_query_limit")
+            return 200, {"status": "OVER_QUERY_LIMIT", "results": []}
+        
+        delay = self._sample_latency(latency)
+        if delay:
+            time.sleep(delay)
+        
+        error_roll, quota_roll = self._roll()
+        if error_roll < self.config.error_rate:
+            self._count("http_errors")
+            return 500, {"status": "UNKNOWN_ERROR"}
+        if quota_roll < self.config.over_query_limit_rate:
+            self._count("over_query_limit")
+            return 200, {"status": "OVER_QUERY_LIMIT", "results": []}
+        
+        if path == NEARBY_SEARCH_ROUTE:
+            return 200, self._nearby_search(params)
+        return 200, self._details(params)
+    
+    def _nearby_search(self, params: Dict[str, str]) -> Dict:
+        token = params.get("pagetoken")
+        if token:
+            now = time.monotonic()
+            with self._tokens_lock:
+                entry = self._tokens.get(token)
+                # Token usado (ou expirado) sai do dicionário
+                if entry is not None and (now >= entry[0] or now >= entry[1]):
+                    del self._tokens[token]
+            if entry is None or now >= entry[1]:
+                return {"status": "INVALID_REQUEST", "results": []}
+            ready_at, _, ids, offset = entry
+            if now < ready_at:
+                self._count("token_not_ready")
+                return {"status": "INVALID_REQUEST", "results": []}
+        else:
+            try:
+                ids = self.market.search(
+                    params["location"], float(params.get("radius", 1000)), params.get("keyword", "")
+                )
+            except (KeyError, ValueError):
+                return {"status": "INVALID_REQUEST", "results": []}
+            ids = ids[:self.config.max_results]
+            offset = 0
+        
+        page_ids = ids[offset:offset + self.config.page_size]
+        results = []
+        for place_id in page_ids:
+            place = self.market.place(place_id)
+            results.append({key: place[key] for key in SEARCH_FIELDS if place.get(key) is not None})
+        
+        payload = {"status": "OK" if results else "ZERO_RESULTS", "results": results}
+        
+        next_offset = offset + self.config.page_size
+        if next_offset < len(ids):
+            next_token = hashlib.sha1(f"{id(ids)}:{next_offset}:{time.monotonic()}".encode()).hexdigest()
+            now = time.monotonic()
+            with self._tokens_lock:
+                self._prune_tokens(now)
+                self._tokens[next_token] = (
+                    now + self.config.token_ready_delay, now + self.config.token_ttl, ids, next_offset
+                )
+            payload["next_page_token"] = next_token
+        
+        return payload
+    
+    def _prune_tokens(self, now: float) -> None:
+        # Inserção em ordem de expiração: basta remover do início (com _tokens_lock)
+        expired = []
+        for token, (_, expires_at, _, _) in self._tokens.items():
+            if now < expires_at:
+                break
+            expired.append(token)
+        for token in expired:
+            del self._tokens[token]
+    
+    def _details(self, params: Dict[str, str]) -> Dict:
+        place = self.market.place(params.get("place_id", ""))
+        if place is None:
+            return {"status": "NOT_FOUND"}
+        
+        fields = [f for f in params.get("fields", "").split(",") if f]
+        if fields:
+            result = {key: place[key] for key in fields if place.get(key) is not None}
+        else:
+            result = {key: value for key, value in place.items() if value is not None}
+        
+        return {"status": "OK", "result": result}
+
+
+class _EmulatorHandler(BaseHTTPRequestHandler):
+    emulator: PlacesAPIEmulator
+    protocol_version = "HTTP/1.1"
+    
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        status, payload = self.emulator.handle(parsed.path, params)
+        
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Percentil por interpolação linear (q entre 0 e 100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    low = math.floor(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def run_benchmark(
+    config: EmulatorConfig,
+    runs: int = 3,
+    max_workers: int = 16,
+    qps: float = 0,
+    max_pages: int = 3,
+    output_dir: str = "output/bench"
+) -> Dict:
+    """
+    Executa run_analysis + generate_reports contra o emulador
+    
+    Cada execução usa uma palavra-chave diferente (sem cache entre elas).
+    Retorna vazão (perfis/s), tempo total e p50/p95/p99 das requisições
+    HTTP vistas pelo cliente, incluindo retries e espera do rate limiter.
+    """
+    from gmb_ranking_analyzer import GoogleMapsRankingAnalyzer, generate_reports
+    
+    latencies: List[float] = []
+    latencies_lock = threading.Lock()
+    run_times: List[float] = []
+    report_times: List[float] = []
+    profiles = 0
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    
+    with PlacesAPIEmulator(config) as emulator:
+        analyzer = GoogleMapsRankingAnalyzer(
+            "EMULATOR",
+            max_workers=max_workers,
+            qps=qps,
+            rate_limit_delay=0,
+            retry_delay=0.05,
+            page_token_delay=0.0,
+            base_url=emulator.base_url
+        )
+        original_request = analyzer._request
+        
+        def timed_request(url: str, params: Dict) -> Dict:
+            started = time.perf_counter()
+            try:
+                return original_request(url, params)
+            finally:
+                with latencies_lock:
+                    latencies.append(time.perf_counter() - started)
+        
+        analyzer._request = timed_request
+        
+        for run in range(runs):
+            keyword = f"bench{run}"
+            started = time.perf_counter()
+            metrics_list, df = analyzer.run_analysis(
+                "-23.55052,-46.633308", 2000, keyword, max_pages=max_pages, max_workers=max_workers
+            )
+            run_times.append(time.perf_counter() - started)
+            
+            started = time.perf_counter()
+            generate_reports(df, keyword, output_dir=output_dir)
+            report_times.append(time.perf_counter() - started)
+            profiles += len(metrics_list)
+        
+        server_stats = dict(emulator.stats)
+    
+    total_time = sum(run_times) + sum(report_times)
+    return {
+        "runs": runs,
+        "profiles": profiles,
+        "requests": len(latencies),
+        "analysis_seconds": round(sum(run_times), 3),
+        "report_seconds": round(sum(report_times), 3),
+        "profiles_per_second": round(profiles / total_time, 1) if total_time else 0.0,
+        "latency_p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "latency_p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "latency_p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "server": server_stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Emulador local da Places API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--market-size", type=int, default=60)
+    parser.add_argument("--pool-size", type=int, default=None,
+                        help="lugares compartilhados entre todas as buscas")
+    parser.add_argument("--token-delay", type=float, default=2.0,
+                        help="segundos até o next_page_token ficar válido")
+    parser.add_argument("--token-ttl", type=float, default=300.0,
+                        help="segundos até um next_page_token não usado expirar")
+    parser.add_argument("--latency", choices=["constant", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="latência mediana")
+    parser.add_argument("--sigma", type=float, default=0.5, help="dispersão da lognormal")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fração de respostas HTTP 500")
+    parser.add_argument("--over-query-limit", type=float, default=0.0,
+                        help="fração de respostas OVER_QUERY_LIMIT")
+    parser.add_argument("--key-qps", type=float, default=None,
+                        help="requisições por segundo por chave; acima disso, OVER_QUERY_LIMIT")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--bench", action="store_true",
+                        help="roda run_analysis + generate_reports contra o emulador e sai")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--qps", type=float, default=0, help="limite do analisador (0 = sem limite)")
+    args = parser.parse_args()
+    
+    latency = LatencyModel(
+        kind=args.latency,
+        mean_ms=args.latency_ms,
+        min_ms=args.latency_ms / 2,
+        max_ms=args.latency_ms * 1.5,
+        sigma=args.sigma
+    )
+    config = EmulatorConfig(
+        market_size=args.market_size,
+        token_ready_delay=args.token_delay,
+        token_ttl=args.token_ttl,
+        search_latency=latency,
+        details_latency=latency,
+        error_rate=args.error_rate,
+        over_query_limit_rate=args.over_query_limit,
+        key_qps=args.key_qps,
+        pool_size=args.pool_size,
+        seed=args.seed
+    )
+    
+    if args.bench:
+        from gmb_ranking_analyzer import configure_logging
+        configure_logging(log_file=None)
+        result = run_benchmark(config, runs=args.runs, max_workers=args.workers, qps=args.qps)
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+        return
+    
+    emulator = PlacesAPIEmulator(config, host=args.host, port=args.port)
+    print(f"Emulador rodando em {emulator.base_url}")
+    print(f"Use base_url=\"{emulator.base_url}\" ou GMB_PLACES_BASE_URL={emulator.base_url}")
+    try:
+        emulator.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emulator.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Projeção de campos para get_place_details
+Calcula o parâmetro `fields` mínimo a partir dos sub-scores ativos e das
+colunas de relatório pedidas, compacta as respostas e mescla registros
+parciais em cache quando uma execução posterior precisa de mais campos
+"""
+
+from typing import Dict, FrozenSet, Iterable, Optional, Set
+
+# Campos de detalhes lidos diretamente por colunas de ProfileMetrics
+COLUMN_DETAIL_FIELDS = {
+    "address": ("formatted_address",),
+    "phone": ("formatted_phone_number",),
+    "website": ("website",),
+}
+
+# Colunas de score -> sub-score do qual dependem
+SCORE_COLUMNS = {
+    "rating_quality_score": "rating_quality",
+    "review_velocity_score": "review_velocity",
+    "completeness_score": "completeness",
+    "authority_score": "authority",
+    "prominence_score": "prominence",
+    "relevance_score": "relevance",
+}
+
+# Colunas que dependem do score geral (todos os sub-scores com peso > 0)
+OVERALL_COLUMNS = {
+    "overall_strength_score", "strength_category", "percentile_rank", "gap_to_leader"
+}
+
+# SKU de cobrança de cada campo (Places API - Place Details)
+FIELD_SKUS = {
+    "business_status": "basic",
+    "formatted_address": "basic",
+    "geometry": "basic",
+    "name": "basic",
+    "photos": "basic",
+    "types": "basic",
+    "url": "basic",
+    "utc_offset": "basic",
+    "formatted_phone_number": "contact",
+    "opening_hours": "contact",
+    "website": "contact",
+    "price_level": "atmosphere",
+    "rating": "atmosphere",
+    "reviews": "atmosphere",
+    "user_ratings_total": "atmosphere",
+}
+
+# Chave do payload com os campos já solicitados para o registro
+FIELDS_KEY = "_fields"
+
+# Chaves do payload usadas pela reanálise incremental: assinatura da busca
+# quando os detalhes foram obtidos e o momento da obtenção (epoch)
+SIGNATURE_KEY = "_signature"
+FETCHED_AT_KEY = "_fetched_at"
+
+# Campos do resultado da nearbysearch cuja mudança indica perfil alterado
+SEARCH_SIGNATURE_FIELDS = (
+    "name", "rating", "user_ratings_total", "business_status", "vicinity", "price_level"
+)
+
+
+def plan_detail_fields(
+    scorer,
+    columns: Optional[Iterable[str]] = None
+) -> FrozenSet[str]:
+    """
+    Retorna o conjunto mínimo de campos para get_place_details
+    
+    Args:
+        scorer: ProfileScorer (usa WEIGHTS e SCORE_DETAIL_FIELDS)
+        columns: colunas de ProfileMetrics desejadas no resultado
+            (None = todas)
+    """
+    enabled = {key for key, weight in scorer.WEIGHTS.items() if weight}
+    if columns is None:
+        columns = set(COLUMN_DETAIL_FIELDS) | set(SCORE_COLUMNS) | OVERALL_COLUMNS
+    
+    needed_scores: Set[str] = set()
+    fields: Set[str] = set()
+    
+    for column in columns:
+        if column in COLUMN_DETAIL_FIELDS:
+            fields.update(COLUMN_DETAIL_FIELDS[column])
+        elif column in SCORE_COLUMNS:
+            needed_scores.add(SCORE_COLUMNS[column])
+        elif column in OVERALL_COLUMNS:
+            needed_scores.update(enabled)
+    
+    for score in needed_scores:
+        fields.update(scorer.SCORE_DETAIL_FIELDS.get(score, ()))
+    
+    return frozenset(fields)
+
+
+def billing_skus(fields: Iterable[str]) -> Set[str]:
+    """SKUs de cobrança acionados por um conjunto de campos"""
+    return {FIELD_SKUS.get(field, "basic") for field in fields}
+
+
+def search_signature(place: Dict) -> str:
+    """Assinatura dos sinais de um resultado da busca (rating, nº de reviews...)"""
+    return "|".join(str(place.get(field, "")) for field in SEARCH_SIGNATURE_FIELDS)
+
+
+def fields_of(record: Dict, default: Iterable[str] = ()) -> FrozenSet[str]:
+    """Campos já solicitados para um registro em cache"""
+    return frozenset(record.get(FIELDS_KEY, default))
+
+
+def compact_details(data: Dict, fields: Iterable[str]) -> Dict:
+    """
+    Marca os campos solicitados e troca a lista de fotos pela contagem
+    
+    Os scores só usam a quantidade de fotos, então `photos` vira
+    `photo_count` e o registro em cache fica bem menor.
+    """
+    result = data.get("result")
+    if isinstance(result, dict) and "photos" in result:
+        result = dict(result)
+        result["photo_count"] = len(result.pop("photos") or [])
+        data = {**data, "result": result}
+    
+    return {**data, FIELDS_KEY: sorted(fields)}
+
+
+def merge_details(cached: Dict, fresh: Dict) -> Dict:
+    """Mescla um registro parcial em cache com campos recém-obtidos"""
+    result = {**cached.get("result", {}), **fresh.get("result", {})}
+    fields = fields_of(cached) | fields_of(fresh)
+    
+    return {**fresh, "result": result, FIELDS_KEY: sorted(fields)}
@@ -0,0 +1,197 @@
+"""
+Distâncias geográficas vetorizadas (NumPy)
+Haversine para muitos pares de uma vez, com a mesma fórmula de
+ProfileScorer.calculate_distance: distâncias de um ponto a muitos,
+matrizes cruzadas e par a par (com float32 e cálculo em blocos para N
+grande), filtros por raio e geração de grades de pontos
+"""
+
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371000  # Raio da Terra em metros
+
+# Elementos por bloco nas matrizes (8 MB por array temporário de float64);
+# sem chunk_size, as linhas por bloco saem deste limite
+BLOCK_ELEMENTS = 1 << 20
+
+# Metros por grau de latitude (pré-filtro por caixa delimitadora)
+METERS_PER_DEGREE = np.pi * EARTH_RADIUS_M / 180
+
+
+def _as_float_array(values) -> np.ndarray:
+    return np.asarray(values, dtype=np.float64)
+
+
+def haversine(lat1, lng1, lat2, lng2) -> np.ndarray:
+    """
+    Distância em metros entre pontos (arrays com broadcasting)
+    
+    Mesma fórmula de calculate_distance, então os valores coincidem
+    com o cálculo por par (diferença máxima de 1 ulp).
+    """
+    lat1, lng1, lat2, lng2 = (
+        np.radians(_as_float_array(value)) for value in (lat1, lng1, lat2, lng2)
+    )
+    dlat = lat2 - lat1
+    dlng = lng2 - lng1
+    
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlng / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    
+    return EARTH_RADIUS_M * c
+
+
+def distances_from(lat: float, lng: float, lats, lngs) -> np.ndarray:
+    """Distância de um ponto a cada um dos pontos (lats[i], lngs[i])"""
+    return haversine(lat, lng, lats, lngs)
+
+
+def _row_chunks(rows: int, cols: int, chunk_size: Optional[int]) -> Iterator[slice]:
+    step = chunk_size or max(1, BLOCK_ELEMENTS // max(cols, 1))
+    for start in range(0, rows, step):
+        yield slice(start, min(start + step, rows))
+
+
+def cross_distances(
+    lats_a,
+    lngs_a,
+    lats_b,
+    lngs_b,
+    dtype=np.float64,
+    chunk_size: Optional[int] = None
+) -> np.ndarray:
+    """
+    Matriz len(a) x len(b) com a distância de cada ponto de `a` a cada ponto de `b`
+    
+    Args:
+        dtype: tipo do resultado (np.float32 reduz a matriz pela metade;
+            erro relativo ~1e-7, centímetros em distâncias urbanas)
+        chunk_size: linhas calculadas por vez, limitando os arrays
+            temporários de float64 (None = automático, ~8 MB por temporário)
+    """
+    lats_a, lngs_a = _as_float_array(lats_a), _as_float_array(lngs_a)
+    lats_b, lngs_b = _as_float_array(lats_b)[None, :], _as_float_array(lngs_b)[None, :]
+    
+    result = np.empty((len(lats_a), lats_b.shape[1]), dtype=dtype)
+    for rows in _row_chunks(len(lats_a), lats_b.shape[1], chunk_size):
+        result[rows] = haversine(lats_a[rows, None], lngs_a[rows, None], lats_b, lngs_b)
+    return result
+
+
+def pairwise_distances(
+    lats,
+    lngs,
+    dtype=np.float64,
+    chunk_size: Optional[int] = None
+) -> np.ndarray:
+    """
+    Matriz simétrica N x N das distâncias entre todos os pontos
+    
+    Calcula só o triângulo superior (em blocos de `chunk_size` linhas) e
+    espelha, com diagonal zero.
+    """
+    lats, lngs = _as_float_array(lats), _as_float_array(lngs)
+    n = len(lats)
+    result = np.zeros((n, n), dtype=dtype)
+    
+    for rows in _row_chunks(n, n, chunk_size):
+        cols = slice(rows.start, n)
+        block = haversine(lats[rows, None], lngs[rows, None], lats[None, cols], lngs[None, cols])
+        result[rows, cols] = block
+        result[cols, rows] = block.T
+    
+    np.fill_diagonal(result, 0)
+    return result
+
+
+def within_radius(lat: float, lng: float, lats, lngs, radius: float) -> np.ndarray:
+    """Máscara booleana dos pontos a até `radius` metros de (lat, lng)"""
+    return distances_from(lat, lng, lats, lngs) <= radius
+
+
+def indices_within_radius(lat: float, lng: float, lats, lngs, radius: float) -> np.ndarray:
+    """
+    Índices dos pontos a até `radius` metros, do mais próximo ao mais distante
+    
+    Usa uma caixa delimitadora para descartar a maioria dos pontos antes
+    do haversine.
+    """
+    lats, lngs = _as_float_array(lats), _as_float_array(lngs)
+    candidates = np.flatnonzero(_bounding_box_mask(lat, lng, lats, lngs, radius))
+    
+    distances = distances_from(lat, lng, lats[candidates], lngs[candidates])
+    inside = distances <= radius
+    order = np.argsort(distances[inside], kind="stable")
+    return candidates[inside][order]
+
+
+def neighbor_pairs(
+    lats,
+    lngs,
+    radius: float,
+    chunk_size: Optional[int] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Todos os pares (i, j), i < j, a até `radius` metros um do outro
+    
+    Processa `chunk_size` linhas por vez, sem montar a matriz N x N.
+    
+    Returns:
+        (i, j, distância) como três arrays de mesmo tamanho
+    """
+    lats, lngs = _as_float_array(lats), _as_float_array(lngs)
+    n = len(lats)
+    found_i, found_j, found_d = [], [], []
+    
+    for rows in _row_chunks(n, n, chunk_size):
+        cols = slice(rows.start, n)
+        block = haversine(lats[rows, None], lngs[rows, None], lats[None, cols], lngs[None, cols])
+        
+        # Só o triângulo superior (j > i)
+        row_idx = np.arange(rows.start, rows.stop)[:, None]
+        col_idx = np.arange(cols.start, n)[None, :]
+        i, j = np.nonzero((block <= radius) & (col_idx > row_idx))
+        
+        found_i.append(i + rows.start)
+        found_j.append(j + cols.start)
+        found_d.append(block[i, j])
+    
+    if not found_i:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty, np.empty(0)
+    return np.concatenate(found_i), np.concatenate(found_j), np.concatenate(found_d)
+
+
+def _bounding_box_mask(lat: float, lng: float, lats: np.ndarray, lngs: np.ndarray, radius: float) -> np.ndarray:
+    """Pontos dentro do retângulo que contém o círculo de `radius` metros"""
+    d_lat = radius / METERS_PER_DEGREE
+    cos_lat = np.cos(np.radians(min(abs(lat) + d_lat, 90.0)))
+    if cos_lat < 1e-12:
+        return np.abs(lats - lat) <= d_lat
+    d_lng = radius / (METERS_PER_DEGREE * cos_lat)
+    lng_diff = np.abs((lngs - lng + 180) % 360 - 180)
+    return (np.abs(lats - lat) <= d_lat) & (lng_diff <= d_lng)
+
+
+def grid_points(
+    center_lat: float,
+    center_lng: float,
+    size: int,
+    spacing: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Grade size x size centrada no ponto, com `spacing` metros entre pontos
+    
+    Returns:
+        (lats, lngs) com size*size posições, linha a linha de norte para
+        sul e de oeste para leste
+    """
+    offsets = (np.arange(size) - (size - 1) / 2) * spacing
+    north = -offsets[:, None] * np.ones(size)[None, :]
+    east = np.ones(size)[:, None] * offsets[None, :]
+    
+    lats = center_lat + np.degrees(north / EARTH_RADIUS_M)
+    lngs = center_lng + np.degrees(east / (EARTH_RADIUS_M * np.cos(np.radians(center_lat))))
+    return lats.ravel(), lngs.ravel()
@@ -0,0 +1,234 @@
+"""
+Rastreamento de ranqueamento em grade (geo-grid)
+Executa a mesma busca em cada ponto de uma grade N x N ao redor de um
+centro e monta a matriz lugar x ponto com a posição de cada negócio,
+rank médio e cobertura
+"""
+
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from gmb_batch import SharedDetailFetcher
+from gmb_geo import cross_distances, grid_points
+from gmb_ranking_analyzer import (
+    GoogleMapsRankingAnalyzer,
+    compute_comparative_metrics,
+    metrics_to_dataframe,
+    parse_location,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _row_means(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Média por linha só das células em `mask` (NaN se a linha não tem nenhuma)"""
+    counts = mask.sum(axis=1)
+    totals = np.where(mask, values, 0.0).sum(axis=1)
+    return np.divide(totals, counts, out=np.full(len(counts), np.nan), where=counts > 0)
+
+
+@dataclass(frozen=True)
+class GridPoint:
+    """Ponto da grade (row 0 = norte, col 0 = oeste)"""
+    row: int
+    col: int
+    lat: float
+    lng: float
+    
+    @property
+    def label(self) -> str:
+        return f"r{self.row}c{self.col}"
+    
+    @property
+    def location(self) -> str:
+        return f"{self.lat:.6f},{self.lng:.6f}"
+
+
+@dataclass
+class GridResult:
+    """
+    Resultado de run_grid
+    
+    ranks: DataFrame lugar x ponto (index place_id, colunas GridPoint.label)
+        com a posição no ponto; NaN onde o lugar não apareceu
+    summary: uma linha por lugar com rank médio, cobertura e scores médios,
+        ordenada por rank médio considerando ausências
+    frames: DataFrame de run_analysis de cada ponto (mesmas colunas)
+    distances: matriz lugar x ponto em metros (mesma ordem de `ranks`)
+    """
+    keyword: str
+    points: List[GridPoint]
+    ranks: pd.DataFrame
+    summary: pd.DataFrame
+    frames: Dict[str, pd.DataFrame]
+    distances: np.ndarray
+    stats: Dict[str, int] = field(default_factory=dict)
+    
+    def rank_grid(self, place_id: str) -> np.ndarray:
+        """Posições de um lugar no formato da grade (size x size)"""
+        size = int(round(len(self.points) ** 0.5))
+        return self.ranks.loc[place_id].to_numpy().reshape(size, size)
+
+
+def run_grid(
+    analyzer: GoogleMapsRankingAnalyzer,
+    center: str,
+    keyword: str,
+    size: int = 7,
+    spacing: float = 500,
+    radius: int = 1000,
+    max_pages: int = 1,
+    max_workers: Optional[int] = None,
+    max_concurrent_searches: int = 8
+) -> GridResult:
+    """
+    Mede o ranqueamento de `keyword` em cada ponto de uma grade
+    
+    As buscas dos pontos rodam em paralelo e os detalhes de cada place_id
+    são obtidos uma única vez para a grade inteira. As distâncias de todos
+    os pares lugar/ponto saem de um único cálculo vetorizado.
+    
+    Args:
+        analyzer: analisador (cache, rate limiter e sessão são compartilhados)
+        center: 'lat,lng' do centro da grade
+        keyword: palavra-chave buscada em todos os pontos
+        size: pontos por lado (7 = 7x7, 13 = 13x13)
+        spacing: distância entre pontos vizinhos, em metros
+        radius: raio de cada busca, em metros
+        max_pages: páginas por ponto (1 = top 20, como nas ferramentas de grade)
+        max_workers: threads para detalhes (padrão: analyzer.max_workers, mínimo 4)
+        max_concurrent_searches: pontos buscando ao mesmo tempo
+    """
+    center_lat, center_lng = parse_location(center)
+    lats, lngs = grid_points(center_lat, center_lng, size, spacing)
+    points = [
+        GridPoint(idx // size, idx % size, float(lat), float(lng))
+        for idx, (lat, lng) in enumerate(zip(lats, lngs))
+    ]
+    workers = max(1, max_workers or max(analyzer.max_workers, 4))
+    
+    logger.info(
+        f"Grade {size}x{size} para '{keyword}' em {center} | "
+        f"espaçamento {spacing:.0f}m | raio {radius}m"
+    )
+    
+    places_by_point: Dict[GridPoint, List[Dict]] = {}
+    futures_by_point: Dict[GridPoint, List[Future]] = {}
+    
+    # Um escopo de orçamento para o lote inteiro (max_run_calls)
+    with analyzer.budget_run(), ThreadPoolExecutor(max_workers=workers) as detail_pool:
+        fetcher = SharedDetailFetcher(analyzer, detail_pool)
+        
+        def collect(point: GridPoint) -> None:
+            futures = futures_by_point.setdefault(point, [])
+            
+            def on_page(places: List[Dict], first_position: int) -> None:
+                futures.extend(fetcher.submit(place) for place in places)
+            
+            places_by_point[point] = analyzer.collect_places(
+                point.location, radius, keyword, max_pages, on_page=on_page
+            )
+        
+        search_workers = max(1, min(len(points), max_concurrent_searches))
+        analyzer.ensure_connection_pool(workers + search_workers)
+        with ThreadPoolExecutor(max_workers=search_workers) as search_pool:
+            for future in [search_pool.submit(collect, point) for point in points]:
+                future.result()
+        
+        # Lugares únicos da grade (coordenadas da primeira aparição)
+        place_index: Dict[str, int] = {}
+        place_coords = []
+        for point in points:
+            for place in places_by_point[point]:
+                place_id = place.get("place_id")
+                if place_id not in place_index:
+                    place_index[place_id] = len(place_index)
+                    location = place["geometry"]["location"]
+                    place_coords.append((location["lat"], location["lng"]))
+        
+        coords = np.array(place_coords, dtype=np.float64).reshape(-1, 2)
+        distances = cross_distances(coords[:, 0], coords[:, 1], lats, lngs)
+        
+        ranks = np.full((len(place_index), len(points)), np.nan)
+        scores = np.full((len(place_index), len(points)), np.nan)
+        analysis_date = datetime.now().isoformat()
+        frames: Dict[str, pd.DataFrame] = {}
+        
+        for col, point in enumerate(points):
+            places = places_by_point[point]
+            total = len(places)
+            metrics_list = []
+            
+            for idx, (place, future) in enumerate(zip(places, futures_by_point[point]), 1):
+                row = place_index[place.get("place_id")]
+                ranks[row, col] = idx
+                if analyzer.budget_skips(future.result()):
+                    continue  # posição conhecida, sem score (orçamento no modo stop)
+                metrics = analyzer.analyze_profile(
+                    place, idx, point.lat, point.lng, radius, keyword, total,
+                    details=future.result(), analysis_date=analysis_date,
+                    distance=float(distances[row, col])
+                )
+                scores[row, col] = metrics.overall_strength_score
+                metrics_list.append(metrics)
+            
+            with analyzer.traced(
+                "percentiles", phase="percentiles", keyword=keyword, point=point.label,
+                profiles=len(metrics_list)
+            ):
+                compute_comparative_metrics(metrics_list)
+            frames[point.label] = metrics_to_dataframe(metrics_list)
+    
+    place_ids = list(place_index)
+    labels = [point.label for point in points]
+    rank_frame = pd.DataFrame(ranks, index=pd.Index(place_ids, name="place_id"), columns=labels)
+    
+    found = ~np.isnan(ranks)
+    found_count = found.sum(axis=1)
+    # Ausência conta como a posição logo após o último resultado possível
+    missing_rank = max_pages * 20 + 1
+    names = {}
+    for point in points:
+        for place in places_by_point[point]:
+            names.setdefault(place.get("place_id"), place.get("name", "N/A"))
+    
+    # Lugares pulados no modo stop do orçamento não têm score em nenhum ponto
+    summary = pd.DataFrame({
+        "place_id": place_ids,
+        "name": [names[place_id] for place_id in place_ids],
+        "avg_rank": np.round(_row_means(ranks, found), 2),
+        "avg_rank_total": np.round(np.where(found, ranks, missing_rank).mean(axis=1), 2),
+        "best_rank": np.where(found, ranks, np.inf).min(axis=1),
+        "coverage": np.round(found_count / len(points) * 100, 1),
+        "top3_share": np.round((found & (ranks <= 3)).sum(axis=1) / len(points) * 100, 1),
+        "points_found": found_count,
+        "avg_overall_score": np.round(_row_means(scores, ~np.isnan(scores)), 2),
+        "avg_distance": np.round(_row_means(distances, found), 2),
+    })
+    summary = summary.sort_values(["avg_rank_total", "avg_rank"], kind="stable").reset_index(drop=True)
+    
+    stats = {
+        "points": len(points),
+        "detail_requests": fetcher.requested,
+        "unique_places": fetcher.unique
+    }
+    logger.info(
+        f"Grade concluída: {len(place_ids)} lugares em {len(points)} pontos, "
+        f"{stats['unique_places']} chamadas de detalhes para {stats['detail_requests']} perfis"
+    )
+    
+    return GridResult(
+        keyword=keyword,
+        points=points,
+        ranks=rank_frame,
+        summary=summary,
+        frames=frames,
+        distances=distances,
+        stats=stats
+    )
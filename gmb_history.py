@@ -0,0 +1,413 @@
+"""
+Histórico de ranqueamento (SQLite)
+Guarda cada execução como um lote de snapshots completos de ProfileMetrics,
+apenas com inserções, e responde consultas de monitoramento (série de
+posições, variação entre execuções, maiores altas e quedas) por índices em
+vez de reler arquivos JSON inteiros
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import pandas as pd
+
+from gmb_ranking_analyzer import ProfileMetrics, metrics_to_dataframe
+from gmb_results import COLUMNS, FLOAT_COLUMNS, INT_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+DateLike = Union[str, date, datetime]
+
+DEFAULT_SERIES_COLUMNS = ("rank_position", "overall_strength_score", "rating", "total_reviews")
+
+
+def _sql_type(column: str) -> str:
+    if column in INT_COLUMNS:
+        return "INTEGER"
+    if column in FLOAT_COLUMNS:
+        return "REAL"
+    return "TEXT"
+
+
+def _as_date_string(value: DateLike) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+class HistoryStore:
+    """
+    Histórico de execuções em SQLite
+    
+    - `record` grava uma execução inteira em uma única transação
+      (executemany), sem reescrever nada do que já existe
+    - snapshots indexados por (place_id, keyword, location, analysis_date)
+      e por (run_id, place_id), então séries e comparações entre execuções
+      não varrem a tabela
+    - modo WAL, como o PlaceDetailsCache: leituras não bloqueiam a gravação
+    
+    Exemplo:
+        history = HistoryStore("gmb_history.sqlite")
+        history.record(df, keyword="padaria", location="-23.55052,-46.633308")
+        
+        history.rank_series("ChIJ...", keyword="padaria", days=90)
+        history.deltas(place_id="ChIJ...", keyword="padaria")
+        history.top_movers("padaria", "-23.55052,-46.633308", limit=10)
+    """
+    
+    def __init__(self, path: str = "gmb_history.sqlite"):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+    
+    @classmethod
+    def from_config(cls, config: Dict) -> Optional["HistoryStore"]:
+        """Cria o histórico a partir da seção reports.history do config.yaml"""
+        settings = config.get("reports", {}).get("history", {})
+        if not settings.get("enabled", False):
+            return None
+        return cls(settings.get("path", "gmb_history.sqlite"))
+    
+    def _create_schema(self) -> None:
+        metric_columns = ",\n".join(f" {column} {_sql_type(column)}" for column in COLUMNS)
+        self._conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                keyword TEXT NOT NULL,
+                location TEXT NOT NULL,
+                radius INTEGER,
+                analysis_date TEXT NOT NULL,
+                profiles INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_runs_search
+                ON runs (keyword, location, analysis_date);
+            
+            CREATE TABLE IF NOT EXISTS snapshots (
+                run_id INTEGER NOT NULL REFERENCES runs (run_id),
+                keyword TEXT NOT NULL,
+                location TEXT NOT NULL,
+                {metric_columns}
+            );
+            CREATE INDEX IF NOT EXISTS idx_snapshots_place
+                ON snapshots (place_id, keyword, location, analysis_date);
+            CREATE INDEX IF NOT EXISTS idx_snapshots_run
+                ON snapshots (run_id, place_id);
+        """)
+    
+    # ------------------------------------------------------------------
+    # Gravação
+    # ------------------------------------------------------------------
+    
+    def record(
+        self,
+        results: Union[pd.DataFrame, Iterable[ProfileMetrics]],
+        keyword: str,
+        location: str,
+        radius: Optional[int] = None,
+        analysis_date: Optional[DateLike] = None
+    ) -> int:
+        """
+        Grava uma execução (DataFrame de run_analysis ou lista de ProfileMetrics)
+        
+        Args:
+            analysis_date: data da execução (padrão: analysis_date da
+                primeira linha ou agora)
+        
+        Returns:
+            run_id da execução gravada
+        """
+        df = results if isinstance(results, pd.DataFrame) else metrics_to_dataframe(results)
+        
+        if analysis_date is None:
+            if "analysis_date" in df.columns and len(df):
+                analysis_date = df["analysis_date"].iloc[0]
+            else:
+                analysis_date = datetime.now()
+        analysis_date = _as_date_string(analysis_date)
+        
+        frame = df[list(COLUMNS)].assign(analysis_date=analysis_date)
+        rows = _sql_rows(frame)
+        placeholders = ", ".join("?" * (3 + len(COLUMNS)))
+        
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                run_id = conn.execute(
+                    "INSERT INTO runs (keyword, location, radius, analysis_date, profiles, created_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (keyword, location, radius, analysis_date, len(frame), time.time())
+                ).lastrowid
+                conn.executemany(
+                    f"INSERT INTO snapshots (run_id, keyword, location, {', '.join(COLUMNS)})"
+                    f" VALUES ({placeholders})",
+                    ((run_id, keyword, location, *row) for row in rows)
+                )
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+        
+        logger.info(f"Histórico: execução {run_id} gravada ({len(frame)} perfis, '{keyword}' @ {location})")
+        return run_id
+    
+    def record_batch(self, batch) -> List[int]:
+        """Grava cada job de um BatchResult (run_batch) como uma execução"""
+        return [
+            self.record(batch.frames[job], job.keyword, job.location, radius=job.radius)
+            for job in batch.jobs
+        ]
+    
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+    
+    def _query(self, sql: str, params: Sequence = ()) -> pd.DataFrame:
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            columns = [description[0] for description in cursor.description]
+            rows = cursor.fetchall()
+        return pd.DataFrame.from_records(rows, columns=columns)
+    
+    def runs(self, keyword: Optional[str] = None, location: Optional[str] = None) -> pd.DataFrame:
+        """Execuções gravadas, da mais antiga para a mais recente"""
+        where, params = _where(keyword=keyword, location=location)
+        return self._query(
+            f"SELECT run_id, keyword, location, radius, analysis_date, profiles FROM runs{where}"
+            " ORDER BY analysis_date, run_id",
+            params
+        )
+    
+    def rank_series(
+        self,
+        place_id: str,
+        keyword: Optional[str] = None,
+        location: Optional[str] = None,
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None,
+        days: Optional[int] = None,
+        columns: Sequence[str] = DEFAULT_SERIES_COLUMNS
+    ) -> pd.DataFrame:
+        """
+        Série temporal de um lugar (uma linha por execução em que apareceu)
+        
+        Args:
+            start, end: intervalo inclusivo de datas
+            days: atalho para start = hoje - days
+            columns: métricas de ProfileMetrics a retornar
+        """
+        _check_columns(columns)
+        if days is not None:
+            start = date.today() - timedelta(days=days)
+        
+        where, params = _where(
+            place_id=place_id, keyword=keyword, location=location, start=start, end=end
+        )
+        return self._query(
+            f"SELECT analysis_date, keyword, location, run_id, {', '.join(columns)}"
+            f" FROM snapshots{where} ORDER BY analysis_date, run_id",
+            params
+        )
+    
+    def deltas(
+        self,
+        place_id: Optional[str] = None,
+        keyword: Optional[str] = None,
+        location: Optional[str] = None,
+        start: Optional[DateLike] = None,
+        days: Optional[int] = None
+    ) -> pd.DataFrame:
+        """
+        Variação de cada lugar entre execuções consecutivas da mesma busca
+        
+        rank_change = posição anterior - posição atual (positivo = subiu).
+        A primeira execução de cada lugar não tem anterior (NaN).
+        """
+        if days is not None:
+            start = date.today() - timedelta(days=days)
+        where, params = _where(place_id=place_id, keyword=keyword, location=location)
+        
+        sql = f"""
+            SELECT * FROM (
+                SELECT
+                    place_id, name, keyword, location, analysis_date, run_id,
+                    rank_position,
+                    LAG(rank_position) OVER w AS previous_rank,
+                    LAG(rank_position) OVER w - rank_position AS rank_change,
+                    overall_strength_score
+                        - LAG(overall_strength_score) OVER w AS score_change,
+                    total_reviews - LAG(total_reviews) OVER w AS reviews_change,
+                    rating - LAG(rating) OVER w AS rating_change
+                FROM snapshots{where}
+                WINDOW w AS (
+                    PARTITION BY place_id, keyword, location
+                    ORDER BY analysis_date, run_id
+                )
+            )
+        """
+        if start is not None:
+            sql += " WHERE analysis_date >= ?"
+            params.append(_as_date_string(start))
+        return self._query(sql + " ORDER BY place_id, keyword, location, analysis_date, run_id", params)
+    
+    def latest_place_ids(self, keyword: str, location: str) -> List[str]:
+        """place_ids da última execução da busca, em ordem de posição (usado por gmb_planner)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT place_id FROM snapshots WHERE run_id = ("
+                " SELECT run_id FROM runs WHERE keyword = ? AND location = ?"
+                " ORDER BY analysis_date DESC, run_id DESC LIMIT 1"
+                ") ORDER BY rank_position",
+                (keyword, location)
+            ).fetchall()
+        return [row[0] for row in rows]
+    
+    def latest_change(self, place_id: str, keyword: str, location: str) -> Optional[Dict]:
+        """Última variação de um lugar (None se houver menos de duas execuções)"""
+        rows = self._query(
+            "SELECT run_id, analysis_date, rank_position, overall_strength_score,"
+            " total_reviews, rating FROM snapshots"
+            " WHERE place_id = ? AND keyword = ? AND location = ?"
+            " ORDER BY analysis_date DESC, run_id DESC LIMIT 2",
+            (place_id, keyword, location)
+        )
+        if len(rows) < 2:
+            return None
+        
+        current, previous = rows.iloc[0], rows.iloc[1]
+        return {
+            "analysis_date": current["analysis_date"],
+            "previous_date": previous["analysis_date"],
+            "rank_position": int(current["rank_position"]),
+            "previous_rank": int(previous["rank_position"]),
+            "rank_change": int(previous["rank_position"] - current["rank_position"]),
+            "score_change": float(current["overall_strength_score"] - previous["overall_strength_score"]),
+            "reviews_change": int(current["total_reviews"] - previous["total_reviews"]),
+        }
+    
+    def top_movers(
+        self,
+        keyword: str,
+        location: str,
+        limit: int = 10,
+        since: Optional[DateLike] = None,
+        direction: str = "both"
+    ) -> pd.DataFrame:
+        """
+        Lugares que mais mudaram de posição entre duas execuções da busca
+        
+        Compara a execução mais recente com a anterior (ou com a última
+        execução até `since`). Só entram lugares presentes nas duas.
+        
+        Args:
+            direction: "up" (maiores altas), "down" (maiores quedas) ou "both"
+        """
+        runs = self.runs(keyword, location)
+        if len(runs) < 2:
+            return pd.DataFrame(columns=[
+                "place_id", "name", "previous_rank", "rank_position", "rank_change", "score_change"
+            ])
+        
+        current_run = int(runs["run_id"].iloc[-1])
+        if since is None:
+            previous_run = int(runs["run_id"].iloc[-2])
+        else:
+            earlier = runs[runs["analysis_date"] <= _as_date_string(since)]
+            previous_run = int(earlier["run_id"].iloc[-1] if len(earlier) else runs["run_id"].iloc[0])
+        
+        order = {
+            "up": "rank_change DESC",
+            "down": "rank_change ASC",
+            "both": "ABS(rank_change) DESC",
+        }
+        if direction not in order:
+            raise ValueError(f"direction inválido: {direction} (use up, down ou both)")
+        
+        movers = self._query(
+            "SELECT cur.place_id, cur.name, prev.rank_position AS previous_rank,"
+            " cur.rank_position, prev.rank_position - cur.rank_position AS rank_change,"
+            " cur.overall_strength_score - prev.overall_strength_score AS score_change"
+            " FROM snapshots cur JOIN snapshots prev"
+            " ON prev.run_id = ? AND prev.place_id = cur.place_id"
+            " WHERE cur.run_id = ?"
+            f" ORDER BY {order[direction]}, cur.rank_position LIMIT ?",
+            (previous_run, current_run, limit)
+        )
+        if direction == "up":
+            movers = movers[movers["rank_change"] > 0]
+        elif direction == "down":
+            movers = movers[movers["rank_change"] < 0]
+        return movers.reset_index(drop=True)
+    
+    def __len__(self) -> int:
+        """Número de snapshots gravados"""
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM snapshots").fetchone()
+        return count
+    
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+    
+    def __enter__(self) -> "HistoryStore":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def _sql_rows(frame: pd.DataFrame) -> Iterable[tuple]:
+    """Linhas com tipos nativos do Python (NaN vira NULL)"""
+    columns = []
+    for column in frame.columns:
+        series = frame[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.astype(object)
+        values = series.tolist()
+        if series.dtype.kind in "fO":
+            values = [None if value != value else value for value in values]
+        columns.append(values)
+    return zip(*columns)
+
+
+def _check_columns(columns: Sequence[str]) -> None:
+    unknown = set(columns) - set(COLUMNS)
+    if unknown:
+        raise ValueError(f"Colunas desconhecidas: {', '.join(sorted(unknown))}")
+
+
+def _where(
+    place_id: Optional[str] = None,
+    keyword: Optional[str] = None,
+    location: Optional[str] = None,
+    start: Optional[DateLike] = None,
+    end: Optional[DateLike] = None
+):
+    """Cláusula WHERE (na ordem do índice) e parâmetros"""
+    conditions, params = [], []
+    for column, value in (("place_id", place_id), ("keyword", keyword), ("location", location)):
+        if value is not None:
+            conditions.append(f"{column} = ?")
+            params.append(value)
+    if start is not None:
+        conditions.append("analysis_date >= ?")
+        params.append(_as_date_string(start))
+    if end is not None:
+        # Fim inclusivo: datas sem horário cobrem o dia inteiro
+        end = _as_date_string(end)
+        conditions.append("analysis_date < ?" if len(end) == 10 else "analysis_date <= ?")
+        params.append((date.fromisoformat(end) + timedelta(days=1)).isoformat() if len(end) == 10 else end)
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    return where, params
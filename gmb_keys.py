@@ -0,0 +1,291 @@
+"""
+Pool de chaves da Places API
+Distribui buscas e detalhes entre várias chaves (projetos de faturamento
+diferentes), cada uma com seu token bucket e sua cota diária, e tira de
+circulação por um tempo a chave que recebe OVER_QUERY_LIMIT. A vazão total
+cresce com o número de chaves
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from gmb_ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Status que não indicam problema da chave (contam só como uso)
+NON_ERROR_STATUSES = {"OK", "ZERO_RESULTS", "NOT_FOUND", "INVALID_REQUEST"}
+
+# next_page_tokens lembrados para repetir a chave da primeira página
+MAX_PINNED_TOKENS = 1024
+
+
+class QuotaExhausted(RuntimeError):
+    """Todas as chaves do pool esgotaram a cota diária"""
+
+
+class KeyBenched(RuntimeError):
+    """
+    A chave de um next_page_token está fora do pool (OVER_QUERY_LIMIT)
+    
+    O token só vale na chave da primeira página; `retry_after` diz quantos
+    segundos faltam para ela voltar.
+    """
+    
+    def __init__(self, key_name: str, retry_after: float):
+        super().__init__(
+            f"chave {key_name} fora do pool por mais {retry_after:.1f}s "
+            "(o next_page_token só vale nela)"
+        )
+        self.key_name = key_name
+        self.retry_after = retry_after
+
+
+def _utc_day(now: float) -> str:
+    return time.strftime("%Y-%m-%d", time.gmtime(now))
+
+
+@dataclass
+class ApiKey:
+    """
+    Estado de uma chave do pool
+    
+    `name` identifica a chave em logs, métricas e stats() (padrão: os
+    últimos 4 caracteres); a chave em si nunca é exposta.
+    """
+    key: str
+    name: str = ""
+    qps: Optional[float] = None
+    burst: int = 1
+    daily_quota: Optional[int] = None
+    limiter: Optional[TokenBucket] = field(default=None, repr=False)
+    used_today: int = 0
+    day: str = ""
+    requests: int = 0
+    errors: int = 0
+    statuses: Dict[str, int] = field(default_factory=dict)
+    benched_until: float = 0.0
+    strikes: int = 0
+    
+    def __post_init__(self):
+        if not self.name:
+            self.name = f"…{self.key[-4:]}"
+        if self.limiter is None and self.qps:
+            self.limiter = TokenBucket(self.qps, self.burst)
+    
+    def remaining(self) -> float:
+        """Chamadas restantes hoje (infinito sem daily_quota)"""
+        if self.daily_quota is None:
+            return float("inf")
+        return self.daily_quota - self.used_today
+    
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.requests if self.requests else 0.0
+
+
+class ApiKeyPool:
+    """
+    Escolhe uma chave por requisição
+    
+    Entre as chaves fora do banco de espera e com cota, usa a que libera
+    token mais cedo e, no empate, a com mais cota restante no dia. Uma
+    resposta OVER_QUERY_LIMIT deixa a chave fora por `cooldown` segundos
+    (dobrando a cada repetição seguida, até `max_cooldown`). Páginas
+    seguintes de uma busca (pagetoken) usam a mesma chave da primeira; se
+    ela estiver fora do pool, checkout falha na hora com KeyBenched em vez
+    de esperar o cooldown.
+    
+    Exemplo:
+        pool = ApiKeyPool(["CHAVE_A", "CHAVE_B"], qps=10, daily_quota=50000)
+        analyzer = GoogleMapsRankingAnalyzer(pool, max_workers=16)
+        ...
+        pool.stats()  # uso, erros e espera por chave
+    """
+    
+    def __init__(
+        self,
+        keys: Iterable[Union[str, Dict, ApiKey]],
+        qps: Optional[float] = None,
+        burst: int = 1,
+        daily_quota: Optional[int] = None,
+        cooldown: float = 60.0,
+        max_cooldown: float = 3600.0
+    ):
+        """
+        Args:
+            keys: chaves (str), dicts com key/name/qps/burst/daily_quota ou ApiKey
+            qps/burst/daily_quota: padrão das chaves que não definem os seus
+            cooldown/max_cooldown: segundos fora do pool após OVER_QUERY_LIMIT
+        """
+        self.keys: List[ApiKey] = []
+        for item in keys:
+            if isinstance(item, str):
+                item = {"key": item}
+            if isinstance(item, dict):
+                item = ApiKey(
+                    key=item["key"],
+                    name=item.get("name", ""),
+                    qps=item.get("qps", qps),
+                    burst=item.get("burst", burst),
+                    daily_quota=item.get("daily_quota", daily_quota),
+                )
+            # Nomes repetidos (mesmo sufixo) ganham o índice
+            if any(key.name == item.name for key in self.keys):
+                item.name = f"{item.name}#{len(self.keys) + 1}"
+            self.keys.append(item)
+        if not self.keys:
+            raise ValueError("o pool precisa de pelo menos uma chave")
+        
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._pinned: "OrderedDict[str, ApiKey]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._exhausted = False
+    
+    @classmethod
+    def from_config(cls, api: Dict) -> Optional["ApiKeyPool"]:
+        """Pool da seção api do config.yaml (None sem `keys`)"""
+        keys = api.get("keys")
+        if not keys:
+            return None
+        return cls(
+            keys,
+            qps=api.get("qps"),
+            burst=api.get("burst", 1),
+            daily_quota=api.get("daily_quota"),
+            cooldown=api.get("key_cooldown", 60.0),
+        )
+    
+    def __len__(self) -> int:
+        return len(self.keys)
+    
+    def checkout(self, pagetoken: Optional[str] = None) -> Tuple[ApiKey, float]:
+        """
+        Reserva a próxima chamada sem bloquear
+        
+        Returns:
+            (chave, segundos a esperar antes de usá-la)
+        
+        Raises:
+            QuotaExhausted: nenhuma chave tem cota diária restante
+            KeyBenched: a chave de `pagetoken` está fora do pool
+        """
+        now = time.time()
+        with self._lock:
+            key = self._pinned.get(pagetoken) if pagetoken else None
+            if key is None:
+                key = self._choose(now)
+            else:
+                # O next_page_token só vale na chave da primeira página
+                self._roll_day(key, now)
+                if key.remaining() <= 0:
+                    raise QuotaExhausted(f"cota diária esgotada na chave {key.name}")
+                if key.benched_until > now:
+                    raise KeyBenched(key.name, key.benched_until - now)
+            key.used_today += 1
+            key.requests += 1
+            wait = max(0.0, key.benched_until - now)
+            if key.limiter is not None:
+                wait += key.limiter.reserve()
+        return key, wait
+    
+    def _choose(self, now: float) -> ApiKey:
+        candidates = []
+        for key in self.keys:
+            self._roll_day(key, now)
+            if key.remaining() <= 0:
+                continue
+            wait = max(key.benched_until - now, key.limiter.wait_time() if key.limiter else 0.0)
+            candidates.append((wait, -key.remaining(), key.requests, key))
+        if not candidates:
+            if not self._exhausted:
+                self._exhausted = True
+                logger.warning("Cota diária esgotada em todas as %d chaves do pool", len(self.keys))
+            raise QuotaExhausted("cota diária esgotada em todas as chaves do pool")
+        self._exhausted = False
+        return min(candidates, key=lambda candidate: candidate[:3])[3]
+    
+    @staticmethod
+    def _roll_day(key: ApiKey, now: float) -> None:
+        # A cota diária recomeça à meia-noite UTC
+        day = _utc_day(now)
+        if key.day != day:
+            key.day = day
+            key.used_today = 0
+    
+    def acquire(self, pagetoken: Optional[str] = None) -> ApiKey:
+        """Chave para a próxima chamada, esperando seu token (threads)"""
+        key, wait = self.checkout(pagetoken)
+        if wait > 0:
+            time.sleep(wait)
+        return key
+    
+    async def acquire_async(self, pagetoken: Optional[str] = None) -> ApiKey:
+        """Versão de `acquire` para asyncio"""
+        import asyncio  # Só quem usa asyncio paga a importação
+        
+        key, wait = self.checkout(pagetoken)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return key
+    
+    def record(self, key: ApiKey, status: str, next_page_token: Optional[str] = None) -> None:
+        """
+        Registra o resultado de uma chamada feita com `key`
+        
+        `status` é o status da API ou o código HTTP/"error" quando não
+        houve payload. OVER_QUERY_LIMIT tira a chave do pool por um tempo.
+        """
+        with self._lock:
+            key.statuses[status] = key.statuses.get(status, 0) + 1
+            if status not in NON_ERROR_STATUSES:
+                key.errors += 1
+            
+            if status == "OVER_QUERY_LIMIT":
+                key.strikes += 1
+                bench = min(self.max_cooldown, self.cooldown * 2 ** (key.strikes - 1))
+                key.benched_until = time.time() + bench
+            elif status in NON_ERROR_STATUSES:
+                key.strikes = 0
+            
+            if next_page_token:
+                self._pinned[next_page_token] = key
+                while len(self._pinned) > MAX_PINNED_TOKENS:
+                    self._pinned.popitem(last=False)
+    
+    def stats(self) -> Dict[str, Dict]:
+        """Uso, cota restante, taxa de erro e espera de cada chave (por nome)"""
+        now = time.time()
+        with self._lock:
+            for key in self.keys:
+                self._roll_day(key, now)
+            return {
+                key.name: {
+                    "requests": key.requests,
+                    "used_today": key.used_today,
+                    "remaining": key.remaining() if key.daily_quota is not None else None,
+                    "errors": key.errors,
+                    "error_rate": round(key.error_rate, 4),
+                    "statuses": dict(key.statuses),
+                    "benched_for": round(max(0.0, key.benched_until - now), 1),
+                }
+                for key in self.keys
+            }
+
+
+def as_key_pool(
+    api_key: Union[str, Iterable[Union[str, Dict]], ApiKeyPool],
+    qps: Optional[float] = None,
+    burst: int = 1
+) -> Optional[ApiKeyPool]:
+    """Pool para o `api_key` dos analisadores (None para uma chave única em str)"""
+    if isinstance(api_key, str):
+        return None
+    if isinstance(api_key, ApiKeyPool):
+        return api_key
+    return ApiKeyPool(api_key, qps=qps, burst=burst)
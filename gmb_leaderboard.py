@@ -0,0 +1,77 @@
+"""
+Etapa de ranqueamento vetorizada para DataFrames de `run_analysis`
+Calcula percentil, gap para o líder e posição por score em O(n log n),
+no conjunto todo ou dentro de grupos (palavra-chave, cidade, categoria...)
+"""
+
+from typing import List, Optional, Union
+
+import pandas as pd
+
+from gmb_scoring import round_exact
+
+
+def rank_profiles(
+    df: pd.DataFrame,
+    group_by: Optional[Union[str, List[str]]] = None,
+    score_column: str = "overall_strength_score",
+    suffix: str = ""
+) -> pd.DataFrame:
+    """
+    Recalcula as métricas comparativas de um leaderboard
+    
+    Gera (com `suffix` opcional no nome):
+        percentile_rank: % de perfis do grupo com score <= ao do perfil
+        gap_to_leader: diferença para o maior score do grupo
+        score_rank: posição pelo score (1 = maior; empates dividem a posição;
+            Int64, vazio para score ausente)
+    
+    Os valores são idênticos aos de `run_analysis` para um único mercado.
+    
+    Args:
+        df: DataFrame produzido por run_analysis (ou a concatenação de vários)
+        group_by: coluna(s) para ranquear separadamente, ex. "keyword"
+        score_column: coluna usada como score
+        suffix: sufixo das colunas geradas, ex. "_keyword" para manter
+            também as métricas globais
+    
+    Returns:
+        Cópia do DataFrame com as colunas adicionadas/atualizadas
+    """
+    result = df.copy()
+    
+    if result.empty:
+        for column in ("percentile_rank", "gap_to_leader"):
+            result[column + suffix] = pd.Series(dtype="float64")
+        result["score_rank" + suffix] = pd.Series(dtype="Int64")
+        return result
+    
+    scores = result[score_column]
+    
+    if group_by is None:
+        grouped = scores
+        leader = scores.max()
+        size = len(scores)
+    else:
+        # dropna=False: chave ausente (None/NaN) forma um grupo próprio
+        grouped = scores.groupby(
+            [result[col] for col in _as_list(group_by)], sort=False, observed=True, dropna=False
+        )
+        leader = grouped.transform("max")
+        size = grouped.transform("size")
+    
+    # rank "max" = quantidade de scores <= score do perfil
+    count_le = grouped.rank(method="max")
+    percentile = (count_le / size) * 100
+    
+    result["percentile_rank" + suffix] = round_exact(percentile.to_numpy(), 1)
+    result["gap_to_leader" + suffix] = round_exact((leader - scores).to_numpy(), 2)
+    result["score_rank" + suffix] = (
+        grouped.rank(method="min", ascending=False).astype("Int64")
+    )
+    
+    return result
+
+
+def _as_list(columns: Union[str, List[str]]) -> List[str]:
+    return [columns] if isinstance(columns, str) else list(columns)
@@ -0,0 +1,197 @@
+"""
+Logging estruturado e não bloqueante
+Em modo fila, os handlers (arquivo, console) rodam numa thread de fundo
+(QueueListener): as threads de detalhes e o loop asyncio só enfileiram o
+registro. JsonFormatter grava uma linha JSON por registro com run_id,
+keyword e place_id, e ProgressLog agrega o progresso por perfil para que o
+volume de log não cresça com a concorrência
+"""
+
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional
+
+if TYPE_CHECKING:
+    from logging.handlers import QueueListener
+
+# Campos de contexto copiados para cada registro (logging.LogRecord)
+CONTEXT_FIELDS = ("run_id", "keyword", "place_id")
+
+_context: ContextVar[Dict[str, str]] = ContextVar("gmb_log_context", default={})
+
+
+def new_run_id() -> str:
+    return os.urandom(6).hex()
+
+
+def current_context() -> Dict[str, str]:
+    return _context.get()
+
+
+@contextmanager
+def log_context(**fields) -> Iterator[Dict[str, str]]:
+    """
+    Acrescenta campos (run_id, keyword, ...) aos registros emitidos no bloco
+    
+    Vale para a thread atual e para as tasks asyncio criadas dentro dele;
+    para um ThreadPoolExecutor, submeter via contextvars.copy_context().run.
+    
+    Exemplo:
+        with log_context(run_id=new_run_id(), keyword="padaria"):
+            logger.info("...")  # registro com run_id e keyword
+    """
+    merged = {**_context.get(), **{key: str(value) for key, value in fields.items() if value is not None}}
+    token = _context.set(merged)
+    try:
+        yield merged
+    finally:
+        try:
+            _context.reset(token)
+        except ValueError:
+            # Gerador finalizado em outro contexto (ex. coletado pelo GC)
+            pass
+
+
+class ContextFilter(logging.Filter):
+    """Copia o contexto atual para o registro (sem sobrescrever `extra`)"""
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        for key, value in _context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Uma linha JSON por registro: ts, level, logger, message e os campos de contexto"""
+    
+    def __init__(self, fields: tuple = CONTEXT_FIELDS):
+        super().__init__()
+        self.fields = fields
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key in self.fields:
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+_listener: Optional["QueueListener"] = None
+_listener_lock = threading.Lock()
+
+
+def start_queue_listener(handlers: List[logging.Handler]) -> logging.Handler:
+    """
+    Move `handlers` para uma thread de fundo
+    
+    Returns:
+        O QueueHandler a instalar no logger raiz no lugar dos handlers
+    """
+    global _listener
+    
+    # logging.handlers só é importado por quem usa o modo fila
+    from logging.handlers import QueueHandler, QueueListener
+    
+    class ContextQueueHandler(QueueHandler):
+        """QueueHandler que não formata a mensagem na thread que emite"""
+        
+        def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+            # Só resolve msg % args (os args podem mudar até o listener ler);
+            # data, JSON e traceback ficam para a thread do listener
+            record = copy.copy(record)
+            record.msg = record.getMessage()
+            record.args = None
+            if record.exc_info:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+                record.exc_info = None
+            return record
+    
+    stop_queue_listener()
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    with _listener_lock:
+        _listener = listener
+    return ContextQueueHandler(log_queue)
+
+
+def stop_queue_listener() -> None:
+    """Esvazia a fila e encerra a thread de fundo (chamado também no atexit)"""
+    global _listener
+    
+    with _listener_lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+atexit.register(stop_queue_listener)
+
+
+class ProgressLog:
+    """
+    Progresso agregado de uma etapa por perfil
+    
+    Cada perfil vira uma linha DEBUG (só formatada se DEBUG estiver
+    ativo); em INFO sai no máximo uma linha a cada `interval` segundos e a
+    linha final, qualquer que seja a concorrência.
+    
+    Exemplo:
+        progress = ProgressLog(logger, total, "Analisando")
+        for place in places:
+            progress.step(place.get("name"), place_id=place.get("place_id"))
+        progress.done()
+    """
+    
+    def __init__(self, logger: logging.Logger, total: int, label: str = "Analisando", interval: float = 5.0):
+        self.logger = logger
+        self.total = total
+        self.label = label
+        self.interval = interval
+        self.count = 0
+        self.start = self._last = time.monotonic()
+        self._debug = logger.isEnabledFor(logging.DEBUG)
+        self._info = logger.isEnabledFor(logging.INFO)
+    
+    def step(self, name: Optional[str] = None, place_id: Optional[str] = None) -> None:
+        self.count += 1
+        if self._debug:
+            self.logger.debug(
+                "%s %d/%d: %s", self.label, self.count, self.total, name,
+                extra={"place_id": place_id}
+            )
+        if self._info and self.count < self.total:
+            now = time.monotonic()
+            if now - self._last >= self.interval:
+                self._last = now
+                self.logger.info(
+                    "%s %d/%d perfis (%.1f perfis/s)",
+                    self.label, self.count, self.total, self.count / (now - self.start)
+                )
+    
+    def done(self) -> None:
+        if self._info:
+            elapsed = time.monotonic() - self.start
+            self.logger.info("%s: %d perfis em %.2fs", self.label, self.count, elapsed)
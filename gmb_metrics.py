@@ -0,0 +1,235 @@
+"""
+Métricas de execução (contadores e histogramas de latência)
+Registro em memória, thread-safe, com snapshot em dicionário (stats()) e
+exportação no formato texto do Prometheus, opcionalmente servida por HTTP
+para coletores de workers de longa duração
+"""
+
+import math
+import threading
+from bisect import bisect_left
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, Iterator, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+# Limites (segundos) dos buckets de latência
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Métricas registradas pelos analisadores e por generate_reports
+API_REQUESTS = "gmb_api_requests_total"
+API_LATENCY = "gmb_api_request_seconds"
+API_RETRIES = "gmb_api_retries_total"
+API_BYTES = "gmb_api_response_bytes_total"
+API_KEY_REQUESTS = "gmb_api_key_requests_total"
+DETAILS = "gmb_details_total"
+PHASE_SECONDS = "gmb_phase_seconds"
+PROFILES = "gmb_profiles_analyzed_total"
+
+HELP = {
+    API_REQUESTS: "Requisições à Places API por endpoint e status",
+    API_LATENCY: "Latência de cada requisição à Places API",
+    API_RETRIES: "Novas tentativas após erro transitório",
+    API_BYTES: "Bytes recebidos da Places API",
+    API_KEY_REQUESTS: "Requisições por chave do pool (gmb_keys.ApiKeyPool) e status",
+    DETAILS: "Origem dos detalhes (memory_hit, disk_hit, miss, reused, changed, coalesced, fetched)",
+    PHASE_SECONDS: "Duração de cada fase (search, details, scoring, percentiles, report)",
+    PROFILES: "Perfis pontuados",
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _label_text(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(key) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in items) + "}"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Histogram:
+    __slots__ = ("counts", "count", "sum", "max")
+    
+    def __init__(self, buckets: int):
+        self.counts = [0] * buckets
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+
+class MetricsRegistry:
+    """
+    Contadores e histogramas com labels
+    
+    Exemplo:
+        metrics = MetricsRegistry()
+        metrics.inc("gmb_api_requests_total", endpoint="details", status="OK")
+        with metrics.time("gmb_phase_seconds", phase="search"):
+            ...
+        metrics.snapshot()       # dicionário
+        metrics.to_prometheus()  # texto para /metrics
+    """
+    
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+    
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """Soma `value` ao contador"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+    
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Registra uma observação (segundos) no histograma"""
+        key = _label_key(labels)
+        # Primeiro bucket com limite >= value (os demais são acumulados na exportação)
+        index = bisect_left(self.buckets, value)
+        
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(len(self.buckets) + 1)
+            histogram.counts[index] += 1
+            histogram.count += 1
+            histogram.sum += value
+            if value > histogram.max:
+                histogram.max = value
+    
+    @contextmanager
+    def time(self, name: str, **labels) -> Iterator[None]:
+        """Mede o bloco e registra a duração no histograma `name`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+    
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+    
+    def snapshot(self) -> Dict[str, Dict]:
+        """
+        Cópia dos valores atuais
+        
+        Returns:
+            {"counters": {nome: {"label=valor,...": total}},
+             "histograms": {nome: {"label=valor,...": {count, sum, mean, max, buckets}}}}
+        """
+        def label_string(key: LabelKey) -> str:
+            return ",".join(f"{name}={value}" for name, value in key)
+        
+        with self._lock:
+            counters = {
+                name: {label_string(key): value for key, value in series.items()}
+                for name, series in self._counters.items()
+            }
+            histograms = {}
+            for name, series in self._histograms.items():
+                histograms[name] = {}
+                for key, histogram in series.items():
+                    cumulative, buckets = 0, {}
+                    for bound, count in zip(self.buckets + (math.inf,), histogram.counts):
+                        cumulative += count
+                        buckets[bound] = cumulative
+                    histograms[name][label_string(key)] = {
+                        "count": histogram.count,
+                        "sum": histogram.sum,
+                        "mean": histogram.sum / histogram.count if histogram.count else 0.0,
+                        "max": histogram.max,
+                        "buckets": buckets,
+                    }
+        return {"counters": counters, "histograms": histograms}
+    
+    def to_prometheus(self) -> str:
+        """Todas as métricas no formato de exposição texto do Prometheus (0.0.4)"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                if name in HELP:
+                    lines.append(f"# HELP {name} {HELP[name]}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{_label_text(key)} {_format_value(value)}")
+            
+            for name, series in sorted(self._histograms.items()):
+                if name in HELP:
+                    lines.append(f"# HELP {name} {HELP[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(self.buckets + (math.inf,), histogram.counts):
+                        cumulative += count
+                        le = ("le", _format_value(bound))
+                        lines.append(f"{name}_bucket{_label_text(key, le)} {cumulative}")
+                    lines.append(f"{name}_sum{_label_text(key)} {_format_value(histogram.sum)}")
+                    lines.append(f"{name}_count{_label_text(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+# Registro padrão do processo (usado quando nenhum é informado)
+DEFAULT_REGISTRY = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    return DEFAULT_REGISTRY
+
+
+def start_http_server(
+    port: int = 9464,
+    host: str = "0.0.0.0",
+    registry: Optional[MetricsRegistry] = None
+) -> "ThreadingHTTPServer":
+    """
+    Serve GET /metrics em uma thread daemon para o Prometheus coletar
+    
+    Returns:
+        O servidor (server.shutdown() para parar)
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    registry = registry or DEFAULT_REGISTRY
+    
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = registry.to_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, format, *args):
+            pass
+    
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="gmb-metrics", daemon=True).start()
+    return server
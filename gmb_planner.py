@@ -0,0 +1,430 @@
+"""
+Planejamento de custo e orçamento de chamadas à Places API
+plan_jobs estima, antes de executar, quantas chamadas de busca e de
+detalhes um conjunto de jobs fará e o custo faturado, usando o histórico
+(lugares da última execução de cada busca), a sobreposição entre jobs e
+o cache de detalhes. CallBudget limita as chamadas por execução e por dia
+durante a execução: esgotado o orçamento, o analisador pontua só com os
+dados da busca ou encerra com resultados parciais, sem falhar no meio
+"""
+
+import logging
+import math
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+from gmb_fields import billing_skus, fields_of
+
+logger = logging.getLogger(__name__)
+
+# Status devolvido no lugar da resposta quando o orçamento recusa a chamada
+BUDGET_EXCEEDED = "BUDGET_EXCEEDED"
+
+# Resultados por página da nearbysearch
+PAGE_SIZE = 20
+
+# Preço de tabela (USD por 1000 chamadas) da Places API; a chamada de
+# detalhes paga o SKU básico mais contact/atmosphere se pedir esses campos
+DEFAULT_PRICES = {
+    "nearbysearch": 32.0,
+    "basic": 17.0,
+    "contact": 3.0,
+    "atmosphere": 5.0,
+}
+
+BUDGET_MODES = ("degrade", "stop")
+
+
+class CallBudget:
+    """
+    Orçamento de chamadas à API verificado antes de cada requisição
+    
+    - max_run_calls: chamadas por execução (iter_analysis, run_batch ou
+      run_grid; execuções aninhadas contam juntas na mais externa)
+    - max_daily_calls: chamadas no dia (UTC); com `state_path`, a contagem
+      é compartilhada entre execuções e processos por um banco SQLite: a
+      cada FLUSH_EVERY chamadas e ao fim de cada execução as chamadas novas
+      são somadas ao total do dia (sem sobrescrever as de outro processo)
+    - on_exhausted="degrade": detalhes param quando o restante chega às
+      páginas seguintes ainda esperadas (hold_pages) mais `search_reserve`;
+      os perfis são pontuados só com os dados da busca e a paginação continua
+    - on_exhausted="stop": a primeira recusa encerra a execução; perfis sem
+      detalhes ficam de fora e o resultado é parcial
+    
+    Exemplo:
+        budget = CallBudget(max_run_calls=500, max_daily_calls=20000,
+                            state_path="gmb_budget.sqlite")
+        analyzer = GoogleMapsRankingAnalyzer(API_KEY, budget=budget)
+    """
+    
+    # Gravações do estado diário: a cada N chamadas e ao fim da execução
+    FLUSH_EVERY = 20
+    
+    def __init__(
+        self,
+        max_run_calls: Optional[int] = None,
+        max_daily_calls: Optional[int] = None,
+        on_exhausted: str = "degrade",
+        search_reserve: int = 0,
+        state_path: Optional[Union[str, Path]] = None
+    ):
+        if on_exhausted not in BUDGET_MODES:
+            raise ValueError(f"on_exhausted deve ser um de {BUDGET_MODES}")
+        
+        self.max_run_calls = max_run_calls
+        self.max_daily_calls = max_daily_calls
+        self.on_exhausted = on_exhausted
+        self.search_reserve = max(0, search_reserve)
+        self.state_path = Path(state_path) if state_path else None
+        self.run_calls = 0
+        self.refused: Dict[str, int] = {}
+        self.stopped = False
+        self.held_pages = 0
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self._depth = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_lock = threading.Lock()
+        
+        self.day, self.daily_calls = _utc_day(), 0
+        if self.state_path is not None:
+            self._load()
+    
+    @classmethod
+    def from_config(cls, config: Dict) -> Optional["CallBudget"]:
+        """Orçamento da seção budget do config.yaml (None se desativado)"""
+        settings = config.get("budget", {})
+        if not settings.get("enabled", False):
+            return None
+        return cls(
+            max_run_calls=settings.get("max_run_calls"),
+            max_daily_calls=settings.get("max_daily_calls"),
+            on_exhausted=settings.get("on_exhausted", "degrade"),
+            search_reserve=settings.get("search_reserve", 0),
+            state_path=settings.get("state_file", "gmb_budget.sqlite"),
+        )
+    
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(
+                self.state_path, timeout=30, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS budget_days ("
+                " day TEXT PRIMARY KEY,"
+                " calls INTEGER NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+    
+    def _load(self) -> None:
+        with self._conn_lock:
+            row = self._connect().execute(
+                "SELECT calls FROM budget_days WHERE day = ?", (self.day,)
+            ).fetchone()
+        if row is not None:
+            self.daily_calls = row[0]
+    
+    def save(self) -> None:
+        """
+        Soma as chamadas ainda não gravadas ao total do dia em `state_path`
+        
+        A soma é atômica no banco, então processos que gravam ao mesmo tempo
+        não perdem as chamadas uns dos outros; `daily_calls` passa a
+        incluir as chamadas deles.
+        """
+        if self.state_path is None:
+            return
+        with self._lock:
+            day, unsaved = self.day, self._unsaved
+            self._unsaved = 0
+        
+        with self._conn_lock:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute(
+                    "INSERT INTO budget_days (day, calls) VALUES (?, ?)"
+                    " ON CONFLICT(day) DO UPDATE SET calls = calls + excluded.calls",
+                    (day, unsaved)
+                )
+                conn.execute("DELETE FROM budget_days WHERE day < ?", (day,))
+                total = conn.execute(
+                    "SELECT calls FROM budget_days WHERE day = ?", (day,)
+                ).fetchone()[0]
+                conn.execute("COMMIT")
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                # Ficam pendentes para a próxima gravação
+                with self._lock:
+                    if self.day == day:
+                        self._unsaved += unsaved
+                raise
+        
+        with self._lock:
+            if self.day == day:
+                # Chamadas feitas durante a gravação continuam pendentes
+                self.daily_calls = total + self._unsaved
+    
+    def remaining(self) -> float:
+        """Chamadas que ainda cabem no menor dos dois limites"""
+        with self._lock:
+            return self._remaining()
+    
+    def _remaining(self) -> float:
+        day = _utc_day()
+        if day != self.day:
+            self.day, self.daily_calls, self._unsaved = day, 0, 0
+        limits = [math.inf]
+        if self.max_run_calls is not None:
+            limits.append(self.max_run_calls - self.run_calls)
+        if self.max_daily_calls is not None:
+            limits.append(self.max_daily_calls - self.daily_calls)
+        return min(limits)
+    
+    def allow(self, endpoint: str) -> bool:
+        """
+        Reserva uma chamada a `endpoint` ("nearbysearch" ou "details")
+        
+        Returns:
+            False se o orçamento recusar; a chamada não deve ser feita
+        """
+        with self._lock:
+            remaining = self._remaining()
+            floor = self.search_reserve + self.held_pages if endpoint == "details" else 0
+            if self.stopped or remaining <= floor:
+                if not self.stopped and not self.refused:
+                    logger.warning(
+                        f"Orçamento de chamadas esgotado ({endpoint}); "
+                        + ("pontuando só com dados da busca" if self.on_exhausted == "degrade"
+                           else "encerrando com resultados parciais")
+                    )
+                self.refused[endpoint] = self.refused.get(endpoint, 0) + 1
+                if self.on_exhausted == "stop":
+                    self.stopped = True
+                return False
+            
+            self.run_calls += 1
+            self.daily_calls += 1
+            self._unsaved += 1
+            flush = self.state_path is not None and self._unsaved >= self.FLUSH_EVERY
+        if flush:
+            self.save()
+        return True
+    
+    def reset_run(self) -> None:
+        """Recomeça a contagem por execução (o limite diário continua)"""
+        with self._lock:
+            self.run_calls = 0
+            self.held_pages = 0
+            self.refused.clear()
+            self.stopped = False
+    
+    @contextmanager
+    def run(self) -> Iterator["CallBudget"]:
+        """
+        Escopo de uma execução: a mais externa zera a contagem por execução
+        ao entrar e grava o estado diário ao sair
+        
+        Execuções simultâneas no mesmo orçamento (threads) compartilham o
+        escopo da que entrou primeiro.
+        """
+        with self._lock:
+            self._depth += 1
+            outermost = self._depth == 1
+        if outermost:
+            self.reset_run()
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._depth -= 1
+                outermost = self._depth == 0
+            if outermost:
+                self.save()
+    
+    def hold_pages(self, count: int) -> int:
+        """
+        Guarda `count` chamadas para as páginas seguintes de uma busca
+        
+        No modo degrade, detalhes não consomem as chamadas guardadas; a
+        busca devolve cada uma com release_pages ao pedir a página (ou ao
+        terminar sem ela).
+        
+        Returns:
+            Chamadas efetivamente guardadas (0 no modo stop)
+        """
+        if self.on_exhausted != "degrade" or count <= 0:
+            return 0
+        with self._lock:
+            self.held_pages += count
+        return count
+    
+    def release_pages(self, count: int) -> None:
+        if count > 0:
+            with self._lock:
+                self.held_pages = max(0, self.held_pages - count)
+    
+    def skips(self, details: Dict) -> bool:
+        """Se o perfil com estes detalhes fica fora do resultado (modo stop)"""
+        return self.on_exhausted == "stop" and details.get("status") == BUDGET_EXCEEDED
+    
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            remaining = self._remaining()
+            return {
+                "run_calls": self.run_calls,
+                "daily_calls": self.daily_calls,
+                "remaining": None if math.isinf(remaining) else max(0, remaining),
+                "refused": dict(self.refused),
+                "stopped": self.stopped,
+                "held_pages": self.held_pages,
+            }
+
+
+def _utc_day() -> str:
+    return time.strftime("%Y-%m-%d", time.gmtime())
+
+
+@dataclass
+class JobPlan:
+    """Estimativa de um job"""
+    job: object
+    search_calls: int
+    results: int
+    known_places: int = 0
+
+
+@dataclass
+class RunPlan:
+    """
+    Estimativa de chamadas e custo de um conjunto de jobs
+    
+    detail_calls já desconta lugares repetidos entre jobs (`shared`) e os
+    que estão no cache com os campos necessários (`cached`).
+    Retries e consultas ao next_page_token antes de ele ficar válido não
+    entram na conta.
+    """
+    jobs: List[JobPlan]
+    search_calls: int
+    detail_calls: int
+    detail_results: int
+    shared: int
+    cached: int
+    detail_skus: List[str]
+    cost: float
+    prices: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_PRICES))
+    
+    @property
+    def total_calls(self) -> int:
+        return self.search_calls + self.detail_calls
+    
+    def fits(self, budget: CallBudget) -> bool:
+        """Se a execução cabe no restante do orçamento"""
+        return self.total_calls <= budget.remaining()
+    
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "jobs": len(self.jobs),
+            "search_calls": self.search_calls,
+            "detail_calls": self.detail_calls,
+            "detail_results": self.detail_results,
+            "shared": self.shared,
+            "cached": self.cached,
+            "detail_skus": self.detail_skus,
+            "total_calls": self.total_calls,
+            "cost_usd": round(self.cost, 2),
+        }
+    
+    def summary(self) -> str:
+        return (
+            f"{len(self.jobs)} jobs: {self.search_calls} buscas + {self.detail_calls} detalhes "
+            f"({self.detail_results} resultados, {self.shared} repetidos entre jobs, "
+            f"{self.cached} em cache) ≈ US$ {self.cost:.2f}"
+        )
+
+
+def plan_jobs(
+    analyzer,
+    jobs: Iterable,
+    history=None,
+    prices: Optional[Dict[str, float]] = None
+) -> RunPlan:
+    """
+    Estima chamadas e custo de `jobs` sem chamar a API
+    
+    Com `history` (HistoryStore), cada busca já executada usa os lugares da
+    última execução: páginas pelo número de resultados, lugares repetidos
+    entre jobs contados uma vez e lugares em cache (memória ou disco, com
+    os campos que o analisador pede) descontados. Buscas sem histórico
+    contam o pior caso: max_pages páginas cheias, todas com detalhes.
+    
+    Args:
+        analyzer: analisador que vai executar (campos de detalhes e caches)
+        jobs: AnalysisJob ou tuplas (location, radius, keyword, max_pages)
+        history: HistoryStore opcional
+        prices: USD por 1000 chamadas (padrão: DEFAULT_PRICES)
+    """
+    from gmb_batch import AnalysisJob
+    from gmb_ranking_analyzer import DETAIL_FIELDS
+    
+    prices = {**DEFAULT_PRICES, **(prices or {})}
+    jobs = [job if isinstance(job, AnalysisJob) else AnalysisJob(*job) for job in jobs]
+    jobs = list(dict.fromkeys(jobs))  # como em run_batch
+    
+    needed = analyzer.planned_detail_fields()
+    all_fields = DETAIL_FIELDS.split(",")
+    
+    job_plans: List[JobPlan] = []
+    known: Dict[str, None] = {}
+    unknown_results = 0
+    results = 0
+    for job in jobs:
+        place_ids = history.latest_place_ids(job.keyword, job.location) if history is not None else []
+        if place_ids:
+            count = min(len(place_ids), job.max_pages * PAGE_SIZE)
+            pages = max(1, math.ceil(count / PAGE_SIZE))
+            known.update(dict.fromkeys(place_ids[:count]))
+        else:
+            count = job.max_pages * PAGE_SIZE
+            pages = job.max_pages
+            unknown_results += count
+        results += count
+        job_plans.append(JobPlan(job, pages, count, known_places=len(place_ids[:count])))
+    
+    cached = 0
+    if needed:
+        for place_id in known:
+            record = analyzer.cache.get(place_id)
+            if record is None and analyzer.persistent_cache is not None:
+                record = analyzer.persistent_cache.peek(place_id, max_age=analyzer.incremental_max_age)
+            if record is not None and record.get("status") == "OK" and needed <= fields_of(record, all_fields):
+                cached += 1
+    else:
+        # Sem campos a pedir, nenhum perfil chama get_place_details
+        cached = len(known) + unknown_results
+    
+    detail_calls = max(0, len(known) + unknown_results - cached)
+    search_calls = sum(plan.search_calls for plan in job_plans)
+    skus = sorted(billing_skus(needed) | ({"basic"} if needed else set()))
+    detail_price = sum(prices.get(sku, 0.0) for sku in skus)
+    cost = (search_calls * prices["nearbysearch"] + detail_calls * detail_price) / 1000
+    
+    return RunPlan(
+        jobs=job_plans,
+        search_calls=search_calls,
+        detail_calls=detail_calls,
+        detail_results=results,
+        shared=results - len(known) - unknown_results,
+        cached=cached,
+        detail_skus=skus,
+        cost=cost,
+        prices=prices,
+    )
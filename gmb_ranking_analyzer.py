@@ -1,30 +1,151 @@
 """
 Google Maps Business Profile Analyzer & Ranking Tool
 Sistema profissional de análise de força de perfil e ranqueamento local
+
+Importar o módulo não carrega pandas/numpy nem configura o logging: busca,
+detalhes e scoring trabalham com registros simples; pandas só é importado
+ao pedir um DataFrame ou relatório (run_analysis, generate_reports) e os
+scripts chamam configure_logging explicitamente
 """
 
 import requests
-import pandas as pd
-import numpy as np
+from requests.adapters import HTTPAdapter
 import time
-import json
+import os
+import contextvars
+import itertools
+import threading
+from bisect import bisect_right
+from contextlib import contextmanager, nullcontext
+from math import atan2, cos, log10, radians, sin, sqrt
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass, asdict
+from typing import (
+    TYPE_CHECKING, Callable, ContextManager, Dict, FrozenSet, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+)
+from dataclasses import dataclass
 import logging
 from pathlib import Path
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 
-# Configuração de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('gmb_analyzer.log'),
-        logging.StreamHandler()
-    ]
+from gmb_cache import PlaceDetailsCache
+from gmb_fields import (
+    FETCHED_AT_KEY,
+    SIGNATURE_KEY,
+    compact_details,
+    fields_of,
+    merge_details,
+    plan_detail_fields,
+    search_signature,
+)
+from gmb_keys import ApiKey, ApiKeyPool, KeyBenched, QuotaExhausted, as_key_pool
+from gmb_logging import (
+    ContextFilter,
+    JsonFormatter,
+    ProgressLog,
+    current_context,
+    log_context,
+    new_run_id,
+    start_queue_listener,
+    stop_queue_listener,
+)
+from gmb_metrics import (
+    API_BYTES,
+    API_KEY_REQUESTS,
+    API_LATENCY,
+    API_REQUESTS,
+    API_RETRIES,
+    DETAILS,
+    PHASE_SECONDS,
+    PROFILES,
+    MetricsRegistry,
+    get_registry,
+)
+from gmb_planner import BUDGET_EXCEEDED, CallBudget
+from gmb_ratelimit import (
+    TRANSIENT_API_STATUSES,
+    TRANSIENT_HTTP_CODES,
+    RetryPolicy,
+    TokenBucket,
+    get_shared_limiter,
 )
+from gmb_tracing import NULL_TRACER, Span, Tracer, get_tracer
+
+if TYPE_CHECKING:
+    import pandas as pd
+
 logger = logging.getLogger(__name__)
 
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+
+def configure_logging(
+    level: Union[int, str] = logging.INFO,
+    log_file: Optional[str] = "gmb_analyzer.log",
+    fmt: str = LOG_FORMAT,
+    queue: bool = False,
+    json_format: bool = False
+) -> None:
+    """
+    Configura o logging raiz: arquivo (se `log_file`) e console
+    
+    Chamada explícita dos scripts; importar os módulos gmb_* não abre
+    arquivos nem adiciona handlers. Chamar de novo substitui a configuração.
+    
+    Args:
+        queue: handlers numa thread de fundo (QueueListener); quem loga só
+            enfileira o registro, sem I/O nem lock de arquivo
+        json_format: uma linha JSON por registro com run_id, keyword e
+            place_id (gmb_logging.JsonFormatter)
+    """
+    stop_queue_listener()
+    
+    formatter = JsonFormatter() if json_format else logging.Formatter(fmt)
+    handlers: List[logging.Handler] = []
+    if log_file:
+        handlers.append(logging.FileHandler(log_file))
+    handlers.append(logging.StreamHandler())
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    
+    if queue:
+        handlers = [start_queue_listener(handlers)]
+    # O contexto (run_id, keyword) é lido na thread que emite o registro
+    for handler in handlers:
+        handler.addFilter(ContextFilter())
+    logging.basicConfig(level=level, handlers=handlers, force=True)
+
+
+def logging_from_config(config: Dict) -> Dict:
+    """Argumentos de configure_logging a partir da seção advanced do config.yaml"""
+    advanced = config.get("advanced", {})
+    return {
+        "level": str(advanced.get("log_level", "INFO")).upper(),
+        "log_file": advanced.get("log_file", "gmb_analyzer.log"),
+        "queue": bool(advanced.get("log_queue", False)),
+        "json_format": bool(advanced.get("log_json", False)),
+    }
+
+# Endpoints da Places API
+# GMB_PLACES_BASE_URL permite apontar para um emulador local (gmb_emulator.py)
+PLACES_API_BASE_URL = os.environ.get(
+    "GMB_PLACES_BASE_URL", "https://maps.googleapis.com/maps/api/place"
+)
+NEARBY_SEARCH_PATH = "/nearbysearch/json"
+PLACE_DETAILS_PATH = "/details/json"
+
+
+def api_endpoint(url: str) -> str:
+    """Label `endpoint` das métricas de API"""
+    return "details" if PLACE_DETAILS_PATH in url else "nearbysearch"
+
+# Lista completa de campos de detalhes; por padrão o analisador pede só o
+# subconjunto usado pelos scores e colunas (ver gmb_fields.plan_detail_fields)
+DETAIL_FIELDS = (
+    "name,formatted_address,formatted_phone_number,website,rating,"
+    "user_ratings_total,geometry,business_status,opening_hours,"
+    "photos,types,url,reviews,price_level,utc_offset"
+)
+
 
 @dataclass
 class ProfileMetrics:
@@ -68,8 +189,33 @@ class ProfileMetrics:
     analysis_date: str
 
 
-class GoogleMapsRankingAnalyzer:
-    """Analisador profissional de ranqueamento do Google Maps"""
+@dataclass
+class AnalysisSummary:
+    """
+    Evento final de `iter_analysis`
+    Traz as métricas comparativas, indexadas por rank_position
+    """
+    total_profiles: int
+    leader_score: float
+    percentile_ranks: Dict[int, float]
+    gaps_to_leader: Dict[int, float]
+    
+    def apply(self, metrics: ProfileMetrics) -> ProfileMetrics:
+        """Preenche percentile_rank e gap_to_leader de um perfil já emitido"""
+        metrics.percentile_rank = self.percentile_ranks[metrics.rank_position]
+        metrics.gap_to_leader = self.gaps_to_leader[metrics.rank_position]
+        return metrics
+
+
+def _untraced_score(name: str, func: Callable[..., float], *args) -> float:
+    return func(*args)
+
+
+class ProfileScorer:
+    """
+    Cálculo de scores compartilhado pelos analisadores síncrono e assíncrono
+    Não faz chamadas de rede: recebe os dados da busca e os detalhes prontos
+    """
     
     # Pesos para cálculo de score (ajustáveis)
     WEIGHTS = {
@@ -91,61 +237,51 @@ class GoogleMapsRankingAnalyzer:
         (40, 50): "📉 FRACO",
         (0, 40): "🚨 MUITO FRACO"
     }
+    UNCLASSIFIED_CATEGORY = "🔍 NÃO CLASSIFICADO"
     
-    def __init__(self, api_key: str):
-        self.api_key = api_key
-        self.session = requests.Session()
-        self.cache = {}
-        
-    def search_places(
-        self, 
-        location: str, 
-        radius: int, 
-        keyword: str, 
-        pagetoken: Optional[str] = None
-    ) -> Dict:
-        """Busca lugares no Google Maps"""
-        url = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
-        params = {
-            "key": self.api_key,
-            "location": location,
-            "radius": radius,
-            "keyword": keyword
-        }
-        if pagetoken:
-            params["pagetoken"] = pagetoken
-            
-        try:
-            resp = self.session.get(url, params=params, timeout=15)
-            resp.raise_for_status()
-            return resp.json()
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Erro na busca: {e}")
-            return {"results": [], "status": "ERROR"}
+    # Campos avaliados no score de completude e seus pesos
+    COMPLETENESS_FIELDS = {
+        "formatted_address": 15,
+        "formatted_phone_number": 15,
+        "website": 20,
+        "opening_hours": 15,
+        "photos": 20,
+        "business_status": 5,
+        "types": 5,
+        "price_level": 5
+    }
     
-    def get_place_details(self, place_id: str) -> Dict:
-        """Obtém detalhes completos de um lugar"""
-        if place_id in self.cache:
-            return self.cache[place_id]
-            
-        url = "https://maps.googleapis.com/maps/api/place/details/json"
-        params = {
-            "key": self.api_key,
-            "place_id": place_id,
-            "fields": "name,formatted_address,formatted_phone_number,website,rating,"
-                     "user_ratings_total,geometry,business_status,opening_hours,"
-                     "photos,types,url,reviews,price_level,utc_offset"
-        }
-        
-        try:
-            resp = self.session.get(url, params=params, timeout=15)
-            resp.raise_for_status()
-            data = resp.json()
-            self.cache[place_id] = data
-            return data
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Erro ao obter detalhes de {place_id}: {e}")
-            return {"result": {}, "status": "ERROR"}
+    # Campos de detalhes lidos por cada sub-score (projeção do `fields`)
+    SCORE_DETAIL_FIELDS = {
+        'rating_quality': (),
+        'review_velocity': (),
+        'completeness': tuple(COMPLETENESS_FIELDS),
+        'authority': ("website", "photos"),
+        'prominence': (),
+        'relevance': ("types",)
+    }
+    
+    # Instrumentação (os analisadores definem por instância)
+    tracer = NULL_TRACER
+    metrics = None
+    
+    @contextmanager
+    def traced(self, name: str, phase: Optional[str] = None, **attributes) -> Iterator[Span]:
+        """Span `name` no tracer e, com `phase`, a duração em gmb_phase_seconds"""
+        start = time.perf_counter()
+        with self.tracer.span(name, **attributes) as span:
+            try:
+                yield span
+            finally:
+                if phase is not None and self.metrics is not None:
+                    self.metrics.observe(PHASE_SECONDS, time.perf_counter() - start, phase=phase)
+    
+    @staticmethod
+    def count_photos(result: Dict) -> int:
+        """Quantidade de fotos (registro completo ou compactado)"""
+        if "photo_count" in result:
+            return result["photo_count"]
+        return len(result.get("photos") or [])
     
     def calculate_distance(
         self, 
@@ -154,9 +290,10 @@ class GoogleMapsRankingAnalyzer:
         lat2: float, 
         lng2: float
     ) -> float:
-        """Calcula distância em metros entre dois pontos (Haversine)"""
-        from math import radians, sin, cos, sqrt, atan2
-        
+        """
+        Calcula distância em metros entre dois pontos (Haversine)
+        Para muitos pontos de uma vez, use gmb_geo (place_distances)
+        """
         R = 6371000  # Raio da Terra em metros
         
         lat1, lng1, lat2, lng2 = map(radians, [lat1, lng1, lat2, lng2])
@@ -181,7 +318,7 @@ class GoogleMapsRankingAnalyzer:
         
         # Fator de confiança baseado no volume de reviews
         # Usa função logarítmica para evitar viés extremo em altos volumes
-        confidence_factor = min(np.log10(total_reviews + 1) / np.log10(500), 1.0)
+        confidence_factor = min(log10(total_reviews + 1) / log10(500), 1.0)
         
         return rating_score * (0.5 + 0.5 * confidence_factor)
     
@@ -206,26 +343,15 @@ class GoogleMapsRankingAnalyzer:
         """
         result = details.get("result", {})
         
-        fields = {
-            "formatted_address": 15,
-            "formatted_phone_number": 15,
-            "website": 20,
-            "opening_hours": 15,
-            "photos": 20,
-            "business_status": 5,
-            "types": 5,
-            "price_level": 5
-        }
-        
         score = 0.0
-        for field, weight in fields.items():
-            if field in result and result[field]:
-                if field == "photos":
+        for field, weight in self.COMPLETENESS_FIELDS.items():
+            if field == "photos":
+                photo_count = self.count_photos(result)
+                if photo_count:
                     # Bonifica por ter múltiplas fotos
-                    photo_count = len(result[field])
                     score += weight * min(photo_count / 10, 1.0)
-                else:
-                    score += weight
+            elif field in result and result[field]:
+                score += weight
         
         return score
     
@@ -319,31 +445,70 @@ class GoogleMapsRankingAnalyzer:
         for (min_score, max_score), category in self.STRENGTH_CATEGORIES.items():
             if min_score <= score < max_score:
                 return category
-        return "🔍 NÃO CLASSIFICADO"
+        return self.UNCLASSIFIED_CATEGORY
     
-    def analyze_profile(
+    def score_profile(
         self,
         place_data: Dict,
+        details: Dict,
         rank_position: int,
         center_lat: float,
         center_lng: float,
         radius: int,
         keyword: str,
-        total_results: int
+        total_results: int,
+        analysis_date: Optional[str] = None,
+        distance: Optional[float] = None
     ) -> ProfileMetrics:
-        """Análise completa de um perfil"""
+        """
+        Calcula todas as métricas de um perfil a partir dos dados já obtidos
+        `analysis_date` permite usar a mesma data para todos os perfis da execução
+        e `distance` uma distância ao centro já calculada (ex. em lote, gmb_geo)
+        """
+        tracer = self.tracer
+        # Spans por sub-score só com um tracer ativo (sem custo no NullTracer)
+        score = self._traced_score if tracer.enabled else _untraced_score
+        start = time.perf_counter()
+        
+        with tracer.span("score_profile", place_id=place_data.get("place_id"), keyword=keyword):
+            profile = self._score_profile(
+                place_data, details, rank_position, center_lat, center_lng,
+                radius, keyword, total_results, analysis_date, distance, score
+            )
         
+        if self.metrics is not None:
+            self.metrics.observe(PHASE_SECONDS, time.perf_counter() - start, phase="scoring")
+            self.metrics.inc(PROFILES)
+        return profile
+    
+    def _traced_score(self, name: str, func: Callable[..., float], *args) -> float:
+        with self.tracer.span(name):
+            return func(*args)
+    
+    def _score_profile(
+        self,
+        place_data: Dict,
+        details: Dict,
+        rank_position: int,
+        center_lat: float,
+        center_lng: float,
+        radius: int,
+        keyword: str,
+        total_results: int,
+        analysis_date: Optional[str],
+        distance: Optional[float],
+        score: Callable[..., float]
+    ) -> ProfileMetrics:
         place_id = place_data.get("place_id")
         name = place_data.get("name", "N/A")
         
-        # Obtém detalhes completos
-        details = self.get_place_details(place_id)
         result = details.get("result", {})
         
         # Dados básicos
         lat = place_data["geometry"]["location"]["lat"]
         lng = place_data["geometry"]["location"]["lng"]
-        distance = self.calculate_distance(center_lat, center_lng, lat, lng)
+        if distance is None:
+            distance = self.calculate_distance(center_lat, center_lng, lat, lng)
         
         rating = place_data.get("rating", 0) or 0
         total_reviews = place_data.get("user_ratings_total", 0) or 0
@@ -353,20 +518,28 @@ class GoogleMapsRankingAnalyzer:
         website = result.get("website")
         address = result.get("formatted_address", place_data.get("vicinity", "N/A"))
         vicinity = place_data.get("vicinity", "N/A")
-        photos = result.get("photos", [])
+        photos_count = self.count_photos(result)
         types = result.get("types", [])
         
-        # Calcula todas as métricas
-        rating_quality = self.calculate_rating_quality_score(rating, total_reviews)
-        review_velocity = self.calculate_review_velocity_score(total_reviews)
-        completeness = self.calculate_completeness_score(details)
-        authority = self.calculate_authority_score(
-            rating, total_reviews, bool(website), len(photos)
+        # Calcula todas as métricas (`score` abre um span por sub-score)
+        rating_quality = score(
+            "rating_quality_score", self.calculate_rating_quality_score, rating, total_reviews
         )
-        prominence = self.calculate_prominence_score(
+        review_velocity = score(
+            "review_velocity_score", self.calculate_review_velocity_score, total_reviews
+        )
+        completeness = score("completeness_score", self.calculate_completeness_score, details)
+        authority = score(
+            "authority_score", self.calculate_authority_score,
+            rating, total_reviews, bool(website), photos_count
+        )
+        prominence = score(
+            "prominence_score", self.calculate_prominence_score,
             rank_position, total_results, distance, radius
         )
-        relevance = self.calculate_relevance_score(name, keyword, types, vicinity)
+        relevance = score(
+            "relevance_score", self.calculate_relevance_score, name, keyword, types, vicinity
+        )
         
         # Score geral
         metrics_dict = {
@@ -404,171 +577,880 @@ class GoogleMapsRankingAnalyzer:
             strength_category=strength_category,
             percentile_rank=0.0,  # Será calculado depois
             gap_to_leader=0.0,    # Será calculado depois
-            analysis_date=datetime.now().isoformat()
+            analysis_date=analysis_date or datetime.now().isoformat()
         )
+
+
+def parse_location(location: str) -> Tuple[float, float]:
+    """Converte 'lat,lng' em tupla de floats"""
+    lat, lng = map(float, location.split(","))
+    return lat, lng
+
+
+def place_distances(places: List[Dict], center_lat: float, center_lng: float) -> List[float]:
+    """Distância de cada lugar ao centro, em um único cálculo vetorizado"""
+    if not places:
+        return []
     
-    def run_analysis(
+    from gmb_geo import distances_from  # numpy só quando há distâncias a calcular
+    
+    lats = [place["geometry"]["location"]["lat"] for place in places]
+    lngs = [place["geometry"]["location"]["lng"] for place in places]
+    return distances_from(center_lat, center_lng, lats, lngs).tolist()
+
+
+def comparative_values(scores: List[float]) -> List[Tuple[float, float]]:
+    """Retorna (percentile_rank, gap_to_leader) para cada score, na mesma ordem"""
+    if not scores:
+        return []
+    
+    # Scores ordenados: bisect_right conta quantos são <= cada score (O(n log n))
+    ordered = sorted(scores)
+    leader_score = ordered[-1]
+    total = len(ordered)
+    
+    return [
+        (
+            round((bisect_right(ordered, score) / total) * 100, 1),
+            round(leader_score - score, 2)
+        )
+        for score in scores
+    ]
+
+
+def compute_comparative_metrics(metrics_list: List[ProfileMetrics]) -> None:
+    """Preenche percentile_rank e gap_to_leader de cada perfil"""
+    values = comparative_values([m.overall_strength_score for m in metrics_list])
+    
+    for metrics, (percentile, gap) in zip(metrics_list, values):
+        metrics.percentile_rank = percentile
+        metrics.gap_to_leader = gap
+
+
+def build_summary(scores_by_position: Dict[int, float]) -> AnalysisSummary:
+    """Cria o AnalysisSummary a partir de rank_position -> overall score"""
+    positions = list(scores_by_position)
+    scores = list(scores_by_position.values())
+    values = comparative_values(scores)
+    
+    return AnalysisSummary(
+        total_profiles=len(scores),
+        leader_score=max(scores) if scores else 0.0,
+        percentile_ranks={pos: pct for pos, (pct, _) in zip(positions, values)},
+        gaps_to_leader={pos: gap for pos, (_, gap) in zip(positions, values)}
+    )
+
+
+def metrics_to_dataframe(metrics_list: Iterable[ProfileMetrics]) -> "pd.DataFrame":
+    """Converte a lista de métricas em DataFrame (via ProfileTable, sem asdict)"""
+    from gmb_results import ProfileTable
+    
+    return ProfileTable.from_metrics(metrics_list).to_dataframe()
+
+
+def incremental_max_age_from_config(advanced: Dict) -> Optional[float]:
+    """Idade máxima (horas) da reanálise incremental na seção `advanced` (None = desativada)"""
+    incremental = advanced.get("incremental", {})
+    if not incremental.get("enabled", False):
+        return None
+    return incremental.get("max_age_hours", 168)
+
+
+class DetailsCacheMixin:
+    """
+    Projeção de campos e cache de detalhes em dois níveis (memória e disco),
+    compartilhados pelos analisadores síncrono e assíncrono
+    
+    Espera os atributos cache, persistent_cache, detail_fields, report_columns,
+    incremental_max_age (segundos ou None), detail_stats e _stats_lock (por
+    instância), metrics e _inflight (requisições de detalhes em andamento por
+    place_id), além de budget (CallBudget ou None).
+    
+    Modo incremental: cada registro guarda a assinatura do resultado da
+    busca (rating, nº de reviews, nome...) de quando foi obtido. Com
+    `incremental_max_age`, um registro só é reaproveitado se a assinatura
+    atual for igual e ele tiver menos que essa idade; senão é buscado de novo.
+    """
+    
+    budget = None
+    
+    def planned_detail_fields(self) -> FrozenSet[str]:
+        """Campos pedidos em get_place_details (recalculado se WEIGHTS mudar)"""
+        if self.detail_fields is not None:
+            return self.detail_fields
+        return plan_detail_fields(self, self.report_columns)
+    
+    def detail_signature(self, place: Dict) -> Optional[str]:
+        """Assinatura da busca para get_place_details (None fora do modo incremental)"""
+        if self.incremental_max_age is None:
+            return None
+        return search_signature(place)
+    
+    def budget_skips(self, details: Dict) -> bool:
+        """Perfil sem detalhes por falta de orçamento no modo stop (fica fora do resultado)"""
+        return self.budget is not None and self.budget.skips(details)
+    
+    def budget_run(self) -> ContextManager:
+        """Escopo de execução do orçamento (CallBudget.run); nada sem orçamento"""
+        return self.budget.run() if self.budget is not None else nullcontext()
+    
+    def hold_next_pages(self, max_pages: int) -> int:
+        """Guarda no orçamento as chamadas das páginas 2..max_pages de uma busca"""
+        return self.budget.hold_pages(max_pages - 1) if self.budget is not None else 0
+    
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self.detail_stats[key] = self.detail_stats.get(key, 0) + 1
+        self.metrics.inc(DETAILS, result=key)
+    
+    @staticmethod
+    def _covers(record: Dict, needed: FrozenSet[str]) -> bool:
+        """Se o registro (de outra chamada) atende a `needed`; erros são compartilhados"""
+        if record.get("status") != "OK":
+            return True
+        return needed <= fields_of(record, DETAIL_FIELDS.split(","))
+    
+    def _cached_details(
         self,
-        location: str,
-        radius: int,
-        keyword: str,
-        max_pages: int = 3
-    ) -> Tuple[List[ProfileMetrics], pd.DataFrame]:
-        """Executa análise completa"""
+        place_id: str,
+        needed: FrozenSet[str],
+        signature: Optional[str] = None,
+        count: bool = True
+    ) -> Tuple[Optional[Dict], FrozenSet[str]]:
+        """
+        Registro em cache (memória, depois disco) e os campos que faltam nele
+        Sem nenhum campo necessário, devolve um registro vazio sem chamar a API.
+        Com `signature`, registros de outra assinatura ou mais antigos que
+        incremental_max_age são ignorados (o lugar é buscado por inteiro).
+        `count=False` nas novas passagens de uma mesma consulta (depois de
+        esperar outra requisição): hit/miss contam uma vez por consulta.
+        """
+        max_age = self.incremental_max_age if signature is not None else None
         
-        logger.info(f"Iniciando análise para '{keyword}' em {location}")
-        logger.info(f"Raio: {radius}m | Páginas: {max_pages}")
+        cached = self.cache.get(place_id)
+        source = "memory_hit"
+        if cached is None and self.persistent_cache is not None:
+            cached = self.persistent_cache.get(place_id, max_age=max_age)
+            source = "disk_hit"
+            if cached is not None:
+                self.cache[place_id] = cached
+        if count:
+            self.metrics.inc(DETAILS, result=source if cached is not None else "miss")
         
-        # Parse location
-        center_lat, center_lng = map(float, location.split(","))
+        if cached is not None and signature is not None:
+            if (
+                cached.get(SIGNATURE_KEY) != signature
+                or time.time() - cached.get(FETCHED_AT_KEY, 0) > max_age
+            ):
+                if count:
+                    self._count("changed")
+                cached = None
         
-        # Coleta dados
-        all_places = []
-        pagetoken = None
-        pages = 0
+        if cached is None:
+            if not needed:
+                return {"result": {}, "status": "OK"}, needed
+            return None, needed
         
-        while pages < max_pages:
-            data = self.search_places(location, radius, keyword, pagetoken)
-            
-            if data.get("status") == "ERROR":
-                break
+        # Registros sem a marcação de campos vieram da lista completa
+        missing = needed - fields_of(cached, DETAIL_FIELDS.split(","))
+        if not missing and signature is not None:
+            self._count("reused")
+        return cached, missing
+    
+    def _store_details(
+        self,
+        place_id: str,
+        data: Dict,
+        cached: Optional[Dict],
+        signature: Optional[str] = None
+    ) -> Dict:
+        """Mescla com o registro parcial existente e grava nos caches"""
+        if data.get("status") == BUDGET_EXCEEDED:
+            # Recusa do orçamento não vai para o cache: outra execução pode buscar
+            self._count("budget_exceeded")
+            return cached if cached is not None else {"result": {}, "status": BUDGET_EXCEEDED}
+        
+        self._count("fetched")
+        if data.get("status") != "OK":
+            if cached is not None:
+                return cached
+            self.cache[place_id] = data
+            return data
+        
+        fetched_at = time.time()
+        if cached is not None and cached.get("status") == "OK":
+            data = merge_details(cached, data)
+            fetched_at = cached.get(FETCHED_AT_KEY, fetched_at)
+        
+        data[FETCHED_AT_KEY] = fetched_at
+        if signature is not None:
+            data[SIGNATURE_KEY] = signature
+        
+        self.cache[place_id] = data
+        if self.persistent_cache is not None:
+            # A idade no disco é a dos campos mais antigos do registro mesclado
+            self.persistent_cache.set(place_id, data, created_at=fetched_at)
+        return data
+
+
+class GoogleMapsRankingAnalyzer(DetailsCacheMixin, ProfileScorer):
+    """Analisador profissional de ranqueamento do Google Maps"""
+    
+    # Intervalo inicial entre consultas de um next_page_token ainda inválido
+    PAGE_TOKEN_POLL_INTERVAL = 0.25
+    
+    def __init__(
+        self,
+        api_key: Union[str, Iterable[str], ApiKeyPool],
+        max_workers: int = 1,
+        rate_limit_delay: float = 0.5,
+        persistent_cache: Optional[PlaceDetailsCache] = None,
+        qps: Optional[float] = None,
+        burst: int = 1,
+        max_retries: int = 3,
+        retry_delay: float = 2.0,
+        timeout: float = 15,
+        rate_limiter: Optional[TokenBucket] = None,
+        page_token_delay: float = 1.0,
+        page_token_timeout: float = 10.0,
+        detail_fields: Optional[Iterable[str]] = None,
+        report_columns: Optional[Iterable[str]] = None,
+        base_url: Optional[str] = None,
+        incremental_max_age_hours: Optional[float] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        tracer: Optional[Tracer] = None,
+        budget: Optional[CallBudget] = None
+    ):
+        """
+        Args:
+            api_key: uma chave ou várias (lista de chaves ou ApiKeyPool); com
+                várias, cada requisição usa a chave escolhida pelo pool
+            qps/burst: taxa do token bucket compartilhado pelo processo;
+                sem `qps`, usa 1 / rate_limit_delay (0 desativa o limite).
+                Com várias chaves, é a taxa de cada chave
+            max_retries/retry_delay: retry com backoff exponencial e jitter
+                em erros transitórios e OVER_QUERY_LIMIT
+            rate_limiter: bucket próprio em vez do compartilhado
+            page_token_delay/page_token_timeout: espera inicial e máxima
+                até o next_page_token ficar válido
+            detail_fields: campos fixos para get_place_details; sem ele, usa
+                o mínimo exigido pelos sub-scores ativos e `report_columns`
+            report_columns: colunas de ProfileMetrics necessárias (None = todas)
+            base_url: raiz da Places API (ex. emulador local)
+            incremental_max_age_hours: ativa a reanálise incremental: detalhes
+                de lugares com os mesmos sinais na busca e mais novos que
+                isso são reaproveitados (None = sempre usa o cache normal)
+            metrics: registro de contadores e latências (padrão: o do
+                processo, gmb_metrics.get_registry())
+            tracer: recebe os spans de cada etapa (padrão: gmb_tracing.get_tracer())
+            budget: limite de chamadas por execução/dia (gmb_planner.CallBudget);
+                recusadas, a busca para de paginar e os detalhes voltam vazios
+                (pontuação só com a busca) ou o perfil fica de fora (modo stop)
+        """
+        self.max_workers = max(1, max_workers)
+        self.rate_limit_delay = rate_limit_delay
+        self.persistent_cache = persistent_cache
+        self.timeout = timeout
+        self.retry_policy = RetryPolicy(max_retries=max_retries, base_delay=retry_delay)
+        self.page_token_delay = page_token_delay
+        self.page_token_timeout = page_token_timeout
+        self.detail_fields = frozenset(detail_fields) if detail_fields else None
+        self.report_columns = tuple(report_columns) if report_columns else None
+        self.base_url = (base_url or PLACES_API_BASE_URL).rstrip("/")
+        self.incremental_max_age = (
+            incremental_max_age_hours * 3600 if incremental_max_age_hours is not None else None
+        )
+        self.detail_stats: Dict[str, int] = {}
+        self._stats_lock = threading.Lock()
+        self.metrics = metrics if metrics is not None else get_registry()
+        self.tracer = tracer if tracer is not None else get_tracer()
+        self.budget = budget
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        
+        if qps is None and rate_limit_delay > 0:
+            qps = 1 / rate_limit_delay
+        # Com várias chaves cada uma tem seu bucket e a vazão soma entre elas;
+        # `rate_limiter` explícito ainda vale como teto global
+        self.key_pool = as_key_pool(api_key, qps or None, burst)
+        self.api_key = api_key if self.key_pool is None else None
+        if rate_limiter is None and qps and self.key_pool is None:
+            rate_limiter = get_shared_limiter("places_api", qps, burst)
+        self.rate_limiter = rate_limiter
+        
+        self.session = requests.Session()
+        self.pool_size = 0
+        # Pool de conexões dimensionado para os workers concorrentes
+        # (+1 para a thread que pagina a busca em paralelo aos detalhes)
+        self.ensure_connection_pool(max(10, self.max_workers + 1))
+        self.cache = {}
+    
+    @classmethod
+    def from_config(cls, config: Dict) -> "GoogleMapsRankingAnalyzer":
+        """Cria o analisador a partir do config.yaml já carregado"""
+        api = config.get("api", {})
+        advanced = config.get("advanced", {})
+        
+        return cls(
+            ApiKeyPool.from_config(api) or api["key"],
+            max_workers=api.get("max_workers", 1),
+            rate_limit_delay=api.get("rate_limit_delay", 0.5),
+            persistent_cache=PlaceDetailsCache.from_config(advanced),
+            qps=api.get("qps"),
+            burst=api.get("burst", 1),
+            max_retries=advanced.get("max_retries", 3),
+            retry_delay=advanced.get("retry_delay", 2.0),
+            timeout=api.get("timeout", 15),
+            base_url=api.get("base_url"),
+            incremental_max_age_hours=incremental_max_age_from_config(advanced),
+            budget=CallBudget.from_config(config)
+        )
+    
+    def ensure_connection_pool(self, connections: int) -> None:
+        """Garante um pool HTTP com pelo menos `connections` conexões simultâneas"""
+        if connections <= self.pool_size:
+            return
+        
+        adapter = HTTPAdapter(pool_maxsize=connections)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.pool_size = connections
+    
+    def stats(self) -> Dict[str, Dict]:
+        """
+        Snapshot das métricas (contadores e histogramas por fase e endpoint)
+        Com o registro padrão, inclui os demais analisadores do processo.
+        """
+        return self.metrics.snapshot()
+    
+    def _record_key(self, key: ApiKey, status: str, data: Optional[Dict]) -> None:
+        self.key_pool.record(key, status, data.get("next_page_token") if data else None)
+        self.metrics.inc(API_KEY_REQUESTS, key=key.name, status=status)
+    
+    def _retry_delay(self, attempt: int, key: Optional[ApiKey], reason: object) -> float:
+        # A chave com OVER_QUERY_LIMIT saiu do pool: a próxima tentativa vai
+        # para outra (ou espera o fim do cooldown dentro do pool)
+        if key is not None and reason == "OVER_QUERY_LIMIT":
+            return 0.0
+        return self.retry_policy.delay(attempt)
+    
+    def _request(self, url: str, params: Dict) -> Dict:
+        """
+        GET com rate limiting e retry
+        
+        Erros de rede, HTTP 429/5xx e status transitórios da API
+        (OVER_QUERY_LIMIT, UNKNOWN_ERROR) são repetidos com backoff.
+        Esgotadas as tentativas, relança a exceção ou devolve o último
+        payload recebido. Com pool de chaves, cada tentativa usa a chave
+        escolhida pelo pool e OVER_QUERY_LIMIT passa direto para outra.
+        """
+        max_retries = self.retry_policy.max_retries
+        endpoint = api_endpoint(url)
+        
+        for attempt in range(max_retries + 1):
+            if self.budget is not None and not self.budget.allow(endpoint):
+                return {"status": BUDGET_EXCEEDED, "results": []}
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            key = None
+            if self.key_pool is not None:
+                try:
+                    key = self.key_pool.acquire(params.get("pagetoken"))
+                except (QuotaExhausted, KeyBenched) as e:
+                    return {"status": "OVER_QUERY_LIMIT", "results": [], "error_message": str(e)}
+                params = {**params, "key": key.key}
             
-            places = data.get("results", [])
-            all_places.extend(places)
+            start = time.perf_counter()
+            status = "error"
+            data = None
+            try:
+                resp = self.session.get(url, params=params, timeout=self.timeout)
+                status = str(resp.status_code)
+                self.metrics.inc(API_BYTES, len(resp.content), endpoint=endpoint)
+                resp.raise_for_status()
+                data = resp.json()
+                status = data.get("status", status)
+                if data.get("status") not in TRANSIENT_API_STATUSES or attempt == max_retries:
+                    return data
+                reason = data.get("status")
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt == max_retries:
+                    raise
+                reason = e
+            except requests.exceptions.HTTPError as e:
+                if e.response is None or e.response.status_code not in TRANSIENT_HTTP_CODES:
+                    raise
+                if attempt == max_retries:
+                    raise
+                reason = e
+            finally:
+                self.metrics.observe(API_LATENCY, time.perf_counter() - start, endpoint=endpoint)
+                self.metrics.inc(API_REQUESTS, endpoint=endpoint, status=status)
+                if key is not None:
+                    self._record_key(key, status, data)
             
-            logger.info(f"Página {pages + 1}: {len(places)} resultados")
+            delay = self._retry_delay(attempt, key, reason)
+            logger.warning(
+                f"Tentativa {attempt + 1}/{max_retries + 1} falhou ({reason}); "
+                f"nova tentativa em {delay:.1f}s"
+            )
+            self.metrics.inc(API_RETRIES, endpoint=endpoint)
+            time.sleep(delay)
+    
+    def search_places(
+        self, 
+        location: str, 
+        radius: int, 
+        keyword: str, 
+        pagetoken: Optional[str] = None
+    ) -> Dict:
+        """Busca lugares no Google Maps"""
+        url = self.base_url + NEARBY_SEARCH_PATH
+        params = {
+            "key": self.api_key,
+            "location": location,
+            "radius": radius,
+            "keyword": keyword
+        }
+        if pagetoken:
+            params["pagetoken"] = pagetoken
+        
+        with self.tracer.span("search_places", keyword=keyword, next_page=bool(pagetoken)) as span:
+            try:
+                data = self._request(url, params)
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Erro na busca: {e}")
+                data = {"results": [], "status": "ERROR"}
+            span.set(status=data.get("status"), results=len(data.get("results", [])))
+            return data
+    
+    def get_place_details(
+        self,
+        place_id: str,
+        fields: Optional[Iterable[str]] = None,
+        signature: Optional[str] = None
+    ) -> Dict:
+        """
+        Obtém detalhes de um lugar
+        
+        Pede apenas os campos necessários (`fields` ou a projeção do
+        analisador). Se o cache tiver um registro parcial, busca só os
+        campos que faltam e mescla. `signature` (detail_signature do
+        resultado da busca) ativa a verificação do modo incremental.
+        
+        Chamadas simultâneas para o mesmo place_id (single-flight) esperam
+        a requisição já em andamento e recebem o mesmo resultado ou erro;
+        cada uma conta como "coalesced" em detail_stats.
+        """
+        needed = frozenset(fields) if fields is not None else self.planned_detail_fields()
+        
+        with self.traced("get_place_details", phase="details", place_id=place_id) as span:
+            return self._get_place_details(place_id, needed, signature, span)
+    
+    def _get_place_details(
+        self,
+        place_id: str,
+        needed: FrozenSet[str],
+        signature: Optional[str],
+        span: Span
+    ) -> Dict:
+        span.set(cache_hit=True)
+        first = True
+        while True:
+            cached, missing = self._cached_details(place_id, needed, signature, count=first)
+            first = False
+            if not missing:
+                return cached
+            span.set(cache_hit=False)
             
-            pages += 1
-            pagetoken = data.get("next_page_token")
+            with self._inflight_lock:
+                flight = self._inflight.get(place_id)
+                leader = flight is None
+                if leader:
+                    flight = self._inflight[place_id] = Future()
             
-            if not pagetoken:
-                break
+            if not leader:
+                self._count("coalesced")
+                span.set(coalesced=True)
+                result = flight.result()
+                if self._covers(result, needed):
+                    return result
+                # A requisição em andamento pediu menos campos: busca o restante
+                continue
             
-            time.sleep(2.5)
+            try:
+                result = self._fetch_details(place_id, missing, cached, signature)
+            except BaseException as e:
+                flight.set_exception(e)
+                raise
+            else:
+                flight.set_result(result)
+                return result
+            finally:
+                with self._inflight_lock:
+                    del self._inflight[place_id]
+    
+    def _fetch_details(
+        self,
+        place_id: str,
+        missing: FrozenSet[str],
+        cached: Optional[Dict],
+        signature: Optional[str]
+    ) -> Dict:
+        """Consulta a API pelos campos que faltam e grava nos caches"""
+        url = self.base_url + PLACE_DETAILS_PATH
+        params = {
+            "key": self.api_key,
+            "place_id": place_id,
+            "fields": ",".join(sorted(missing))
+        }
         
-        logger.info(f"Total de {len(all_places)} perfis coletados")
+        try:
+            data = compact_details(self._request(url, params), missing)
+            return self._store_details(place_id, data, cached, signature)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Erro ao obter detalhes de {place_id}: {e}", extra={"place_id": place_id})
+            return {"result": {}, "status": "ERROR"}
+    
+    def analyze_profile(
+        self,
+        place_data: Dict,
+        rank_position: int,
+        center_lat: float,
+        center_lng: float,
+        radius: int,
+        keyword: str,
+        total_results: int,
+        details: Optional[Dict] = None,
+        analysis_date: Optional[str] = None,
+        distance: Optional[float] = None
+    ) -> ProfileMetrics:
+        """
+        Análise completa de um perfil
+        Se `details` for informado, usa-o em vez de consultar a API
+        """
+        place_id = place_data.get("place_id")
         
-        # Analisa cada perfil
-        metrics_list = []
-        for idx, place in enumerate(all_places, 1):
-            logger.info(f"Analisando {idx}/{len(all_places)}: {place.get('name')}")
+        with self.tracer.span(
+            "analyze_profile", place_id=place_id, keyword=keyword, rank_position=rank_position
+        ):
+            if details is None:
+                details = self.get_place_details(
+                    place_id, signature=self.detail_signature(place_data)
+                )
             
-            metrics = self.analyze_profile(
-                place, idx, center_lat, center_lng, radius, keyword, len(all_places)
+            return self.score_profile(
+                place_data, details, rank_position, center_lat, center_lng,
+                radius, keyword, total_results, analysis_date, distance
             )
-            metrics_list.append(metrics)
+    
+    def wait_next_page(
+        self,
+        location: str,
+        radius: int,
+        keyword: str,
+        pagetoken: str
+    ) -> Dict:
+        """
+        Busca a próxima página assim que o next_page_token fica válido
+        
+        O token só é aceito alguns segundos após ser emitido; até lá a API
+        responde INVALID_REQUEST. Em vez de um sleep fixo, aguarda
+        `page_token_delay` e consulta com intervalo crescente até
+        `page_token_timeout`.
+        """
+        deadline = time.monotonic() + self.page_token_timeout
+        interval = self.PAGE_TOKEN_POLL_INTERVAL
+        
+        with self.tracer.span("wait_next_page", keyword=keyword) as span:
+            time.sleep(self.page_token_delay)
+            
+            for attempt in itertools.count(1):
+                data = self.search_places(location, radius, keyword, pagetoken)
+                if data.get("status") != "INVALID_REQUEST":
+                    break
+                
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning("next_page_token não ficou válido a tempo")
+                    break
+                
+                time.sleep(min(interval, remaining))
+                interval = min(interval * 1.25, 1.0)
             
-            time.sleep(0.5)  # Rate limiting
+            span.set(attempts=attempt)
+            return data
+    
+    def collect_places(
+        self,
+        location: str,
+        radius: int,
+        keyword: str,
+        max_pages: int = 3,
+        on_page: Optional[Callable[[List[Dict], int], None]] = None
+    ) -> List[Dict]:
+        """
+        Coleta os resultados de todas as páginas da busca
         
-        # Calcula métricas comparativas
-        if metrics_list:
-            scores = [m.overall_strength_score for m in metrics_list]
-            leader_score = max(scores)
+        `on_page(places, primeira_posicao)` é chamado assim que cada página
+        chega, permitindo processá-la durante a espera do próximo token.
+        """
+        all_places = []
+        pagetoken = None
+        pages = 0
+        # Detalhes não gastam as chamadas das próximas páginas (modo degrade)
+        held = self.hold_next_pages(max_pages)
+        
+        try:
+            while pages < max_pages:
+                with self.traced("search_page", phase="search", keyword=keyword, page=pages + 1):
+                    if pagetoken:
+                        data = self.wait_next_page(location, radius, keyword, pagetoken)
+                        if held:
+                            self.budget.release_pages(1)
+                            held -= 1
+                    else:
+                        data = self.search_places(location, radius, keyword)
+                
+                if data.get("status") in ("ERROR", "INVALID_REQUEST"):
+                    break
+                
+                places = data.get("results", [])
+                first_position = len(all_places) + 1
+                all_places.extend(places)
+                
+                logger.info(f"Página {pages + 1}: {len(places)} resultados")
+                
+                if on_page is not None and places:
+                    on_page(places, first_position)
+                
+                pages += 1
+                pagetoken = data.get("next_page_token")
+                
+                if not pagetoken:
+                    break
+        finally:
+            if held:
+                self.budget.release_pages(held)
+        
+        return all_places
+    
+    def iter_analysis(
+        self,
+        location: str,
+        radius: int,
+        keyword: str,
+        max_pages: int = 3,
+        max_workers: Optional[int] = None
+    ) -> Iterator[Union[ProfileMetrics, AnalysisSummary]]:
+        """
+        Executa a análise emitindo cada ProfileMetrics assim que é pontuado
+        
+        Os perfis saem sem percentile_rank/gap_to_leader (dependem do
+        conjunto todo); o último item é um AnalysisSummary com esses
+        valores. Com `max_workers` > 1 a ordem é a de conclusão dos
+        detalhes, não a de rank_position.
+        
+        Exemplo:
+            for item in analyzer.iter_analysis(LOCATION, 2000, "padaria"):
+                if isinstance(item, AnalysisSummary):
+                    ...  # métricas comparativas
+                else:
+                    ...  # ProfileMetrics
+        
+        Os logs da execução levam run_id (o do log_context externo, se
+        houver) e keyword.
+        """
+        
+        with log_context(run_id=current_context().get("run_id") or new_run_id(), keyword=keyword), \
+                self.budget_run():
+            yield from self._iter_analysis(location, radius, keyword, max_pages, max_workers)
+    
+    def _iter_analysis(
+        self,
+        location: str,
+        radius: int,
+        keyword: str,
+        max_pages: int,
+        max_workers: Optional[int]
+    ) -> Iterator[Union[ProfileMetrics, AnalysisSummary]]:
+        workers = max(1, max_workers or self.max_workers)
+        
+        logger.info(f"Iniciando análise para '{keyword}' em {location}")
+        logger.info(f"Raio: {radius}m | Páginas: {max_pages}")
+        
+        # Parse location
+        center_lat, center_lng = parse_location(location)
+        scores_by_position = {}
+        analysis_date = datetime.now().isoformat()
+        
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = {}
+                
+                def fetch_page_details(places: List[Dict], first_position: int) -> None:
+                    for idx, place in enumerate(places, first_position):
+                        # Cópia do contexto: os logs das threads levam run_id/keyword
+                        future = pool.submit(
+                            contextvars.copy_context().run,
+                            self.get_place_details, place.get("place_id"),
+                            signature=self.detail_signature(place)
+                        )
+                        futures[future] = (idx, place)
+                
+                try:
+                    all_places = self.collect_places(
+                        location, radius, keyword, max_pages, on_page=fetch_page_details
+                    )
+                    total = len(all_places)
+                    distances = place_distances(all_places, center_lat, center_lng)
+                    logger.info(f"Total de {total} perfis coletados")
+                    progress = ProgressLog(logger, total)
+                    
+                    # Pontua cada perfil assim que seus detalhes chegam
+                    for future in as_completed(futures):
+                        idx, place = futures[future]
+                        progress.step(place.get("name"), place.get("place_id"))
+                        details = future.result()
+                        if self.budget_skips(details):
+                            continue
+                        
+                        metrics = self.analyze_profile(
+                            place, idx, center_lat, center_lng, radius, keyword, total,
+                            details=details, analysis_date=analysis_date,
+                            distance=distances[idx - 1]
+                        )
+                        scores_by_position[idx] = metrics.overall_strength_score
+                        yield metrics
+                finally:
+                    # Consumidor interrompeu a iteração: descarta o que não começou
+                    for future in futures:
+                        future.cancel()
+        else:
+            all_places = self.collect_places(location, radius, keyword, max_pages)
+            total = len(all_places)
+            distances = place_distances(all_places, center_lat, center_lng)
+            logger.info(f"Total de {total} perfis coletados")
+            progress = ProgressLog(logger, total)
             
-            for metrics in metrics_list:
-                # Percentil
-                percentile = (sum(s <= metrics.overall_strength_score for s in scores) / len(scores)) * 100
-                metrics.percentile_rank = round(percentile, 1)
+            # Analisa cada perfil
+            for idx, place in enumerate(all_places, 1):
+                progress.step(place.get("name"), place.get("place_id"))
+                details = self.get_place_details(
+                    place.get("place_id"), signature=self.detail_signature(place)
+                )
+                if self.budget_skips(details):
+                    continue
                 
-                # Gap para o líder
-                metrics.gap_to_leader = round(leader_score - metrics.overall_strength_score, 2)
+                metrics = self.analyze_profile(
+                    place, idx, center_lat, center_lng, radius, keyword, total,
+                    details=details, analysis_date=analysis_date, distance=distances[idx - 1]
+                )
+                scores_by_position[idx] = metrics.overall_strength_score
+                yield metrics
+        progress.done()
+        
+        # Calcula métricas comparativas
+        with self.traced(
+            "percentiles", phase="percentiles", keyword=keyword, profiles=len(scores_by_position)
+        ):
+            summary = build_summary(scores_by_position)
+        yield summary
+    
+    def run_analysis(
+        self,
+        location: str,
+        radius: int,
+        keyword: str,
+        max_pages: int = 3,
+        max_workers: Optional[int] = None
+    ) -> Tuple[Sequence[ProfileMetrics], "pd.DataFrame"]:
+        """
+        Executa análise completa
+        
+        Com `max_workers` > 1 a coleta é em pipeline: os detalhes de cada
+        página começam a ser obtidos em paralelo assim que ela chega,
+        enquanto o próximo next_page_token amadurece. A pontuação depende
+        do total de resultados (proeminência), então é feita à medida que
+        os detalhes ficam prontos após a última página.
+        
+        Os resultados ficam numa ProfileTable colunar; a lista de
+        ProfileMetrics retornada é uma visão somente leitura dela.
+        """
+        from gmb_results import ProfileTableBuilder
+        
+        builder = ProfileTableBuilder()
+        for item in self.iter_analysis(location, radius, keyword, max_pages, max_workers):
+            builder.add(item)
+        
+        table = builder.build()
         
         # Cria DataFrame
-        df = pd.DataFrame([asdict(m) for m in metrics_list])
+        df = table.to_dataframe()
         
         logger.info("Análise concluída!")
         
-        return metrics_list, df
-
-
-def generate_reports(df: pd.DataFrame, keyword: str, output_dir: str = "output"):
-    """Gera relatórios detalhados"""
-    
-    output_path = Path(output_dir)
-    output_path.mkdir(exist_ok=True)
-    
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    
-    # 1. CSV completo
-    csv_file = output_path / f"ranking_analysis_{keyword}_{timestamp}.csv"
-    df.to_csv(csv_file, index=False, encoding="utf-8-sig")
-    logger.info(f"CSV salvo: {csv_file}")
-    
-    # 2. Excel com múltiplas abas
-    excel_file = output_path / f"ranking_analysis_{keyword}_{timestamp}.xlsx"
-    with pd.ExcelWriter(excel_file, engine='openpyxl') as writer:
-        # Aba principal
-        df.to_excel(writer, sheet_name='Análise Completa', index=False)
-        
-        # Top 10
-        df.head(10).to_excel(writer, sheet_name='Top 10', index=False)
-        
-        # Estatísticas
-        stats = df[['rating', 'total_reviews', 'overall_strength_score', 
-                    'rating_quality_score', 'authority_score']].describe()
-        stats.to_excel(writer, sheet_name='Estatísticas')
-        
-        # Categorias
-        category_summary = df.groupby('strength_category').agg({
-            'place_id': 'count',
-            'overall_strength_score': 'mean',
-            'total_reviews': 'mean',
-            'rating': 'mean'
-        }).round(2)
-        category_summary.to_excel(writer, sheet_name='Por Categoria')
-    
-    logger.info(f"Excel salvo: {excel_file}")
-    
-    # 3. JSON detalhado
-    json_file = output_path / f"ranking_analysis_{keyword}_{timestamp}.json"
-    df.to_json(json_file, orient='records', indent=2, force_ascii=False)
-    logger.info(f"JSON salvo: {json_file}")
-    
-    # 4. Relatório resumido em texto
-    report_file = output_path / f"summary_report_{keyword}_{timestamp}.txt"
-    with open(report_file, 'w', encoding='utf-8') as f:
-        f.write("="*80 + "\n")
-        f.write(f"RELATÓRIO DE ANÁLISE DE RANQUEAMENTO - {keyword.upper()}\n")
-        f.write(f"Data: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n")
-        f.write("="*80 + "\n\n")
-        
-        f.write(f"Total de perfis analisados: {len(df)}\n\n")
-        
-        f.write("TOP 10 RANKINGS:\n")
-        f.write("-"*80 + "\n")
-        for idx, row in df.head(10).iterrows():
-            f.write(f"\n#{row['rank_position']} - {row['name']}\n")
-            f.write(f"   Score Geral: {row['overall_strength_score']:.2f} {row['strength_category']}\n")
-            f.write(f"   Rating: {row['rating']:.1f} ⭐ ({row['total_reviews']} reviews)\n")
-            f.write(f"   Distância: {row['distance_from_center']:.0f}m\n")
-            f.write(f"   Percentil: {row['percentile_rank']:.1f}%\n")
-        
-        f.write("\n" + "="*80 + "\n")
-        f.write("ESTATÍSTICAS GERAIS:\n")
-        f.write("-"*80 + "\n")
-        f.write(f"Score médio: {df['overall_strength_score'].mean():.2f}\n")
-        f.write(f"Rating médio: {df['rating'].mean():.2f}\n")
-        f.write(f"Média de reviews: {df['total_reviews'].mean():.0f}\n")
-        
-        f.write("\n" + "="*80 + "\n")
-        f.write("DISTRIBUIÇÃO POR CATEGORIA:\n")
-        f.write("-"*80 + "\n")
-        for category, count in df['strength_category'].value_counts().items():
-            f.write(f"{category}: {count} perfis ({count/len(df)*100:.1f}%)\n")
-    
-    logger.info(f"Relatório resumido salvo: {report_file}")
+        return table.metrics, df
     
-    return {
-        'csv': csv_file,
-        'excel': excel_file,
-        'json': json_file,
-        'report': report_file
-    }
+    def run_analysis_records(
+        self,
+        location: str,
+        radius: int,
+        keyword: str,
+        max_pages: int = 3,
+        max_workers: Optional[int] = None
+    ) -> List[ProfileMetrics]:
+        """
+        Análise completa sem DataFrame (não importa pandas)
+        
+        Mesmos perfis de run_analysis, como lista de ProfileMetrics em ordem
+        de rank_position com percentile_rank e gap_to_leader preenchidos.
+        Útil para workers de vida curta que só gravam ou repassam os
+        registros; metrics_to_dataframe converte depois, se preciso.
+        """
+        profiles = []
+        for item in self.iter_analysis(location, radius, keyword, max_pages, max_workers):
+            if isinstance(item, AnalysisSummary):
+                for profile in profiles:
+                    item.apply(profile)
+            else:
+                profiles.append(item)
+        
+        profiles.sort(key=lambda profile: profile.rank_position)
+        return profiles
+
+
+def generate_reports(
+    df: "pd.DataFrame",
+    keyword: str,
+    output_dir: str = "output",
+    formats: Optional[Union[Dict[str, bool], Iterable[str]]] = None,
+    max_workers: Optional[int] = None,
+    tracer: Optional[Tracer] = None,
+    metrics: Optional[MetricsRegistry] = None
+) -> Dict[str, Path]:
+    """
+    Gera relatórios detalhados
+    
+    Args:
+        formats: formatos a gerar, no formato de `reports.formats` do
+            config.yaml ou lista de nomes (None = todos)
+        max_workers: writers em paralelo (padrão: um por formato)
+        tracer/metrics: um span e uma duração (fase "report") por formato
+    
+    Returns:
+        Dicionário com os arquivos gerados ('csv', 'excel', 'json', 'report')
+    """
+    from gmb_reports import write_reports
+    
+    return write_reports(df, keyword, output_dir, formats, max_workers, tracer, metrics)
 
 
 def main():
     """Função principal"""
     
+    configure_logging()
+    
     # CONFIGURAÇÕES
     API_KEY = "SUA_API_KEY_AQUI"
     LOCATION = "-23.55052,-46.633308"  # São Paulo
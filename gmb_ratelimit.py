@@ -0,0 +1,105 @@
+"""
+Rate limiting e retry para chamadas à Places API
+Token bucket compartilhado por todas as instâncias e threads do processo,
+com backoff exponencial + jitter em erros transitórios
+"""
+
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+# Status da API que indicam falha transitória (vale tentar de novo)
+TRANSIENT_API_STATUSES = {"OVER_QUERY_LIMIT", "UNKNOWN_ERROR"}
+
+# Códigos HTTP transitórios
+TRANSIENT_HTTP_CODES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Token bucket thread-safe
+    
+    Libera até `burst` chamadas de imediato e depois `rate` chamadas por
+    segundo. Cada chamador reserva seu token sob o lock e espera fora dele,
+    então threads concorrentes são atendidas em ordem de chegada.
+    """
+    
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError("rate deve ser maior que zero")
+        
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+    
+    def reserve(self, tokens: float = 1) -> float:
+        """Reserva tokens sem esperar; retorna quanto tempo esperar por eles"""
+        with self._lock:
+            self._refill()
+            self._tokens -= tokens
+            return max(0.0, -self._tokens / self.rate)
+    
+    def wait_time(self, tokens: float = 1) -> float:
+        """Espera que `acquire(tokens)` teria agora, sem reservar nada"""
+        with self._lock:
+            self._refill()
+            return max(0.0, (tokens - self._tokens) / self.rate)
+    
+    def acquire(self, tokens: float = 1) -> float:
+        """Bloqueia até haver token disponível; retorna o tempo esperado"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+    
+    async def acquire_async(self, tokens: float = 1) -> float:
+        """Versão não bloqueante de `acquire` para asyncio"""
+        import asyncio  # Só quem usa asyncio paga a importação
+        
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+_shared_limiters: Dict[str, TokenBucket] = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_limiter(name: str, rate: float, burst: int = 1) -> TokenBucket:
+    """
+    Retorna o TokenBucket do processo associado a `name`
+    
+    O primeiro chamador define rate/burst; os demais recebem o mesmo
+    bucket, de modo que todos os analisadores dividem a mesma cota.
+    """
+    with _shared_lock:
+        limiter = _shared_limiters.get(name)
+        if limiter is None:
+            limiter = TokenBucket(rate, burst)
+            _shared_limiters[name] = limiter
+        return limiter
+
+
+@dataclass
+class RetryPolicy:
+    """Backoff exponencial com jitter ("full jitter")"""
+    max_retries: int = 3
+    base_delay: float = 2.0
+    max_delay: float = 30.0
+    
+    def delay(self, attempt: int, rng: Optional[random.Random] = None) -> float:
+        """Tempo de espera antes da tentativa `attempt + 1` (attempt começa em 0)"""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return (rng or random).uniform(0, ceiling)
@@ -0,0 +1,272 @@
+"""
+Geração de relatórios (CSV, Excel, JSON e resumo TXT)
+Cada formato é um writer registrado; só os formatos selecionados (ex.
+`reports.formats` do config.yaml) são gerados, em paralelo, a partir de
+agregados calculados uma única vez. O Excel é escrito em streaming
+(gmb_xlsx, XML gerado direto no zip), com memória constante
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+import pandas as pd
+
+from gmb_metrics import PHASE_SECONDS, MetricsRegistry, get_registry
+from gmb_tracing import Tracer, get_tracer
+from gmb_xlsx import StreamingXlsxWriter
+
+logger = logging.getLogger(__name__)
+
+STATS_COLUMNS = [
+    'rating', 'total_reviews', 'overall_strength_score',
+    'rating_quality_score', 'authority_score'
+]
+
+
+@dataclass
+class ReportContext:
+    """
+    Dados compartilhados pelos writers de uma geração de relatórios
+    
+    Os agregados (describe, resumo por categoria, top 10...) são
+    calculados uma vez em `prepare()` e lidos por todos os writers.
+    """
+    df: pd.DataFrame
+    keyword: str
+    output_path: Path
+    timestamp: str
+    generated_at: datetime
+    aggregates: Dict[str, object] = field(default_factory=dict)
+    
+    def path(self, prefix: str, extension: str) -> Path:
+        return self.output_path / f"{prefix}_{self.keyword}_{self.timestamp}.{extension}"
+    
+    def prepare(self, needs: Iterable[str]) -> None:
+        """Calcula os agregados pedidos pelos writers selecionados"""
+        df = self.df
+        for name in needs:
+            if name in self.aggregates:
+                continue
+            if name == "top10":
+                value = df.head(10)
+            elif name == "stats":
+                value = df[STATS_COLUMNS].describe()
+            elif name == "category_summary":
+                value = df.groupby('strength_category', observed=True).agg({
+                    'place_id': 'count',
+                    'overall_strength_score': 'mean',
+                    'total_reviews': 'mean',
+                    'rating': 'mean'
+                }).round(2)
+            elif name == "category_counts":
+                value = df['strength_category'].value_counts()
+            elif name == "means":
+                value = {
+                    column: df[column].mean()
+                    for column in ('overall_strength_score', 'rating', 'total_reviews')
+                }
+            else:
+                raise KeyError(f"Agregado desconhecido: {name}")
+            self.aggregates[name] = value
+
+
+@dataclass
+class ReportWriter:
+    """Writer registrado: `name` é a chave em reports.formats"""
+    name: str
+    result_key: str
+    write: Callable[[ReportContext], Path]
+    needs: tuple = ()
+
+
+REPORT_WRITERS: Dict[str, ReportWriter] = {}
+
+
+def register_writer(name: str, result_key: Optional[str] = None, needs: Iterable[str] = ()):
+    """
+    Registra um writer de relatório
+    
+    Exemplo:
+        @register_writer("html", needs=("top10",))
+        def write_html(ctx: ReportContext) -> Path:
+            ...
+    """
+    def decorator(func: Callable[[ReportContext], Path]) -> Callable[[ReportContext], Path]:
+        REPORT_WRITERS[name] = ReportWriter(name, result_key or name, func, tuple(needs))
+        return func
+    return decorator
+
+
+# ---------------------------------------------------------------------------
+# Writers
+# ---------------------------------------------------------------------------
+
+@register_writer("csv")
+def write_csv(ctx: ReportContext) -> Path:
+    csv_file = ctx.path("ranking_analysis", "csv")
+    ctx.df.to_csv(csv_file, index=False, encoding="utf-8-sig")
+    logger.info(f"CSV salvo: {csv_file}")
+    return csv_file
+
+
+@register_writer("excel", needs=("top10", "stats", "category_summary"))
+def write_excel(ctx: ReportContext) -> Path:
+    """Excel com múltiplas abas, escrito em streaming (gmb_xlsx)"""
+    excel_file = ctx.path("ranking_analysis", "xlsx")
+    aggregates = ctx.aggregates
+    
+    with StreamingXlsxWriter(excel_file) as writer:
+        writer.write_frame('Análise Completa', ctx.df)
+        writer.write_frame('Top 10', aggregates["top10"])
+        writer.write_frame('Estatísticas', aggregates["stats"], index=True)
+        writer.write_frame('Por Categoria', aggregates["category_summary"], index=True)
+    
+    logger.info(f"Excel salvo: {excel_file}")
+    return excel_file
+
+
+@register_writer("json")
+def write_json(ctx: ReportContext) -> Path:
+    json_file = ctx.path("ranking_analysis", "json")
+    ctx.df.to_json(json_file, orient='records', indent=2, force_ascii=False)
+    logger.info(f"JSON salvo: {json_file}")
+    return json_file
+
+
+@register_writer("txt_summary", result_key="report", needs=("top10", "means", "category_counts"))
+def write_summary(ctx: ReportContext) -> Path:
+    """Relatório resumido em texto"""
+    df = ctx.df
+    keyword = ctx.keyword
+    means = ctx.aggregates["means"]
+    report_file = ctx.output_path / f"summary_report_{keyword}_{ctx.timestamp}.txt"
+    
+    with open(report_file, 'w', encoding='utf-8') as f:
+        f.write("="*80 + "\n")
+        f.write(f"RELATÓRIO DE ANÁLISE DE RANQUEAMENTO - {keyword.upper()}\n")
+        f.write(f"Data: {ctx.generated_at.strftime('%d/%m/%Y %H:%M:%S')}\n")
+        f.write("="*80 + "\n\n")
+        
+        f.write(f"Total de perfis analisados: {len(df)}\n\n")
+        
+        f.write("TOP 10 RANKINGS:\n")
+        f.write("-"*80 + "\n")
+        for idx, row in ctx.aggregates["top10"].iterrows():
+            f.write(f"\n#{row['rank_position']} - {row['name']}\n")
+            f.write(f"   Score Geral: {row['overall_strength_score']:.2f} {row['strength_category']}\n")
+            f.write(f"   Rating: {row['rating']:.1f} ⭐ ({row['total_reviews']} reviews)\n")
+            f.write(f"   Distância: {row['distance_from_center']:.0f}m\n")
+            f.write(f"   Percentil: {row['percentile_rank']:.1f}%\n")
+        
+        f.write("\n" + "="*80 + "\n")
+        f.write("ESTATÍSTICAS GERAIS:\n")
+        f.write("-"*80 + "\n")
+        f.write(f"Score médio: {means['overall_strength_score']:.2f}\n")
+        f.write(f"Rating médio: {means['rating']:.2f}\n")
+        f.write(f"Média de reviews: {means['total_reviews']:.0f}\n")
+        
+        f.write("\n" + "="*80 + "\n")
+        f.write("DISTRIBUIÇÃO POR CATEGORIA:\n")
+        f.write("-"*80 + "\n")
+        for category, count in ctx.aggregates["category_counts"].items():
+            f.write(f"{category}: {count} perfis ({count/len(df)*100:.1f}%)\n")
+    
+    logger.info(f"Relatório resumido salvo: {report_file}")
+    return report_file
+
+
+# ---------------------------------------------------------------------------
+# Seleção e execução
+# ---------------------------------------------------------------------------
+
+def selected_writers(formats: Union[None, Dict[str, bool], Iterable[str]] = None) -> List[ReportWriter]:
+    """
+    Writers a executar
+    
+    Args:
+        formats: None (todos), dicionário no formato de reports.formats
+            ({"csv": True, "excel": False, ...}) ou lista de nomes
+    """
+    if formats is None:
+        names = list(REPORT_WRITERS)
+    elif isinstance(formats, dict):
+        names = [name for name, enabled in formats.items() if enabled]
+    else:
+        names = list(formats)
+    
+    writers = []
+    for name in names:
+        writer = REPORT_WRITERS.get(name)
+        if writer is None:
+            logger.warning(f"Formato de relatório não suportado: {name}")
+            continue
+        writers.append(writer)
+    return writers
+
+
+def write_reports(
+    df: pd.DataFrame,
+    keyword: str,
+    output_dir: str = "output",
+    formats: Union[None, Dict[str, bool], Iterable[str]] = None,
+    max_workers: Optional[int] = None,
+    tracer: Optional[Tracer] = None,
+    metrics: Optional[MetricsRegistry] = None
+) -> Dict[str, Path]:
+    """
+    Gera os relatórios selecionados em paralelo
+    
+    Cada writer roda dentro de um span "report" (atributo `format`) do
+    `tracer` e tem a duração registrada em gmb_phase_seconds{phase="report"}.
+    
+    Returns:
+        Dicionário chave -> arquivo ('csv', 'excel', 'json', 'report')
+    """
+    writers = selected_writers(formats)
+    tracer = tracer if tracer is not None else get_tracer()
+    metrics = metrics if metrics is not None else get_registry()
+    
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+    
+    generated_at = datetime.now()
+    ctx = ReportContext(
+        df=df,
+        keyword=keyword,
+        output_path=output_path,
+        timestamp=generated_at.strftime("%Y%m%d_%H%M%S"),
+        generated_at=generated_at
+    )
+    with tracer.span("report_aggregates", keyword=keyword, rows=len(df)):
+        ctx.prepare(need for writer in writers for need in writer.needs)
+    
+    def run(writer: ReportWriter) -> Path:
+        start = time.perf_counter()
+        with tracer.span("report", format=writer.name, keyword=keyword, rows=len(df)):
+            try:
+                return writer.write(ctx)
+            finally:
+                metrics.observe(
+                    PHASE_SECONDS, time.perf_counter() - start, phase="report", format=writer.name
+                )
+    
+    if len(writers) <= 1 or max_workers == 1:
+        return {writer.result_key: run(writer) for writer in writers}
+    
+    with ThreadPoolExecutor(max_workers=max_workers or len(writers)) as pool:
+        futures = {writer.result_key: pool.submit(run, writer) for writer in writers}
+        return {key: future.result() for key, future in futures.items()}
+
+
+def reports_from_config(config: Dict) -> Dict:
+    """Argumentos de write_reports/generate_reports a partir do config.yaml"""
+    reports = config.get("reports", {})
+    return {
+        "output_dir": reports.get("output_directory", "output"),
+        "formats": reports.get("formats"),
+    }
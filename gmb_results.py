@@ -0,0 +1,264 @@
+"""
+Representação colunar compacta dos resultados de análise
+Guarda os perfis como um array por coluna (struct-of-arrays) em vez de um
+ProfileMetrics por lugar: números em arrays NumPy, strength_category e
+analysis_date como categorias, e conversão para DataFrame sem copiar as
+colunas numéricas da tabela
+"""
+
+from array import array
+from collections.abc import Sequence
+from dataclasses import fields
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+
+from gmb_ranking_analyzer import AnalysisSummary, ProfileMetrics, ProfileScorer
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Ordem das colunas = ordem dos campos de ProfileMetrics
+COLUMNS = tuple(f.name for f in fields(ProfileMetrics))
+
+INT_COLUMNS = ("rank_position", "total_reviews")
+FLOAT_COLUMNS = (
+    "latitude", "longitude", "distance_from_center", "rating",
+    "review_velocity_score", "rating_quality_score", "completeness_score",
+    "authority_score", "relevance_score", "prominence_score",
+    "overall_strength_score", "percentile_rank", "gap_to_leader",
+)
+TEXT_COLUMNS = ("place_id", "name", "address", "vicinity", "phone", "website")
+CATEGORY_COLUMNS = ("strength_category", "analysis_date")
+
+# Ordem canônica das categorias de força (a de ProfileScorer)
+CATEGORY_ORDER = {
+    label: idx for idx, label in enumerate(
+        list(ProfileScorer.STRENGTH_CATEGORIES.values()) + [ProfileScorer.UNCLASSIFIED_CATEGORY]
+    )
+}
+
+
+class ProfileTable:
+    """
+    Perfis de uma ou mais análises em formato colunar
+    
+    Cada coluna numérica é um array NumPy; colunas de texto são arrays de
+    objetos (as strings não são duplicadas) e as categóricas guardam só os
+    códigos. `metrics` devolve a API antiga (sequência de ProfileMetrics)
+    como uma visão criada sob demanda.
+    """
+    
+    def __init__(self, columns: Dict[str, np.ndarray], categories: Dict[str, List[str]]):
+        self._columns = columns
+        self._categories = categories
+    
+    @classmethod
+    def from_metrics(cls, metrics_list: Iterable[ProfileMetrics]) -> "ProfileTable":
+        if isinstance(metrics_list, ProfileMetricsView):
+            return metrics_list.table
+        
+        builder = ProfileTableBuilder()
+        for metrics in metrics_list:
+            builder.append(metrics)
+        return builder.build(sort=False)
+    
+    def __len__(self) -> int:
+        return len(self._columns["rank_position"])
+    
+    def column(self, name: str) -> np.ndarray:
+        """Valores de uma coluna (categóricas são decodificadas)"""
+        if name in self._categories:
+            labels = np.array(self._categories[name], dtype=object)
+            return labels[self._columns[name]]
+        return self._columns[name]
+    
+    @property
+    def nbytes(self) -> int:
+        """Memória dos arrays (sem contar as strings referenciadas)"""
+        return sum(values.nbytes for values in self._columns.values())
+    
+    def take(self, indices) -> "ProfileTable":
+        """Nova tabela com as linhas em `indices` (na ordem dada)"""
+        indices = np.asarray(indices, dtype=np.intp)
+        return ProfileTable(
+            {name: values[indices] for name, values in self._columns.items()},
+            self._categories
+        )
+    
+    def sort_by_rank(self) -> "ProfileTable":
+        """
+        Tabela em ordem de rank_position
+        
+        Já ordenada, devolve a própria tabela; senão `take` copia cada coluna.
+        """
+        positions = self._columns["rank_position"]
+        if not len(positions) or (positions[1:] >= positions[:-1]).all():
+            return self
+        return self.take(np.argsort(positions, kind="stable"))
+    
+    def apply_summary(self, summary: AnalysisSummary) -> None:
+        """Preenche percentile_rank e gap_to_leader a partir do AnalysisSummary"""
+        positions = self._columns["rank_position"].tolist()
+        percentiles = summary.percentile_ranks
+        gaps = summary.gaps_to_leader
+        
+        self._columns["percentile_rank"][:] = [percentiles.get(pos, 0.0) for pos in positions]
+        self._columns["gap_to_leader"][:] = [gaps.get(pos, 0.0) for pos in positions]
+    
+    def to_dataframe(self) -> "pd.DataFrame":
+        """
+        DataFrame com as mesmas colunas de ProfileMetrics
+        
+        As colunas numéricas compartilham memória com a tabela;
+        strength_category e analysis_date saem como `category`.
+        """
+        import pandas as pd
+        
+        data = {}
+        for name in COLUMNS:
+            values = self._columns[name]
+            if name in self._categories:
+                data[name] = pd.Categorical.from_codes(values, self._categories[name])
+            else:
+                data[name] = values
+        return pd.DataFrame(data, copy=False)
+    
+    def row(self, idx: int) -> ProfileMetrics:
+        """Materializa a linha `idx` como ProfileMetrics"""
+        values = {}
+        for name in COLUMNS:
+            value = self._columns[name][idx]
+            if name in self._categories:
+                value = self._categories[name][value]
+            elif isinstance(value, np.generic):
+                value = value.item()
+            values[name] = value
+        return ProfileMetrics(**values)
+    
+    @property
+    def metrics(self) -> "ProfileMetricsView":
+        return ProfileMetricsView(self)
+    
+    def __iter__(self) -> Iterator[ProfileMetrics]:
+        return (self.row(idx) for idx in range(len(self)))
+
+
+class ProfileMetricsView(Sequence):
+    """
+    Sequência somente leitura de ProfileMetrics sobre uma ProfileTable
+    
+    Cada acesso cria um ProfileMetrics novo; alterá-lo não muda a tabela.
+    """
+    
+    def __init__(self, table: ProfileTable):
+        self.table = table
+    
+    def __len__(self) -> int:
+        return len(self.table)
+    
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self.table.row(i) for i in range(*idx.indices(len(self.table)))]
+        if idx < 0:
+            idx += len(self.table)
+        if not 0 <= idx < len(self.table):
+            raise IndexError("índice fora do intervalo")
+        return self.table.row(idx)
+    
+    def __iter__(self) -> Iterator[ProfileMetrics]:
+        return iter(self.table)
+    
+    def __repr__(self) -> str:
+        return f"<ProfileMetricsView de {len(self.table)} perfis>"
+
+
+class ProfileTableBuilder:
+    """
+    Monta uma ProfileTable incrementalmente
+    
+    Aceita os itens de `iter_analysis` diretamente: ProfileMetrics viram
+    linhas e o AnalysisSummary final é aplicado em `build()`.
+    """
+    
+    def __init__(self):
+        self._numeric = {name: array("q") for name in INT_COLUMNS}
+        self._numeric.update({name: array("d") for name in FLOAT_COLUMNS})
+        self._text: Dict[str, List] = {name: [] for name in TEXT_COLUMNS}
+        self._codes = {name: array("i") for name in CATEGORY_COLUMNS}
+        self._labels: Dict[str, Dict[str, int]] = {name: {} for name in CATEGORY_COLUMNS}
+        self.summary: Optional[AnalysisSummary] = None
+    
+    def __len__(self) -> int:
+        return len(self._numeric["rank_position"])
+    
+    def add(self, item: Union[ProfileMetrics, AnalysisSummary]) -> None:
+        if isinstance(item, AnalysisSummary):
+            self.summary = item
+        else:
+            self.append(item)
+    
+    def append(self, metrics: ProfileMetrics) -> None:
+        for name, values in self._numeric.items():
+            values.append(getattr(metrics, name) or 0)
+        for name, values in self._text.items():
+            values.append(getattr(metrics, name))
+        for name, codes in self._codes.items():
+            labels = self._labels[name]
+            label = getattr(metrics, name)
+            code = labels.get(label)
+            if code is None:
+                code = labels[label] = len(labels)
+            codes.append(code)
+    
+    def build(self, sort: bool = True) -> ProfileTable:
+        """
+        Cria a tabela (aplicando o AnalysisSummary recebido, se houver)
+        
+        As colunas numéricas reaproveitam a memória do builder, que não
+        deve receber novas linhas depois disso. Com `sort`, isso só vale se
+        as linhas já chegaram em ordem de rank_position; fora de ordem
+        (coleta paralela), cada coluna é copiada uma vez ao reordenar.
+        
+        Args:
+            sort: ordena por rank_position
+        """
+        columns: Dict[str, np.ndarray] = {}
+        
+        for name, values in self._numeric.items():
+            dtype = np.int64 if values.typecode == "q" else np.float64
+            # Sem cópia: o array NumPy usa o buffer do array.array
+            columns[name] = np.frombuffer(values, dtype=dtype) if values else np.empty(0, dtype)
+        
+        for name, values in self._text.items():
+            column = np.empty(len(values), dtype=object)
+            column[:] = values
+            columns[name] = column
+        
+        categories = {}
+        for name, codes in self._codes.items():
+            labels = list(self._labels[name])
+            order = _category_order(name, labels)
+            remap = np.empty(len(labels), dtype=np.int32)
+            remap[order] = np.arange(len(labels), dtype=np.int32)
+            raw = np.frombuffer(codes, dtype=np.int32) if codes else np.empty(0, np.int32)
+            columns[name] = remap[raw] if len(labels) else raw.copy()
+            categories[name] = [labels[idx] for idx in order]
+        
+        table = ProfileTable(columns, categories)
+        if self.summary is not None:
+            table.apply_summary(self.summary)
+        return table.sort_by_rank() if sort else table
+
+
+def _category_order(name: str, labels: List[str]) -> List[int]:
+    """
+    Índices de `labels` na ordem das categorias: a canônica para
+    strength_category e a cronológica (ISO) para analysis_date
+    """
+    if name == "strength_category":
+        return sorted(
+            range(len(labels)),
+            key=lambda idx: (CATEGORY_ORDER.get(labels[idx], len(CATEGORY_ORDER)), idx)
+        )
+    return sorted(range(len(labels)), key=lambda idx: labels[idx])
@@ -0,0 +1,176 @@
+"""
+Motor de scoring em lote (NumPy)
+Calcula os seis sub-scores, o score geral e a categoria de um conjunto
+inteiro de perfis de uma vez, com resultados idênticos aos métodos
+`calculate_*` aplicados linha a linha
+
+Os analisadores pontuam cada perfil assim que seus detalhes chegam
+(ProfileScorer.score_profile), então score_batch não está no caminho de
+run_analysis: hoje serve aos benchmarks (gmb_benchmarks) e a quem pontua
+um conjunto já carregado de uma vez. round_exact também é usado pelo
+gmb_leaderboard
+"""
+
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from gmb_ranking_analyzer import ProfileScorer
+
+
+def round_exact(values: np.ndarray, decimals: int = 2) -> np.ndarray:
+    """
+    Arredonda como o `round()` do Python
+    
+    np.round multiplica por 10**decimals antes de arredondar, o que pode
+    divergir do Python em valores muito próximos de um empate (.xx5).
+    Esses poucos casos são refeitos com `round()`.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    rounded = np.round(values, decimals)
+    
+    scaled = values * 10.0 ** decimals
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for idx in np.flatnonzero(near_tie):
+        rounded[idx] = round(float(values[idx]), decimals)
+    
+    return rounded
+
+
+def score_batch(
+    ratings: Sequence[float],
+    total_reviews: Sequence[int],
+    distances: Sequence[float],
+    photo_counts: Sequence[int],
+    field_masks: Dict[str, Sequence[bool]],
+    rank_positions: Sequence[int],
+    total_results,
+    radius,
+    relevance: Optional[Sequence[float]] = None,
+    names: Optional[Sequence[str]] = None,
+    types: Optional[Sequence[Sequence[str]]] = None,
+    vicinities: Optional[Sequence[str]] = None,
+    keyword: Optional[str] = None,
+    scorer: Optional[ProfileScorer] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Calcula todos os scores para colunas de perfis
+    
+    Args:
+        ratings, total_reviews, distances, photo_counts, rank_positions:
+            uma posição por perfil
+        field_masks: campo de COMPLETENESS_FIELDS -> presença por perfil
+            (campos ausentes do dicionário contam como não preenchidos;
+            "photos" é derivado de photo_counts)
+        total_results, radius: escalar ou um valor por perfil
+        relevance: relevance_score já calculado; se omitido e `names`,
+            `types`, `vicinities` e `keyword` forem informados, é calculado
+            por perfil (comparação de texto não é vetorizável); senão 0
+        scorer: instância cujos WEIGHTS/STRENGTH_CATEGORIES serão usados
+    
+    Returns:
+        Dicionário com as colunas de ProfileMetrics correspondentes
+        (sub-scores arredondados, overall_strength_score e strength_category)
+    """
+    scorer = scorer or ProfileScorer()
+    
+    rating = np.nan_to_num(np.asarray(ratings, dtype=np.float64))
+    reviews = np.nan_to_num(np.asarray(total_reviews, dtype=np.float64)).astype(np.int64)
+    distance = np.asarray(distances, dtype=np.float64)
+    photos = np.asarray(photo_counts, dtype=np.int64)
+    rank = np.asarray(rank_positions, dtype=np.int64)
+    total_results = np.asarray(total_results)
+    radius = np.asarray(radius)
+    n = len(rating)
+    
+    has_reviews = reviews != 0
+    
+    # Qualidade das avaliações
+    confidence_factor = np.minimum(np.log10(reviews + 1) / np.log10(500), 1.0)
+    rating_quality = np.where(
+        (rating != 0) & has_reviews,
+        ((rating / 5.0) * 100) * (0.5 + 0.5 * confidence_factor),
+        0.0
+    )
+    
+    # Velocidade de avaliações
+    review_velocity = np.where(has_reviews, np.minimum((reviews / 200) * 100, 100), 0.0)
+    
+    # Completude (mesma ordem de soma dos métodos por perfil)
+    completeness = np.zeros(n)
+    for field, weight in scorer.COMPLETENESS_FIELDS.items():
+        if field == "photos":
+            completeness = completeness + np.where(
+                photos > 0, weight * np.minimum(photos / 10, 1.0), 0.0
+            )
+        elif field in field_masks:
+            mask = np.asarray(field_masks[field], dtype=bool)
+            completeness = completeness + np.where(mask, weight, 0.0)
+    
+    # Autoridade
+    has_website = np.asarray(field_masks.get("website", np.zeros(n)), dtype=bool)
+    authority = np.where(
+        has_reviews,
+        np.minimum((reviews / 300) * 40, 40)
+        + np.where(rating != 0, (rating / 5.0) * 30, 0.0)
+        + np.where(has_website, 15, 0)
+        + np.minimum((photos / 20) * 15, 15),
+        0.0
+    )
+    
+    # Proeminência
+    prominence = (
+        ((total_results - rank + 1) / total_results) * 60
+        + np.maximum(0, (1 - distance / radius)) * 40
+    )
+    
+    # Relevância
+    if relevance is not None:
+        relevance = np.asarray(relevance, dtype=np.float64)
+    elif names is not None and types is not None and vicinities is not None and keyword:
+        relevance = np.fromiter(
+            (
+                scorer.calculate_relevance_score(name, keyword, place_types, vicinity)
+                for name, place_types, vicinity in zip(names, types, vicinities)
+            ),
+            dtype=np.float64,
+            count=n
+        )
+    else:
+        relevance = np.zeros(n)
+    
+    # Score geral
+    sub_scores = {
+        'rating_quality': rating_quality,
+        'review_velocity': review_velocity,
+        'completeness': completeness,
+        'authority': authority,
+        'prominence': prominence,
+        'relevance': relevance
+    }
+    overall = 0.0
+    for key, weight in scorer.WEIGHTS.items():
+        overall = overall + sub_scores.get(key, 0) * weight
+    overall = round_exact(np.broadcast_to(overall, (n,)))
+    
+    # Categoria
+    conditions = [
+        (overall >= min_score) & (overall < max_score)
+        for (min_score, max_score) in scorer.STRENGTH_CATEGORIES
+    ]
+    labels = np.array(
+        list(scorer.STRENGTH_CATEGORIES.values()) + [scorer.UNCLASSIFIED_CATEGORY],
+        dtype=object
+    )
+    category = labels[np.select(conditions, range(len(conditions)), default=len(conditions))]
+    
+    return {
+        'review_velocity_score': round_exact(review_velocity),
+        'rating_quality_score': round_exact(rating_quality),
+        'completeness_score': round_exact(completeness),
+        'authority_score': round_exact(authority),
+        'relevance_score': round_exact(relevance),
+        'prominence_score': round_exact(prominence),
+        'overall_strength_score': overall,
+        'strength_category': category
+    }
@@ -0,0 +1,222 @@
+"""
+Rastreamento (spans) das etapas da análise
+Os analisadores e generate_reports abrem spans em volta da busca, dos
+detalhes, da pontuação, dos percentis e de cada formato de relatório; um
+Tracer recebe o início e o fim de cada span. ChromeTraceRecorder grava
+o JSON do Chrome Trace (chrome://tracing, Perfetto) para inspecionar uma
+execução lenta em linha do tempo
+"""
+
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+# Linhas do tempo numeradas na ordem em que aparecem: id() de tasks e
+# identificadores de threads são reaproveitados depois que elas terminam
+_track_ids = itertools.count(1)
+
+# (task dona, linha do tempo): tasks filhas herdam o contexto da que as
+# criou, então o valor só vale para a própria task
+_task_track: ContextVar[Optional[Tuple[weakref.ref, int]]] = ContextVar("gmb_task_track", default=None)
+_thread_track = threading.local()
+
+
+def _current_track() -> int:
+    """Linha do tempo da task asyncio em execução ou, fora dela, da thread"""
+    # Sem asyncio importado não há task em execução (e não vale importá-lo aqui)
+    asyncio = sys.modules.get("asyncio")
+    try:
+        task = asyncio.current_task() if asyncio is not None else None
+    except RuntimeError:
+        task = None
+    
+    if task is not None:
+        owner = _task_track.get()
+        if owner is None or owner[0]() is not task:
+            owner = (weakref.ref(task), next(_track_ids))
+            _task_track.set(owner)
+        return owner[1]
+    
+    track = getattr(_thread_track, "track", None)
+    if track is None:
+        track = _thread_track.track = next(_track_ids)
+    return track
+
+
+class Span:
+    """Intervalo medido (perf_counter) com atributos livres"""
+    
+    __slots__ = ("name", "attributes", "start", "end", "track")
+    
+    def __init__(self, name: str, attributes: Dict[str, object]):
+        self.name = name
+        self.attributes = attributes
+        self.track = _current_track()
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+    
+    def set(self, **attributes) -> None:
+        """Adiciona atributos conhecidos só durante o span (ex. cache_hit)"""
+        self.attributes.update(attributes)
+    
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+
+class _NullSpan:
+    """Span e context manager sem efeito do NullTracer"""
+    
+    __slots__ = ()
+    
+    def __enter__(self) -> "_NullSpan":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        return None
+    
+    def set(self, **attributes) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """
+    Interface de rastreamento: subclasses sobrescrevem on_start/on_end
+    
+    Exemplo:
+        class LentosTracer(Tracer):
+            def on_end(self, span):
+                if span.duration > 2:
+                    print(span.name, span.attributes)
+        
+        analyzer = GoogleMapsRankingAnalyzer(API_KEY, tracer=LentosTracer())
+    """
+    
+    enabled = True
+    
+    def on_start(self, span: Span) -> None:
+        pass
+    
+    def on_end(self, span: Span) -> None:
+        pass
+    
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span]:
+        """Abre um span; exceções ficam no atributo `error`"""
+        span = Span(name, attributes)
+        self.on_start(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.attributes["error"] = type(e).__name__
+            raise
+        finally:
+            span.end = time.perf_counter()
+            self.on_end(span)
+
+
+class NullTracer(Tracer):
+    """Tracer padrão: não mede nada e custa uma chamada por span"""
+    
+    enabled = False
+    
+    def span(self, name: str, **attributes) -> _NullSpan:
+        return _NULL_SPAN
+
+
+NULL_TRACER = NullTracer()
+
+
+class CallbackTracer(Tracer):
+    """Tracer a partir de funções on_start(span) / on_end(span)"""
+    
+    def __init__(
+        self,
+        on_start: Optional[Callable[[Span], None]] = None,
+        on_end: Optional[Callable[[Span], None]] = None
+    ):
+        if on_start is not None:
+            self.on_start = on_start
+        if on_end is not None:
+            self.on_end = on_end
+
+
+class ChromeTraceRecorder(Tracer):
+    """
+    Guarda os spans como eventos "X" do formato Chrome Trace
+    
+    Cada thread ou task asyncio vira uma linha do tempo; os atributos
+    aparecem em "args" ao selecionar o evento.
+    
+    Exemplo:
+        recorder = ChromeTraceRecorder()
+        analyzer = GoogleMapsRankingAnalyzer(API_KEY, tracer=recorder)
+        metrics, df = analyzer.run_analysis(...)
+        generate_reports(df, "padaria", tracer=recorder)
+        recorder.export("output/trace.json")  # abrir em ui.perfetto.dev
+    """
+    
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.events: List[Dict] = []
+        self._tracks: Dict[int, int] = {}
+        self._lock = threading.Lock()
+    
+    def on_end(self, span: Span) -> None:
+        with self._lock:
+            tid = self._tracks.setdefault(span.track, len(self._tracks) + 1)
+            self.events.append({
+                "name": span.name,
+                "ph": "X",
+                "ts": round((span.start - self.origin) * 1e6, 3),
+                "dur": round((span.end - span.start) * 1e6, 3),
+                "pid": self.pid,
+                "tid": tid,
+                "args": {key: _json_value(value) for key, value in span.attributes.items()},
+            })
+    
+    def clear(self) -> None:
+        with self._lock:
+            self.events.clear()
+    
+    def export(self, path: Union[str, Path]) -> Path:
+        """Grava {"traceEvents": [...]} em `path`"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            events = sorted(self.events, key=lambda event: event["ts"])
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+        return path
+
+
+def _json_value(value: object) -> object:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+# Tracer usado quando nenhum é informado aos analisadores / generate_reports
+_default_tracer: Tracer = NULL_TRACER
+
+
+def set_tracer(tracer: Optional[Tracer]) -> None:
+    """Define o tracer padrão do processo (None volta ao NullTracer)"""
+    global _default_tracer
+    _default_tracer = tracer if tracer is not None else NULL_TRACER
+
+
+def get_tracer() -> Tracer:
+    return _default_tracer
@@ -0,0 +1,269 @@
+"""
+Escrita de .xlsx em streaming
+Gera o XML das planilhas diretamente no zip (SpreadsheetML mínimo, com
+strings inline): as linhas vão para o arquivo à medida que são montadas,
+sem manter as células em memória, e o XML é montado coluna a coluna (sem
+um objeto por célula do DataFrame). Serializar célula a célula pelo
+openpyxl dominava o tempo dos relatórios grandes
+"""
+
+import io
+import math
+import os
+import re
+import zipfile
+from contextlib import suppress
+from typing import Iterator, List, Optional, Sequence, Set
+from xml.sax.saxutils import escape, quoteattr
+
+import numpy as np
+import pandas as pd
+
+# Limite de linhas de uma aba do Excel (incluindo o cabeçalho)
+EXCEL_MAX_ROWS = 1_048_576
+
+# Tamanho máximo do nome de uma aba
+SHEET_NAME_MAX = 31
+
+# Linhas convertidas por vez
+ROWS_PER_BLOCK = 10_000
+
+# Caracteres de controle não permitidos em XML 1.0
+_INVALID_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+# Caracteres que o Excel não aceita no nome de uma aba
+_INVALID_SHEET_NAME = re.compile(r"[\[\]:*?/\\]")
+
+_MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+_XML_DECL = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml."
+
+# Estilo 1 = cabeçalho (mesmo do pandas.to_excel: negrito, borda fina, centralizado)
+_STYLES = (
+    f'{_XML_DECL}<styleSheet xmlns="{_MAIN_NS}">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="2"><border><left/><right/><top/><bottom/><diagonal/></border>'
+    '<border><left style="thin"/><right style="thin"/><top style="thin"/>'
+    '<bottom style="thin"/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="1" xfId="0" applyFont="1" '
+    'applyBorder="1" applyAlignment="1"><alignment horizontal="center" vertical="top"/></xf>'
+    '</cellXfs><cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+
+def sheet_name(title: str, used: Set[str]) -> str:
+    """
+    Nome de aba válido e único (sem diferenciar maiúsculas) a partir de `title`
+    
+    Remove os caracteres proibidos, corta em 31 caracteres e, se o nome já
+    existir, troca o final por "~2", "~3"...
+    """
+    base = _INVALID_SHEET_NAME.sub("", title).strip("'") or "Planilha"
+    name = base[:SHEET_NAME_MAX]
+    suffix = 1
+    while name.casefold() in used:
+        suffix += 1
+        tag = f"~{suffix}"
+        name = base[:SHEET_NAME_MAX - len(tag)] + tag
+    used.add(name.casefold())
+    return name
+
+
+def _text(value: str) -> str:
+    return escape(_INVALID_XML.sub("", value))
+
+
+def _column_letter(idx: int) -> str:
+    """Letra da coluna de índice `idx` (0 = "A")"""
+    letters = ""
+    idx += 1
+    while idx:
+        idx, rem = divmod(idx - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _string_cell(ref: str, text: str, style: str = "") -> str:
+    return f'<c r="{ref}"{style} t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _column_cells(values: pd.Series, letter: str, rows: range) -> List[str]:
+    """XML das células de uma coluna (NaN/NA viram célula vazia)"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        labels = [_text(str(label)) for label in values.cat.categories]
+        codes = values.cat.codes.to_numpy().tolist()
+        return [
+            _string_cell(f"{letter}{row}", labels[code]) if code >= 0 else ""
+            for row, code in zip(rows, codes)
+        ]
+    
+    kind = values.dtype.kind
+    if kind == "b" and not values.hasnans:
+        return [
+            f'<c r="{letter}{row}" t="b"><v>{int(value)}</v></c>'
+            for row, value in zip(rows, values.tolist())
+        ]
+    if kind in "iu" and not values.hasnans:
+        return [f'<c r="{letter}{row}"><v>{value}</v></c>' for row, value in zip(rows, values.tolist())]
+    if kind == "f":
+        array = values.to_numpy(dtype=np.float64, na_value=np.nan)
+        finite = np.isfinite(array)
+        return [
+            f'<c r="{letter}{row}"><v>{value!r}</v></c>' if ok else ""
+            for row, value, ok in zip(rows, array.tolist(), finite.tolist())
+        ]
+    
+    cells = []
+    for row, value in zip(rows, values.tolist()):
+        if value is None or value is pd.NA or (isinstance(value, float) and not math.isfinite(value)):
+            cells.append("")
+        elif isinstance(value, (bool, np.bool_)):
+            cells.append(f'<c r="{letter}{row}" t="b"><v>{int(value)}</v></c>')
+        elif isinstance(value, (int, np.integer)):
+            cells.append(f'<c r="{letter}{row}"><v>{int(value)}</v></c>')
+        elif isinstance(value, (float, np.floating)):
+            cells.append(f'<c r="{letter}{row}"><v>{float(value)!r}</v></c>')
+        else:
+            cells.append(_string_cell(f"{letter}{row}", _text(str(value))))
+    return cells
+
+
+class StreamingXlsxWriter:
+    """
+    Escreve um .xlsx aba por aba, em blocos de linhas
+    
+    Exemplo:
+        with StreamingXlsxWriter("saida.xlsx") as writer:
+            writer.write_frame("Dados", df)
+            writer.write_frame("Resumo", resumo, index=True)
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self._zip = zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED, compresslevel=1)
+        self._used: Set[str] = set()
+        self._sheets: List[str] = []
+    
+    def __enter__(self) -> "StreamingXlsxWriter":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+            return
+        # Erro no meio da escrita: não deixa um .xlsx incompleto
+        self._zip.close()
+        with suppress(OSError, TypeError):
+            os.remove(self.path)
+    
+    def write_frame(self, title: str, frame: pd.DataFrame, index: bool = False) -> List[str]:
+        """
+        Adiciona o DataFrame como aba(s)
+        
+        Acima do limite de linhas do Excel, continua em abas
+        "titulo (2)", "titulo (3)"... Retorna os nomes das abas criadas
+        (já ajustados por sheet_name).
+        """
+        if index:
+            frame = frame.reset_index()
+            first = frame.columns[0]
+            if first == "index":
+                frame = frame.rename(columns={first: ""})
+        
+        rows_per_sheet = EXCEL_MAX_ROWS - 1
+        chunks = max(1, math.ceil(len(frame) / rows_per_sheet))
+        names = []
+        
+        for chunk in range(chunks):
+            suffix = "" if chunk == 0 else f" ({chunk + 1})"
+            name = sheet_name(title[:SHEET_NAME_MAX - len(suffix)] + suffix, self._used)
+            part = frame.iloc[chunk * rows_per_sheet:(chunk + 1) * rows_per_sheet]
+            self._write_sheet(name, part)
+            names.append(name)
+        return names
+    
+    def _write_sheet(self, name: str, frame: pd.DataFrame) -> None:
+        self._sheets.append(name)
+        letters = [_column_letter(idx) for idx in range(frame.shape[1])]
+        header = "".join(
+            _string_cell(f"{letter}1", _text(str(column)), ' s="1"')
+            for letter, column in zip(letters, frame.columns)
+        )
+        
+        entry = self._zip.open(f"xl/worksheets/sheet{len(self._sheets)}.xml", "w")
+        with io.TextIOWrapper(entry, encoding="utf-8") as out:
+            out.write(f'{_XML_DECL}<worksheet xmlns="{_MAIN_NS}"><sheetData><row r="1">{header}</row>')
+            for block in _row_blocks(frame, letters):
+                out.write(block)
+            out.write("</sheetData></worksheet>")
+    
+    def close(self) -> None:
+        if not self._sheets:
+            # O Excel não abre pastas de trabalho sem nenhuma aba
+            self._write_sheet(sheet_name("Planilha", self._used), pd.DataFrame())
+        
+        count = len(self._sheets)
+        sheets = "".join(
+            f'<sheet name={quoteattr(name)} sheetId="{idx}" r:id="rId{idx}"/>'
+            for idx, name in enumerate(self._sheets, 1)
+        )
+        sheet_types = "".join(
+            f'<Override PartName="/xl/worksheets/sheet{idx}.xml" '
+            f'ContentType="{_CONTENT_TYPE}worksheet+xml"/>'
+            for idx in range(1, count + 1)
+        )
+        sheet_rels = "".join(
+            f'<Relationship Id="rId{idx}" Type="{_REL_NS}/worksheet" Target="worksheets/sheet{idx}.xml"/>'
+            for idx in range(1, count + 1)
+        )
+        
+        self._zip.writestr("[Content_Types].xml", (
+            f'{_XML_DECL}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            f'<Override PartName="/xl/workbook.xml" ContentType="{_CONTENT_TYPE}sheet.main+xml"/>'
+            f'<Override PartName="/xl/styles.xml" ContentType="{_CONTENT_TYPE}styles+xml"/>'
+            f'{sheet_types}</Types>'
+        ))
+        self._zip.writestr("_rels/.rels", (
+            f'{_XML_DECL}<Relationships xmlns="{_PKG_REL_NS}">'
+            f'<Relationship Id="rId1" Type="{_REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+            '</Relationships>'
+        ))
+        self._zip.writestr("xl/workbook.xml", (
+            f'{_XML_DECL}<workbook xmlns="{_MAIN_NS}" xmlns:r="{_REL_NS}">'
+            f'<sheets>{sheets}</sheets></workbook>'
+        ))
+        self._zip.writestr("xl/_rels/workbook.xml.rels", (
+            f'{_XML_DECL}<Relationships xmlns="{_PKG_REL_NS}">{sheet_rels}'
+            f'<Relationship Id="rId{count + 1}" Type="{_REL_NS}/styles" Target="styles.xml"/>'
+            '</Relationships>'
+        ))
+        self._zip.writestr("xl/styles.xml", _STYLES)
+        self._zip.close()
+
+
+def _row_blocks(
+    frame: pd.DataFrame,
+    letters: Sequence[str],
+    rows_per_block: Optional[int] = None
+) -> Iterator[str]:
+    """XML das linhas de dados (a partir da linha 2), em blocos de `rows_per_block`"""
+    step = rows_per_block or ROWS_PER_BLOCK
+    for start in range(0, len(frame), step):
+        block = frame.iloc[start:start + step]
+        rows = range(start + 2, start + 2 + len(block))
+        columns = [
+            _column_cells(block.iloc[:, idx], letter, rows) for idx, letter in enumerate(letters)
+        ]
+        yield "".join(
+            f'<row r="{row}">{"".join(cells)}</row>' for row, *cells in zip(rows, *columns)
+        )
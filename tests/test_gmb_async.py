@@ -0,0 +1,76 @@
+"""
+Falhas de rede e de payload no analisador assíncrono
+"""
+
+import asyncio
+import inspect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from gmb_async import AsyncGoogleMapsRankingAnalyzer
+from gmb_ranking_analyzer import GoogleMapsRankingAnalyzer
+
+PLACE = {
+    "place_id": "lugar-1", "name": "Padaria Central", "rating": 4.5, "user_ratings_total": 120,
+    "vicinity": "Rua Augusta, 100", "geometry": {"location": {"lat": -23.551, "lng": -46.631}},
+}
+
+
+class NotJsonHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = b"<html>erro no proxy</html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), NotJsonHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_invalid_json_returns_error_payload_like_sync(base_url):
+    async def run():
+        async with AsyncGoogleMapsRankingAnalyzer("chave", base_url=base_url, qps=0) as analyzer:
+            details = await analyzer.get_place_details("lugar-1")
+            search = await analyzer.search_places("-23.55,-46.63", 1000, "padaria")
+            return details, search
+    
+    details, search = asyncio.run(run())
+    sync = GoogleMapsRankingAnalyzer("chave", base_url=base_url, qps=0)
+    
+    assert details["status"] == sync.get_place_details("lugar-1")["status"] == "ERROR"
+    assert search["status"] == sync.search_places("-23.55,-46.63", 1000, "padaria")["status"] == "ERROR"
+
+
+def test_analyze_profile_signature_matches_sync():
+    sync = inspect.signature(GoogleMapsRankingAnalyzer.analyze_profile)
+    
+    assert inspect.signature(AsyncGoogleMapsRankingAnalyzer.analyze_profile) == sync
+    
+    async def run():
+        async with AsyncGoogleMapsRankingAnalyzer("chave", qps=0) as analyzer:
+            return await analyzer.analyze_profile(
+                PLACE, 1, -23.55, -46.63, 1000, "padaria", 1,
+                details={"result": {}, "status": "OK"}, analysis_date="2024-01-01", distance=123.4
+            )
+    
+    metrics = asyncio.run(run())
+    expected = GoogleMapsRankingAnalyzer("chave", qps=0).analyze_profile(
+        PLACE, 1, -23.55, -46.63, 1000, "padaria", 1,
+        details={"result": {}, "status": "OK"}, analysis_date="2024-01-01", distance=123.4
+    )
+    assert metrics == expected
+    assert metrics.distance_from_center == 123.4
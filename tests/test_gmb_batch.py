@@ -0,0 +1,59 @@
+"""
+Lote de jobs (gmb_batch.run_batch) com detalhes compartilhados entre jobs
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from gmb_batch import SharedDetailFetcher, run_batch
+from gmb_emulator import EmulatorConfig, LatencyModel, PlacesAPIEmulator
+from gmb_ranking_analyzer import GoogleMapsRankingAnalyzer
+
+LOCATION = "-23.55,-46.63"
+
+
+def make_analyzer(emulator):
+    return GoogleMapsRankingAnalyzer(
+        "chave", base_url=emulator.base_url, qps=0, page_token_delay=0.05, max_workers=8
+    )
+
+
+def test_overlapping_jobs_fetch_each_place_once():
+    # Mesmo conjunto de lugares para as duas palavras-chave: sobreposição grande
+    config = EmulatorConfig(
+        market_size=60, pool_size=80, token_ready_delay=0.05,
+        details_latency=LatencyModel(mean_ms=20)
+    )
+    jobs = [(LOCATION, 2000, "padaria", 3), (LOCATION, 2000, "cafe", 3)]
+    
+    with PlacesAPIEmulator(config) as emulator:
+        result = run_batch(make_analyzer(emulator), jobs)
+        detail_calls = emulator.stats["details"]
+    
+    frames = list(result.frames.values())
+    ids = [set(frame["place_id"]) for frame in frames]
+    shared = ids[0] & ids[1]
+    assert all(len(frame) == 60 for frame in frames)
+    assert shared  # os jobs têm lugares em comum
+    
+    assert detail_calls == len(ids[0] | ids[1]) == result.stats["unique_places"]
+    assert result.stats["detail_requests"] == 120
+    
+    # O lugar repetido recebe os mesmos detalhes nos dois jobs
+    columns = ["place_id", "phone", "website", "total_reviews"]
+    first, second = (frame[columns].set_index("place_id").loc[sorted(shared)] for frame in frames)
+    assert first.equals(second)
+
+
+def test_fetcher_shares_one_future_per_place():
+    with PlacesAPIEmulator(EmulatorConfig(market_size=20)) as emulator:
+        analyzer = make_analyzer(emulator)
+        place = {"place_id": "EMU_INEXISTENTE"}
+        
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            fetcher = SharedDetailFetcher(analyzer, pool)
+            futures = [fetcher.submit(place) for _ in range(3)]
+            futures[0].result()
+        
+        assert futures[0] is futures[1] is futures[2]
+        assert (fetcher.requested, fetcher.unique) == (3, 1)
+        assert emulator.stats["details"] == 1
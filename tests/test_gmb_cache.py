@@ -0,0 +1,105 @@
+"""
+Cache persistente de detalhes (gmb_cache.PlaceDetailsCache)
+"""
+
+import math
+import time
+
+from gmb_cache import PlaceDetailsCache
+from gmb_emulator import NEARBY_SEARCH_ROUTE, EmulatorConfig, PlacesAPIEmulator
+from gmb_fields import FETCHED_AT_KEY
+from gmb_ranking_analyzer import GoogleMapsRankingAnalyzer
+
+SEARCH = {"location": "-23.55,-46.63", "radius": "1000", "keyword": "padaria"}
+
+
+def age_entry(cache, place_id, hours):
+    cache._connect().execute(
+        "UPDATE place_details SET created_at = ? WHERE place_id = ?",
+        (time.time() - hours * 3600, place_id)
+    )
+
+
+def test_incremental_retention_keeps_default_ttl(tmp_path):
+    cache = PlaceDetailsCache.from_config({
+        "enable_cache": True,
+        "cache_file": str(tmp_path / "cache.sqlite"),
+        "cache_expiry_hours": 24,
+        "incremental": {"enabled": True, "max_age_hours": 168},
+    })
+    cache.set("lugar", {"status": "OK"})
+    age_entry(cache, "lugar", 48)
+    
+    assert cache.get("lugar") is None
+    assert cache.peek("lugar") is None
+    assert cache.get("lugar", max_age=168 * 3600) == {"status": "OK"}
+    
+    age_entry(cache, "lugar", 200)
+    assert cache.get("lugar", max_age=1000 * 3600) is None
+    assert len(cache) == 0
+
+
+def test_peek_does_not_touch_lru_or_expired_rows(tmp_path):
+    cache = PlaceDetailsCache(tmp_path / "cache.sqlite", ttl_hours=1)
+    cache.set("novo", {"status": "OK"})
+    cache.set("velho", {"status": "OK"})
+    age_entry(cache, "velho", 2)
+    conn = cache._connect()
+    before = conn.execute("SELECT place_id, accessed_at FROM place_details ORDER BY place_id").fetchall()
+    
+    assert cache.peek("novo") == {"status": "OK"}
+    assert cache.peek("velho") is None
+    assert "velho" not in cache
+    assert conn.execute("SELECT place_id, accessed_at FROM place_details ORDER BY place_id").fetchall() == before
+
+
+def age_record(cache, place_id, hours):
+    """Envelhece a linha e o _fetched_at do registro (como se fosse buscado há `hours`)"""
+    record = cache.peek(place_id, max_age=math.inf)
+    record[FETCHED_AT_KEY] -= hours * 3600
+    cache.set(place_id, record, created_at=record[FETCHED_AT_KEY])
+
+
+def created_at(cache, place_id):
+    return cache._connect().execute(
+        "SELECT created_at FROM place_details WHERE place_id = ?", (place_id,)
+    ).fetchone()[0]
+
+
+def test_incremental_merge_keeps_original_age(tmp_path):
+    cache = PlaceDetailsCache(tmp_path / "cache.sqlite", ttl_hours=24, retention_hours=168)
+    
+    with PlacesAPIEmulator(EmulatorConfig()) as emulator:
+        place = emulator.handle(NEARBY_SEARCH_ROUTE, SEARCH)[1]["results"][0]
+        place_id = place["place_id"]
+        
+        def lookup(fields):
+            # Analisador novo a cada consulta: só o cache em disco é compartilhado
+            analyzer = GoogleMapsRankingAnalyzer(
+                "chave", base_url=emulator.base_url, qps=0,
+                persistent_cache=cache, incremental_max_age_hours=48
+            )
+            analyzer.get_place_details(place_id, fields, signature=analyzer.detail_signature(place))
+            return analyzer.detail_stats
+        
+        lookup(["name"])
+        age_record(cache, place_id, 10)
+        original = created_at(cache, place_id)
+        
+        # Campo novo: busca só ele e mescla sem rejuvenescer os campos antigos
+        assert lookup(["name", "formatted_address"]) == {"fetched": 1}
+        assert created_at(cache, place_id) == original
+        record = cache.peek(place_id, max_age=math.inf)
+        assert record[FETCHED_AT_KEY] == original
+        assert {"name", "formatted_address"} <= set(record["result"])
+        
+        # Dentro de incremental_max_age: reaproveitado sem chamar a API
+        assert lookup(["name", "formatted_address"]) == {"reused": 1}
+        assert emulator.stats["details"] == 2
+        
+        # Os campos mais antigos passam da idade: a leitura no disco já
+        # descarta o registro e ele é buscado de novo por inteiro
+        age_record(cache, place_id, 40)
+        assert lookup(["name", "formatted_address"]) == {"fetched": 1}
+        assert time.time() - created_at(cache, place_id) < 60
+        assert emulator.stats["details"] == 3
@@ -0,0 +1,27 @@
+"""
+Emulador local da Places API (gmb_emulator)
+"""
+
+import time
+
+from gmb_emulator import NEARBY_SEARCH_ROUTE, EmulatorConfig, PlacesAPIEmulator
+
+SEARCH = {"location": "-23.55,-46.63", "radius": "1000", "keyword": "padaria"}
+
+
+def test_page_tokens_are_removed_when_used_or_expired():
+    config = EmulatorConfig(market_size=60, token_ready_delay=0.0, token_ttl=0.2)
+    with PlacesAPIEmulator(config) as emulator:
+        _, first = emulator.handle(NEARBY_SEARCH_ROUTE, SEARCH)
+        token = first["next_page_token"]
+        _, second = emulator.handle(NEARBY_SEARCH_ROUTE, {"pagetoken": token})
+        assert second["status"] == "OK"
+        assert token not in emulator._tokens
+        assert emulator.handle(NEARBY_SEARCH_ROUTE, {"pagetoken": token})[1]["status"] == "INVALID_REQUEST"
+        
+        # Tokens nunca usados expiram e saem na próxima emissão
+        for _ in range(50):
+            emulator.handle(NEARBY_SEARCH_ROUTE, SEARCH)
+        time.sleep(0.25)
+        emulator.handle(NEARBY_SEARCH_ROUTE, SEARCH)
+        assert len(emulator._tokens) == 1
@@ -0,0 +1,30 @@
+"""
+Rastreamento em grade (gmb_grid.run_grid) contra o emulador local
+"""
+
+import warnings
+
+import numpy as np
+
+from gmb_emulator import EmulatorConfig, PlacesAPIEmulator
+from gmb_grid import run_grid
+from gmb_planner import CallBudget
+from gmb_ranking_analyzer import GoogleMapsRankingAnalyzer
+
+
+def test_summary_without_scores_emits_no_warning():
+    config = EmulatorConfig(market_size=20, pool_size=40, token_ready_delay=0.05)
+    with PlacesAPIEmulator(config) as emulator:
+        budget = CallBudget(max_run_calls=15, on_exhausted="stop")
+        analyzer = GoogleMapsRankingAnalyzer(
+            "chave", base_url=emulator.base_url, qps=0, max_workers=1, budget=budget
+        )
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            result = run_grid(analyzer, "-23.55,-46.63", "padaria", size=3)
+    
+    summary = result.summary
+    unscored = summary["avg_overall_score"].isna()
+    assert unscored.any() and not unscored.all()
+    assert np.isfinite(summary["avg_rank"]).all()
+    assert np.isfinite(summary["best_rank"]).all()
@@ -0,0 +1,136 @@
+"""
+Histórico de ranqueamento (gmb_history.HistoryStore): variações entre execuções
+"""
+
+import math
+
+import pandas as pd
+import pytest
+
+from gmb_history import HistoryStore
+from gmb_results import COLUMNS
+
+KEYWORD = "padaria"
+LOCATION = "-23.55,-46.63"
+
+# Posições por execução: D aparece na 2ª, C sai na 2ª e volta na 3ª;
+# A e B caem 2 posições na 3ª (empate)
+RUNS = [
+    ("2024-01-01", ["A", "B", "C"]),
+    ("2024-01-02", ["B", "A", "D"]),
+    ("2024-01-03", ["C", "D", "B", "A"]),
+]
+
+
+def frame(place_ids, analysis_date):
+    rows = []
+    for rank, place_id in enumerate(place_ids, 1):
+        row = dict.fromkeys(COLUMNS, 0.0)
+        row.update(
+            place_id=place_id, name=f"Lugar {place_id}", rank_position=rank,
+            address="", vicinity="", phone=None, website=None,
+            total_reviews=10 * rank, overall_strength_score=100.0 - 10 * rank,
+            strength_category="📊 BOM", analysis_date=analysis_date,
+        )
+        rows.append(row)
+    return pd.DataFrame(rows, columns=list(COLUMNS))
+
+
+@pytest.fixture
+def history(tmp_path):
+    with HistoryStore(tmp_path / "historico.sqlite") as store:
+        yield store
+
+
+def record(history, runs):
+    return [history.record(frame(ids, day), KEYWORD, LOCATION) for day, ids in runs]
+
+
+def test_deltas_first_appearance_drop_out_and_return(history):
+    record(history, RUNS)
+    
+    deltas = history.deltas(keyword=KEYWORD).set_index(["place_id", "analysis_date"])
+    change = deltas["rank_change"]
+    
+    # Primeira execução de cada lugar não tem anterior
+    for key in [("A", "2024-01-01"), ("B", "2024-01-01"), ("C", "2024-01-01"), ("D", "2024-01-02")]:
+        assert math.isnan(change[key])
+        assert math.isnan(deltas.loc[key, "previous_rank"])
+    
+    assert change[("A", "2024-01-02")] == -1
+    assert change[("B", "2024-01-02")] == 1
+    assert deltas.loc[("B", "2024-01-02"), "score_change"] == 10.0
+    # C não tem linha na execução em que ficou de fora; ao voltar compara
+    # com a última em que apareceu
+    assert ("C", "2024-01-02") not in change.index
+    assert change[("C", "2024-01-03")] == 2
+    assert len(deltas) == 10
+    
+    only_a = history.deltas(place_id="A", start="2024-01-02")
+    assert only_a["rank_change"].tolist() == [-1, -2]
+
+
+def test_top_movers_skip_places_missing_from_either_run(history):
+    record(history, RUNS[:2])
+    
+    movers = history.top_movers(KEYWORD, LOCATION)
+    
+    assert movers[["place_id", "previous_rank", "rank_position", "rank_change"]].values.tolist() == [
+        ["B", 2, 1, 1], ["A", 1, 2, -1]
+    ]
+
+
+def test_top_movers_ties_and_direction(history):
+    record(history, RUNS)
+    
+    both = history.top_movers(KEYWORD, LOCATION)
+    # Empate em |rank_change|: desempata pela posição atual
+    assert both["place_id"].tolist() == ["B", "A", "D"]
+    assert history.top_movers(KEYWORD, LOCATION, limit=1)["place_id"].tolist() == ["B"]
+    
+    assert history.top_movers(KEYWORD, LOCATION, direction="up")["place_id"].tolist() == ["D"]
+    assert history.top_movers(KEYWORD, LOCATION, direction="down")["rank_change"].tolist() == [-2, -2]
+    
+    # Contra a 1ª execução: C está nas duas e D não estava lá
+    since = history.top_movers(KEYWORD, LOCATION, since="2024-01-01")
+    assert since.set_index("place_id")["rank_change"].to_dict() == {"A": -3, "B": -1, "C": 2}
+    
+    with pytest.raises(ValueError):
+        history.top_movers(KEYWORD, LOCATION, direction="lado")
+
+
+def test_top_movers_needs_two_runs(history):
+    record(history, RUNS[:1])
+    
+    movers = history.top_movers(KEYWORD, LOCATION)
+    
+    assert movers.empty
+    assert "rank_change" in movers.columns
+
+
+def test_latest_change(history):
+    record(history, RUNS[:2])
+    # D só apareceu uma vez; C ficou de fora da última, mas só tem um snapshot
+    assert history.latest_change("D", KEYWORD, LOCATION) is None
+    assert history.latest_change("C", KEYWORD, LOCATION) is None
+    
+    record(history, RUNS[2:])
+    assert history.latest_change("C", KEYWORD, LOCATION) == {
+        "analysis_date": "2024-01-03",
+        "previous_date": "2024-01-01",
+        "rank_position": 1,
+        "previous_rank": 3,
+        "rank_change": 2,
+        "score_change": 20.0,
+        "reviews_change": -20,
+    }
+    assert history.latest_change("A", "cafe", LOCATION) is None
+
+
+def test_same_date_runs_are_ordered_by_run_id(history):
+    # Duas execuções no mesmo dia: a gravada por último é a atual
+    record(history, [("2024-01-05", ["A", "B"]), ("2024-01-05", ["B", "A"])])
+    
+    assert history.latest_change("A", KEYWORD, LOCATION)["rank_change"] == -1
+    assert history.top_movers(KEYWORD, LOCATION)["place_id"].tolist() == ["B", "A"]
+    assert history.latest_place_ids(KEYWORD, LOCATION) == ["B", "A"]
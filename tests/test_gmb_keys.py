@@ -0,0 +1,112 @@
+"""
+Pool de chaves (gmb_keys.ApiKeyPool): cooldown após OVER_QUERY_LIMIT e
+chave fixa por next_page_token
+"""
+
+import time
+
+import pytest
+
+from gmb_emulator import EmulatorConfig, PlacesAPIEmulator
+from gmb_keys import MAX_PINNED_TOKENS, ApiKeyPool, KeyBenched, QuotaExhausted
+from gmb_ranking_analyzer import NEARBY_SEARCH_PATH, GoogleMapsRankingAnalyzer
+
+
+def make_pool(**kwargs):
+    return ApiKeyPool(["CHAVE_AAAA", "CHAVE_BBBB"], **kwargs)
+
+
+def test_benched_key_is_skipped_and_cooldown_doubles():
+    pool = make_pool(cooldown=10, max_cooldown=25)
+    first, second = pool.keys
+    
+    pool.record(first, "OVER_QUERY_LIMIT")
+    assert 9 < first.benched_until - time.time() <= 10
+    assert all(pool.checkout()[0] is second for _ in range(3))
+    
+    pool.record(first, "OVER_QUERY_LIMIT")
+    assert 19 < first.benched_until - time.time() <= 20
+    pool.record(first, "OVER_QUERY_LIMIT")
+    assert 24 < first.benched_until - time.time() <= 25  # limitado a max_cooldown
+    
+    pool.record(first, "OK")
+    assert first.strikes == 0
+    assert pool.stats()[first.name]["benched_for"] > 0
+
+
+def test_all_keys_benched_returns_the_shortest_wait():
+    pool = make_pool(cooldown=30)
+    first, second = pool.keys
+    pool.record(first, "OVER_QUERY_LIMIT")
+    pool.record(second, "OVER_QUERY_LIMIT")
+    second.benched_until = time.time() + 5
+    
+    key, wait = pool.checkout()
+    
+    assert key is second
+    assert 4 < wait <= 5
+
+
+def test_next_pages_use_the_pinned_key():
+    pool = make_pool()
+    first, second = pool.keys
+    second.requests = 100  # o pool preferiria a primeira
+    
+    pool.record(second, "OK", next_page_token="TOKEN")
+    
+    assert pool.checkout("TOKEN")[0] is second
+    assert pool.checkout()[0] is first
+
+
+def test_pinned_key_on_cooldown_fails_fast():
+    pool = make_pool(cooldown=60)
+    first, _ = pool.keys
+    pool.record(first, "OK", next_page_token="TOKEN")
+    pool.record(first, "OVER_QUERY_LIMIT")
+    used = first.used_today
+    
+    with pytest.raises(KeyBenched) as info:
+        pool.checkout("TOKEN")
+    
+    assert info.value.key_name == first.name
+    assert 59 < info.value.retry_after <= 60
+    assert first.used_today == used
+    
+    first.benched_until = 0.0
+    assert pool.checkout("TOKEN") == (first, 0.0)
+
+
+def test_pinned_key_without_quota_raises():
+    pool = make_pool(daily_quota=1)
+    key, _ = pool.checkout()
+    pool.record(key, "OK", next_page_token="TOKEN")
+    
+    with pytest.raises(QuotaExhausted):
+        pool.checkout("TOKEN")
+
+
+def test_pinned_tokens_are_bounded():
+    pool = make_pool()
+    first, _ = pool.keys
+    for idx in range(MAX_PINNED_TOKENS + 10):
+        pool.record(first, "OK", next_page_token=f"T{idx}")
+    
+    assert len(pool._pinned) == MAX_PINNED_TOKENS
+    assert "T0" not in pool._pinned
+
+
+def test_analyzer_does_not_wait_for_a_benched_pinned_key():
+    with PlacesAPIEmulator(EmulatorConfig()) as emulator:
+        pool = make_pool(cooldown=300)
+        analyzer = GoogleMapsRankingAnalyzer(pool, base_url=emulator.base_url, qps=0)
+        first, _ = pool.keys
+        pool.record(first, "OK", next_page_token="TOKEN")
+        pool.record(first, "OVER_QUERY_LIMIT")
+        
+        started = time.monotonic()
+        data = analyzer._request(emulator.base_url + NEARBY_SEARCH_PATH, {"pagetoken": "TOKEN"})
+        
+        assert time.monotonic() - started < 1
+        assert data["status"] == "OVER_QUERY_LIMIT"
+        assert "fora do pool" in data["error_message"]
+        assert emulator.stats["nearbysearch"] == 0
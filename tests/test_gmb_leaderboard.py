@@ -0,0 +1,98 @@
+"""
+Ranqueamento vetorizado (gmb_leaderboard.rank_profiles) e percentis do analisador
+"""
+
+import math
+import random
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from gmb_leaderboard import rank_profiles
+from gmb_ranking_analyzer import comparative_values, compute_comparative_metrics
+
+
+def reference_values(scores):
+    """Laço quadrático anterior a rank_profiles (referência)"""
+    leader = max(scores)
+    return [
+        (round(sum(s <= score for s in scores) / len(scores) * 100, 1), round(leader - score, 2))
+        for score in scores
+    ]
+
+
+def reference_rank(scores):
+    return [1 + sum(s > score for s in scores) for score in scores]
+
+
+def market(size, seed, groups=("padaria", "cafe", "bar")):
+    rng = random.Random(seed)
+    # Poucos valores distintos: muitos empates
+    return pd.DataFrame({
+        "place_id": [f"p{i}" for i in range(size)],
+        "keyword": [rng.choice(groups) for _ in range(size)],
+        "overall_strength_score": [rng.choice([40.0, 55.5, 55.5, 61.25, 70.0, 88.8]) for _ in range(size)],
+    })
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_matches_reference_globally_and_per_group(seed):
+    df = market(200, seed)
+    
+    ranked = rank_profiles(df)
+    scores = df["overall_strength_score"].tolist()
+    assert list(zip(ranked["percentile_rank"], ranked["gap_to_leader"])) == reference_values(scores)
+    assert ranked["score_rank"].tolist() == reference_rank(scores)
+    
+    grouped = rank_profiles(df, group_by="keyword", suffix="_keyword")
+    for _, group in grouped.groupby("keyword"):
+        scores = group["overall_strength_score"].tolist()
+        values = list(zip(group["percentile_rank_keyword"], group["gap_to_leader_keyword"]))
+        assert values == reference_values(scores)
+        assert group["score_rank_keyword"].tolist() == reference_rank(scores)
+
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_compute_comparative_metrics_matches_reference(seed):
+    scores = market(150, seed)["overall_strength_score"].tolist()
+    # compute_comparative_metrics só lê o score e preenche os dois campos
+    metrics_list = [SimpleNamespace(overall_strength_score=score) for score in scores]
+    
+    compute_comparative_metrics(metrics_list)
+    
+    assert [(m.percentile_rank, m.gap_to_leader) for m in metrics_list] == reference_values(scores)
+    assert comparative_values(scores) == reference_values(scores)
+
+
+def test_missing_group_key_forms_its_own_group():
+    df = pd.DataFrame({
+        "keyword": ["padaria", "padaria", None],
+        "overall_strength_score": [50.0, 70.0, 60.0],
+    })
+    
+    ranked = rank_profiles(df, group_by=["keyword"])
+    
+    assert ranked["score_rank"].dtype == "Int64"
+    assert ranked["score_rank"].tolist() == [2, 1, 1]
+    assert ranked["percentile_rank"].tolist() == [50.0, 100.0, 100.0]
+
+
+def test_nan_score_gets_empty_rank():
+    df = pd.DataFrame({"overall_strength_score": [50.0, math.nan, 70.0]})
+    
+    ranked = rank_profiles(df)
+    
+    assert ranked["score_rank"].dtype == "Int64"
+    assert ranked["score_rank"].iloc[1] is pd.NA
+    assert ranked["score_rank"].iloc[[0, 2]].tolist() == [2, 1]
+    assert np.isnan(ranked["gap_to_leader"].iloc[1])
+
+
+def test_empty_frame_has_same_dtypes():
+    empty = rank_profiles(pd.DataFrame({"overall_strength_score": pd.Series(dtype="float64")}))
+    full = rank_profiles(pd.DataFrame({"overall_strength_score": [10.0]}))
+    
+    for column in ("percentile_rank", "gap_to_leader", "score_rank"):
+        assert empty[column].dtype == full[column].dtype
@@ -0,0 +1,118 @@
+"""
+Orçamento de chamadas (gmb_planner.CallBudget) contra o emulador local
+"""
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from gmb_async import AsyncGoogleMapsRankingAnalyzer
+from gmb_batch import run_batch
+from gmb_emulator import EmulatorConfig, PlacesAPIEmulator
+from gmb_planner import CallBudget
+from gmb_ranking_analyzer import GoogleMapsRankingAnalyzer
+
+LOCATION = "-23.55,-46.63"
+
+
+@pytest.fixture(scope="module")
+def emulator():
+    with PlacesAPIEmulator(EmulatorConfig(market_size=60, token_ready_delay=0.05)) as emu:
+        yield emu
+
+
+def make_analyzer(emulator, budget, max_workers=1):
+    return GoogleMapsRankingAnalyzer(
+        "chave", base_url=emulator.base_url, qps=0, page_token_delay=0.05,
+        max_workers=max_workers, budget=budget
+    )
+
+
+@pytest.mark.parametrize("max_workers", [1, 8])
+def test_run_limit_applies_per_run_degrade(emulator, max_workers):
+    budget = CallBudget(max_run_calls=30, on_exhausted="degrade")
+    analyzer = make_analyzer(emulator, budget, max_workers)
+    
+    for keyword in ("padaria", "cafe"):
+        profiles = analyzer.run_analysis_records(LOCATION, 2000, keyword)
+        # As 3 páginas são buscadas; os detalhes usam o resto do orçamento
+        assert len(profiles) == 60
+        assert 0 < sum(profile.phone is not None for profile in profiles) < 60
+        assert budget.run_calls == 30
+    
+    assert budget.daily_calls == 60
+    assert budget.held_pages == 0
+
+
+def test_run_limit_applies_per_run_stop(emulator):
+    budget = CallBudget(max_run_calls=30, on_exhausted="stop")
+    analyzer = make_analyzer(emulator, budget)
+    
+    first = analyzer.run_analysis_records(LOCATION, 2000, "padaria")
+    second = analyzer.run_analysis_records(LOCATION, 2000, "cafe")
+    
+    assert len(first) == len(second) > 0
+    assert budget.stopped
+
+
+def test_batch_is_one_run(emulator):
+    budget = CallBudget(max_run_calls=30, on_exhausted="degrade")
+    analyzer = make_analyzer(emulator, budget, max_workers=4)
+    jobs = [(LOCATION, 2000, "bar", 3), (LOCATION, 2000, "pizza", 3)]
+    
+    for _ in range(2):
+        result = run_batch(analyzer, jobs)
+        assert budget.run_calls <= 30
+        assert all(len(metrics) == 60 for metrics in result.metrics.values())
+
+
+def test_daily_state_saved_at_end_of_run(emulator, tmp_path):
+    state = tmp_path / "budget.sqlite"
+    budget = CallBudget(max_daily_calls=1000, state_path=state)
+    make_analyzer(emulator, budget).run_analysis_records(LOCATION, 2000, "padaria", max_pages=1)
+    
+    assert CallBudget(max_daily_calls=1000, state_path=state).daily_calls == budget.daily_calls == 21
+
+
+def spend(state, calls):
+    budget = CallBudget(max_daily_calls=10_000, state_path=state)
+    with budget.run():
+        for _ in range(calls):
+            assert budget.allow("details")
+    return budget.daily_calls
+
+
+def test_daily_count_adds_up_across_processes(tmp_path):
+    state = tmp_path / "budget.sqlite"
+    first = CallBudget(max_daily_calls=100, state_path=state)
+    second = CallBudget(max_daily_calls=100, state_path=state)
+    
+    # Cada um grava só as suas chamadas novas; nenhum sobrescreve o outro
+    for budget in (first, second, first):
+        with budget.run():
+            for _ in range(25):
+                budget.allow("details")
+    
+    assert first.daily_calls == 75
+    assert CallBudget(max_daily_calls=100, state_path=state).remaining() == 25
+    
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        list(pool.map(spend, [state] * 4, [53] * 4))
+    assert CallBudget(state_path=state).daily_calls == 75 + 4 * 53
+
+
+def test_async_run_limit_applies_per_run(emulator):
+    async def run():
+        budget = CallBudget(max_run_calls=30, on_exhausted="degrade")
+        async with AsyncGoogleMapsRankingAnalyzer(
+            "chave", base_url=emulator.base_url, qps=0, page_token_delay=0.05, budget=budget
+        ) as analyzer:
+            return [
+                await analyzer.run_analysis_records(LOCATION, 2000, keyword)
+                for keyword in ("padaria", "cafe")
+            ]
+    
+    for profiles in asyncio.run(run()):
+        assert len(profiles) == 60
+        assert 0 < sum(profile.phone is not None for profile in profiles) < 60
@@ -0,0 +1,75 @@
+"""
+Detalhes com single-flight (GoogleMapsRankingAnalyzer.get_place_details)
+"""
+
+import threading
+import time
+
+from gmb_emulator import NEARBY_SEARCH_ROUTE, EmulatorConfig, LatencyModel, PlacesAPIEmulator
+from gmb_metrics import DETAILS, MetricsRegistry
+from gmb_ranking_analyzer import GoogleMapsRankingAnalyzer
+
+SEARCH = {"location": "-23.55,-46.63", "radius": "1000", "keyword": "padaria"}
+
+
+def test_concurrent_lookups_make_one_request():
+    config = EmulatorConfig(details_latency=LatencyModel(mean_ms=200), token_ready_delay=0.0)
+    threads_count = 8
+    
+    with PlacesAPIEmulator(config) as emulator:
+        place_id = emulator.handle(NEARBY_SEARCH_ROUTE, SEARCH)[1]["results"][0]["place_id"]
+        metrics = MetricsRegistry()
+        analyzer = GoogleMapsRankingAnalyzer(
+            "chave", base_url=emulator.base_url, qps=0, metrics=metrics
+        )
+        barrier = threading.Barrier(threads_count)
+        results = [None] * threads_count
+        
+        def lookup(index):
+            barrier.wait()
+            results[index] = analyzer.get_place_details(place_id)
+        
+        threads = [threading.Thread(target=lookup, args=(i,)) for i in range(threads_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert emulator.stats["details"] == 1
+    
+    assert all(result is results[0] and result["status"] == "OK" for result in results)
+    assert analyzer.detail_stats == {"fetched": 1, "coalesced": threads_count - 1}
+    # Um hit/miss por consulta, mesmo para quem esperou a requisição do líder
+    lookups = metrics.snapshot()["counters"][DETAILS]
+    assert lookups["result=miss"] == threads_count
+    assert "result=memory_hit" not in lookups
+
+
+def test_follower_needing_more_fields_counts_one_lookup():
+    config = EmulatorConfig(details_latency=LatencyModel(mean_ms=200), token_ready_delay=0.0)
+    
+    with PlacesAPIEmulator(config) as emulator:
+        place_id = emulator.handle(NEARBY_SEARCH_ROUTE, SEARCH)[1]["results"][0]["place_id"]
+        metrics = MetricsRegistry()
+        analyzer = GoogleMapsRankingAnalyzer(
+            "chave", base_url=emulator.base_url, qps=0, metrics=metrics
+        )
+        leader = threading.Thread(target=analyzer.get_place_details, args=(place_id, ["name"]))
+        leader.start()
+        time.sleep(0.05)
+        # Espera o líder, que pediu menos campos, e busca só o que falta
+        result = analyzer.get_place_details(place_id, ["name", "formatted_address"])
+        leader.join()
+        
+        assert emulator.stats["details"] == 2
+    
+    assert "formatted_address" in result["result"] and "name" in result["result"]
+    assert analyzer.detail_stats == {"fetched": 2, "coalesced": 1}
+    assert metrics.snapshot()["counters"][DETAILS] == {"result=miss": 2, "result=fetched": 2, "result=coalesced": 1}
+
+
+def test_stats_lock_is_per_instance():
+    first = GoogleMapsRankingAnalyzer("chave", qps=0)
+    second = GoogleMapsRankingAnalyzer("chave", qps=0)
+    
+    assert first._stats_lock is not second._stats_lock
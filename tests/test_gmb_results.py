@@ -0,0 +1,127 @@
+"""
+Resultados colunares (gmb_results.ProfileTable, ProfileMetricsView e ProfileTableBuilder)
+"""
+
+from dataclasses import asdict, replace
+
+import numpy as np
+import pytest
+
+from gmb_ranking_analyzer import AnalysisSummary, ProfileMetrics
+from gmb_results import COLUMNS, ProfileTable, ProfileTableBuilder
+
+CATEGORIES = ["📊 BOM", "🏆 DOMINANTE", "⚠️ MÉDIO"]
+
+
+def profile(rank, **changes):
+    values = dict(
+        place_id=f"p{rank}", name=f"Lugar {rank}", rank_position=rank,
+        address=f"Rua {rank}", vicinity="Centro", phone=None if rank % 2 else f"11 {rank}",
+        website=None, latitude=-23.5 - rank / 1000, longitude=-46.6, distance_from_center=rank * 10.0,
+        rating=4.0 + rank / 10, total_reviews=rank * 7,
+        review_velocity_score=1.0, rating_quality_score=2.0, completeness_score=3.0,
+        authority_score=4.0, relevance_score=5.0, prominence_score=6.0,
+        overall_strength_score=90.0 - rank, strength_category=CATEGORIES[rank % 3],
+        percentile_rank=0.0, gap_to_leader=0.0, analysis_date=f"2024-01-0{rank % 2 + 1}",
+    )
+    values.update(changes)
+    return ProfileMetrics(**values)
+
+
+def summary_for(profiles):
+    return AnalysisSummary(
+        total_profiles=len(profiles),
+        leader_score=max(p.overall_strength_score for p in profiles),
+        percentile_ranks={p.rank_position: p.rank_position * 10.0 for p in profiles},
+        gaps_to_leader={p.rank_position: p.rank_position - 1.0 for p in profiles},
+    )
+
+
+def build(profiles, summary=None, sort=True):
+    builder = ProfileTableBuilder()
+    for item in profiles:
+        builder.add(item)
+    if summary is not None:
+        builder.add(summary)
+    return builder, builder.build(sort=sort)
+
+
+def test_builder_round_trips_profiles_and_applies_summary():
+    profiles = [profile(rank) for rank in range(1, 8)]
+    summary = summary_for(profiles)
+    
+    _, table = build(profiles, summary)
+    
+    expected = [summary.apply(replace(p)) for p in profiles]
+    assert len(table) == len(expected)
+    assert list(table) == expected
+    assert table.column("strength_category").tolist() == [p.strength_category for p in expected]
+    # Categorias na ordem canônica (força) e cronológica (datas)
+    assert table._categories["strength_category"] == ["🏆 DOMINANTE", "📊 BOM", "⚠️ MÉDIO"]
+    assert table._categories["analysis_date"] == ["2024-01-01", "2024-01-02"]
+
+
+def test_in_order_build_shares_builder_memory():
+    builder, table = build([profile(rank) for rank in range(1, 6)])
+    
+    for name in ("rank_position", "rating", "overall_strength_score"):
+        assert np.shares_memory(table.column(name), np.frombuffer(builder._numeric[name]))
+
+
+def test_out_of_order_build_sorts_by_rank():
+    profiles = [profile(rank) for rank in (3, 1, 5, 2, 4)]
+    builder, table = build(profiles, summary_for(profiles))
+    
+    assert table.column("rank_position").tolist() == [1, 2, 3, 4, 5]
+    assert table.column("place_id").tolist() == ["p1", "p2", "p3", "p4", "p5"]
+    assert table.column("percentile_rank").tolist() == [10.0, 20.0, 30.0, 40.0, 50.0]
+    # Reordenar copia as colunas
+    assert not np.shares_memory(table.column("rating"), np.frombuffer(builder._numeric["rating"]))
+    
+    _, unsorted = build(profiles, sort=False)
+    assert unsorted.column("rank_position").tolist() == [3, 1, 5, 2, 4]
+
+
+def test_empty_builder():
+    _, table = build([])
+    
+    assert len(table) == 0
+    assert list(table.to_dataframe().columns) == list(COLUMNS)
+
+
+def test_to_dataframe_matches_asdict_and_shares_numeric_columns():
+    profiles = [profile(rank, phone=f"11 {rank}", website="https://x.example.com") for rank in range(1, 6)]
+    _, table = build(profiles)
+    
+    df = table.to_dataframe()
+    
+    assert df.to_dict("records") == [asdict(p) for p in profiles]
+    assert str(df["strength_category"].dtype) == "category"
+    assert np.shares_memory(df["rating"].to_numpy(), table.column("rating"))
+
+
+def test_metrics_view_is_a_read_only_sequence():
+    profiles = [profile(rank) for rank in range(1, 5)]
+    _, table = build(profiles)
+    view = table.metrics
+    
+    assert len(view) == 4
+    assert view[0] == profiles[0]
+    assert view[-1] == profiles[-1]
+    assert view[1:3] == profiles[1:3]
+    assert list(view) == profiles
+    with pytest.raises(IndexError):
+        view[4]
+    
+    view[0].name = "alterado"
+    assert table.row(0).name == "Lugar 1"
+    assert ProfileTable.from_metrics(view) is table
+
+
+def test_from_metrics_keeps_given_order():
+    profiles = [profile(rank) for rank in (2, 1)]
+    
+    table = ProfileTable.from_metrics(profiles)
+    
+    assert list(table) == profiles
+    assert table.sort_by_rank().column("rank_position").tolist() == [1, 2]
@@ -0,0 +1,66 @@
+"""
+Scoring em lote (gmb_scoring.score_batch) contra o scoring por perfil
+"""
+
+import pytest
+
+from gmb_benchmarks import CENTER_LAT, CENTER_LNG, KEYWORD, RADIUS, synthetic_payloads
+from gmb_ranking_analyzer import ProfileScorer, place_distances
+from gmb_scoring import round_exact, score_batch
+
+COLUMNS = [
+    "review_velocity_score", "rating_quality_score", "completeness_score", "authority_score",
+    "relevance_score", "prominence_score", "overall_strength_score", "strength_category",
+]
+
+
+def batch_for(payloads, scorer):
+    places = [place for place, _ in payloads]
+    results = [details["result"] for _, details in payloads]
+    return score_batch(
+        ratings=[place.get("rating", 0) for place in places],
+        total_reviews=[place.get("user_ratings_total", 0) for place in places],
+        distances=place_distances(places, CENTER_LAT, CENTER_LNG),
+        photo_counts=[scorer.count_photos(result) for result in results],
+        field_masks={
+            field: [bool(result.get(field)) for result in results]
+            for field in scorer.COMPLETENESS_FIELDS if field != "photos"
+        },
+        rank_positions=range(1, len(payloads) + 1),
+        total_results=len(payloads),
+        radius=RADIUS,
+        names=[place.get("name", "N/A") for place in places],
+        types=[result.get("types", []) for result in results],
+        vicinities=[place.get("vicinity", "N/A") for place in places],
+        keyword=KEYWORD,
+        scorer=scorer,
+    )
+
+
+@pytest.mark.parametrize("seed", [7, 11])
+def test_score_batch_is_identical_to_score_profile(seed):
+    payloads = synthetic_payloads(1500, seed=seed)
+    # Perfis sem avaliações e sem detalhes
+    payloads[0][0].update(rating=0, user_ratings_total=0)
+    payloads[1] = (dict(payloads[1][0]), {"result": {}})
+    scorer = ProfileScorer()
+    places = [place for place, _ in payloads]
+    distances = place_distances(places, CENTER_LAT, CENTER_LNG)
+    
+    expected = [
+        scorer.score_profile(
+            place, details, idx, CENTER_LAT, CENTER_LNG, RADIUS, KEYWORD, len(payloads),
+            distance=distances[idx - 1]
+        )
+        for idx, (place, details) in enumerate(payloads, 1)
+    ]
+    batch = batch_for(payloads, scorer)
+    
+    for column in COLUMNS:
+        # Igualdade exata (bit a bit para os floats)
+        assert batch[column].tolist() == [getattr(profile, column) for profile in expected], column
+
+
+def test_round_exact_matches_python_round_near_ties():
+    values = [0.125, 0.135, 2.675, 1.005, 10.0049999, 33.345, -1.115, 99.995]
+    assert round_exact(values).tolist() == [round(value, 2) for value in values]
@@ -0,0 +1,77 @@
+"""
+Linhas do tempo do ChromeTraceRecorder (gmb_tracing)
+"""
+
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from gmb_tracing import ChromeTraceRecorder
+
+
+def tids(recorder, name=None):
+    return [event["tid"] for event in recorder.events if name is None or event["name"] == name]
+
+
+def test_each_task_gets_its_own_track_even_when_ids_are_reused():
+    recorder = ChromeTraceRecorder()
+    
+    async def traced(idx):
+        with recorder.span("tarefa", idx=idx):
+            await asyncio.sleep(0)
+    
+    async def run():
+        # Uma task por vez: as anteriores são liberadas e o id() se repete
+        for idx in range(200):
+            await asyncio.create_task(traced(idx))
+    
+    asyncio.run(run())
+    
+    assert len(set(tids(recorder))) == 200
+
+
+def test_child_task_does_not_share_the_parent_track():
+    recorder = ChromeTraceRecorder()
+    
+    async def child():
+        with recorder.span("filha"):
+            await asyncio.sleep(0)
+    
+    async def parent():
+        with recorder.span("mãe"):
+            await asyncio.gather(child(), child())
+        with recorder.span("mãe"):
+            pass
+    
+    asyncio.run(parent())
+    
+    parent_tids = tids(recorder, "mãe")
+    child_tids = tids(recorder, "filha")
+    assert len(set(parent_tids)) == 1
+    assert len(set(child_tids)) == 2
+    assert not set(parent_tids) & set(child_tids)
+
+
+def test_threads_keep_one_track_each(tmp_path):
+    recorder = ChromeTraceRecorder()
+    
+    def traced():
+        with recorder.span("thread"):
+            pass
+    
+    # Threads em sequência (o identificador pode se repetir)
+    for _ in range(20):
+        thread = threading.Thread(target=traced)
+        thread.start()
+        thread.join()
+    assert len(set(tids(recorder))) == 20
+    
+    recorder.clear()
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        list(pool.map(lambda _: traced(), range(50)))
+    assert len(set(tids(recorder))) <= 2
+    
+    path = recorder.export(tmp_path / "trace.json")
+    events = json.loads(path.read_text(encoding="utf-8"))["traceEvents"]
+    assert len(events) == 50
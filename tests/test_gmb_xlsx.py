@@ -0,0 +1,83 @@
+"""
+Escrita de .xlsx (gmb_xlsx.StreamingXlsxWriter)
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from gmb_xlsx import StreamingXlsxWriter
+
+
+def test_sheet_names_are_valid_and_unique(tmp_path):
+    path = tmp_path / "nomes.xlsx"
+    frame = pd.DataFrame({"a": [1, None, 3], "b": pd.Categorical(["x", None, "y"]), "c": ["t\x01", None, "z"]})
+    titles = ["A" * 40, "A" * 45, "bad[1]", "bad1", "x/y:z*?"]
+    
+    with StreamingXlsxWriter(path) as writer:
+        names = [writer.write_frame(title, frame)[0] for title in titles]
+    
+    workbook = load_workbook(path)
+    assert workbook.sheetnames == names
+    assert len({name.casefold() for name in names}) == len(names)
+    assert all(len(name) <= 31 for name in names)
+    
+    rows = [[cell.value for cell in row] for row in workbook[names[0]].iter_rows()]
+    assert rows == [["a", "b", "c"], [1, "x", "t"], [None, None, None], [3, "y", "z"]]
+    assert workbook[names[0]]["A1"].font.b
+
+
+def test_values_round_trip(tmp_path):
+    path = tmp_path / "valores.xlsx"
+    frame = pd.DataFrame({
+        "int": [1, -2, 3],
+        "nullable": pd.array([1, None, 3], dtype="Int64"),
+        "float": [1.5, float("inf"), 1e-7],
+        "bool": [True, False, True],
+        "mixed": [np.int64(7), np.float64(2.5), " a & <b> "],
+        "date": pd.Categorical(["2024-01-01", "2024-01-02", "2024-01-01"]),
+    })
+    
+    with StreamingXlsxWriter(path) as writer:
+        writer.write_frame("Valores", frame)
+        writer.write_frame("Resumo", frame[["int"]].rename_axis("pos"), index=True)
+    
+    workbook = load_workbook(path)
+    rows = [[cell.value for cell in row] for row in workbook["Valores"].iter_rows(min_row=2)]
+    assert rows == [
+        [1, 1, 1.5, True, 7, "2024-01-01"],
+        [-2, None, None, False, 2.5, "2024-01-02"],
+        [3, 3, 1e-7, True, " a & <b> ", "2024-01-01"],
+    ]
+    summary = [[cell.value for cell in row] for row in workbook["Resumo"].iter_rows()]
+    assert summary == [["pos", "int"], [0, 1], [1, -2], [2, 3]]
+
+
+def test_large_frame_matches_pandas(tmp_path):
+    path = tmp_path / "grande.xlsx"
+    rng = np.random.default_rng(3)
+    frame = pd.DataFrame({
+        "score": rng.uniform(0, 100, 25_000),
+        "reviews": rng.integers(0, 5000, 25_000),
+        "name": [f"Lugar {i}" for i in range(25_000)],
+    })
+    
+    with StreamingXlsxWriter(path) as writer:
+        writer.write_frame("Dados", frame)
+    
+    pd.testing.assert_frame_equal(pd.read_excel(path, engine="openpyxl"), frame, check_dtype=False)
+
+
+def test_failed_write_removes_file_and_empty_workbook_has_a_sheet(tmp_path):
+    path = tmp_path / "falha.xlsx"
+    with pytest.raises(RuntimeError):
+        with StreamingXlsxWriter(path) as writer:
+            writer.write_frame("Dados", pd.DataFrame({"a": [1]}))
+            raise RuntimeError("falhou")
+    assert not path.exists()
+    
+    empty = tmp_path / "vazio.xlsx"
+    with StreamingXlsxWriter(empty):
+        pass
+    assert load_workbook(empty).sheetnames == ["Planilha"]